@@ -0,0 +1,228 @@
+"""
+redSpec.AI Agent Worker
+Long-lived Python process that serves agent requests for the Next.js API routes
+
+The worker imports the agents once at startup and keeps their runners warm,
+so a request only pays for the model call instead of a fresh interpreter,
+the google.adk import and agent construction.
+
+Protocol: newline-delimited JSON over stdin/stdout, one message per line.
+
+    -> {"id": "1", "method": "chat", "params": {"prompt": "..."}}
+    <- {"id": "1", "ok": true, "result": {"output": "..."}}
+    <- {"id": "1", "ok": false, "error": "...", "traceback": "..."}
+
+Long-running methods (generate_spec) also send events for the request
+before the final reply, and can be stopped with the cancel method:
+
+    <- {"id": "2", "event": "progress", "data": {"agent_name": "prd", "status": "streaming", ...}}
+    -> {"id": "3", "method": "cancel", "params": {"id": "2"}}
+    <- {"id": "2", "ok": false, "error": "cancelled", "cancelled": true}
+
+On startup the worker announces itself with {"event": "ready", ...}.
+Anything else the agents print is redirected to stderr so it can never
+corrupt the protocol stream.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import traceback
+from dataclasses import asdict
+from typing import Dict, Any, Optional
+
+# Keep the real stdout for protocol messages only
+_protocol_out = sys.stdout
+sys.stdout = sys.stderr
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+from google.adk.runners import InMemoryRunner
+
+load_dotenv()
+
+from agents import conversational_prd_agent
+from orchestrator import RedSpecOrchestrator, AgentProgress
+
+
+class AgentWorker:
+    """Serves agent requests from a single warm interpreter"""
+
+    def __init__(self):
+        """Initialize worker with warm agent runners"""
+        self.runners = {
+            "prd": InMemoryRunner(agent=conversational_prd_agent),
+        }
+        self.started_at = time.time()
+        self.served = 0
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.orchestrator: Optional[RedSpecOrchestrator] = None
+        self._write_lock = asyncio.Lock()
+
+    async def send(self, message: Dict[str, Any]):
+        """Write one protocol message to stdout"""
+        async with self._write_lock:
+            _protocol_out.write(json.dumps(message, default=str) + "\n")
+            _protocol_out.flush()
+
+    async def run_prompt(self, agent_name: str, prompt: str) -> str:
+        """
+        Run a prompt through a warm runner in a fresh session
+
+        Each request carries its own conversation history, so sessions are
+        never shared between requests and are dropped once the run is done.
+
+        Args:
+            agent_name: Key of the runner to use
+            prompt: Input prompt for the agent
+
+        Returns:
+            Final response text
+        """
+        runner = self.runners[agent_name]
+        session_id = f"worker-{uuid.uuid4().hex}"
+
+        try:
+            events = await runner.run_debug(prompt, session_id=session_id, quiet=True)
+        finally:
+            try:
+                await runner.session_service.delete_session(
+                    app_name=runner.app_name,
+                    user_id="debug_user_id",
+                    session_id=session_id
+                )
+            except Exception:
+                pass
+
+        output = ""
+        for event in events:
+            if event.is_final_response() and getattr(event, 'content', None) and event.content.parts:
+                for part in event.content.parts:
+                    if getattr(part, 'text', None):
+                        output = part.text
+        return output
+
+    async def handle_chat(self, request_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the conversational PRD agent on a chat prompt"""
+        if not os.environ.get('GOOGLE_API_KEY'):
+            raise ValueError("GOOGLE_API_KEY environment variable is missing")
+
+        output = await self.run_prompt("prd", params.get("prompt", ""))
+        return {"output": output}
+
+    async def handle_generate_spec(self, request_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the full orchestrator workflow, streaming its progress as events
+
+        Every AgentProgress update (including "streaming" output deltas) is
+        sent as a progress event for this request while the workflow runs.
+        """
+        if not os.environ.get('GOOGLE_API_KEY'):
+            raise ValueError("GOOGLE_API_KEY environment variable is missing")
+
+        if self.orchestrator is None:
+            self.orchestrator = RedSpecOrchestrator()
+
+        async def on_progress(progress: AgentProgress):
+            await self.send({
+                "id": request_id,
+                "event": "progress",
+                "data": {
+                    "agent_name": progress.agent_name,
+                    "phase": progress.phase.value,
+                    "status": progress.status,
+                    "message": progress.message,
+                    "progress_percent": progress.progress_percent,
+                    "data": progress.data,
+                }
+            })
+
+        result = await self.orchestrator.generate_spec(
+            params.get("product_idea", ""),
+            params.get("github_repo") or None,
+            on_progress
+        )
+        return asdict(result)
+
+    async def handle_cancel(self, request_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Cancel an in-flight request"""
+        task = self.in_flight.get(str(params.get("id")))
+        if task is None:
+            return {"cancelled": False}
+        task.cancel()
+        return {"cancelled": True}
+
+    async def handle_ping(self, request_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Health check"""
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "served": self.served,
+            "in_flight": len(self.in_flight),
+        }
+
+    async def dispatch(self, request_id: str, method: str, params: Dict[str, Any]):
+        """Run one request and reply with its result or error"""
+        handler = getattr(self, f"handle_{method}", None)
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown method: {method}")
+            result = await handler(request_id, params)
+            await self.send({"id": request_id, "ok": True, "result": result})
+        except asyncio.CancelledError:
+            await self.send({"id": request_id, "ok": False, "error": "cancelled", "cancelled": True})
+        except Exception as e:
+            await self.send({
+                "id": request_id,
+                "ok": False,
+                "error": str(e),
+                "traceback": traceback.format_exc()
+            })
+        finally:
+            self.in_flight.pop(request_id, None)
+            self.served += 1
+
+    async def serve(self):
+        """Read requests from stdin until it is closed"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=64 * 1024 * 1024)
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        await self.send({"event": "ready", "pid": os.getpid(), "agents": list(self.runners)})
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as e:
+                await self.send({"id": None, "ok": False, "error": f"Invalid JSON: {e}"})
+                continue
+
+            request_id = str(message.get("id"))
+            task = asyncio.create_task(
+                self.dispatch(request_id, message.get("method", ""), message.get("params") or {})
+            )
+            self.in_flight[request_id] = task
+
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight.values(), return_exceptions=True)
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Entry point"""
+    asyncio.run(AgentWorker().serve())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
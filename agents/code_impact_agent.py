@@ -7,23 +7,47 @@ from google.adk.agents.llm_agent import Agent
 from google.adk.tools import FunctionTool
 import sys
 import os
+import asyncio
+from typing import List
 
 # Add tools directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from tools.github_tool import search_codebase as _search_codebase, read_code_file as _read_code_file
+from tools.github_tool import (
+    search_codebase as _search_codebase,
+    read_code_file as _read_code_file,
+    read_code_files as _read_code_files,
+    find_symbol as _find_symbol,
+    list_symbols_in_file as _list_symbols_in_file,
+)
 
 # Create wrapper functions for tools
-def search_in_codebase(repo_name: str, search_term: str) -> str:
-    """Search for a term in the codebase to find relevant files."""
-    return _search_codebase(repo_name, search_term)
+# git, walks and index builds run in a worker thread so they never block the event loop
+async def search_in_codebase(repo_name: str, search_term: str, cursor: str = "") -> str:
+    """Search for a term in the codebase to find relevant files. Results are ranked by file and paged; pass next_cursor as cursor for more."""
+    return await asyncio.to_thread(_search_codebase, repo_name, search_term, cursor=cursor)
+
+async def read_code_file(repo_name: str, file_path: str, start_line: int = 0, end_line: int = 0, around_line: int = 0, byte_start: int = 0) -> str:
+    """Read a file to analyze its implementation. Pass start_line/end_line (e.g. a span from find_symbol) or around_line to read only those lines, or the byte_start given by a truncation marker."""
+    return await asyncio.to_thread(_read_code_file, repo_name, file_path, start_line, end_line, around_line, byte_start=byte_start)
+
+async def read_code_files(repo_name: str, file_paths: List[str]) -> str:
+    """Read several files in one call (up to 20). Each file is cut at 16 KB with a note saying which start_line to continue from."""
+    return await asyncio.to_thread(_read_code_files, repo_name, file_paths)
 
-def read_code_file(repo_name: str, file_path: str) -> str:
-    """Read a specific file to analyze its implementation."""
-    return _read_code_file(repo_name, file_path)
+async def find_symbol(repo_name: str, symbol_name: str) -> str:
+    """Find where a class, function or method is defined (file and line span)."""
+    return await asyncio.to_thread(_find_symbol, repo_name, symbol_name)
+
+async def list_symbols_in_file(repo_name: str, file_path: str) -> str:
+    """List the classes, functions and methods defined in a file with their line spans."""
+    return await asyncio.to_thread(_list_symbols_in_file, repo_name, file_path)
 
 search_tool = FunctionTool(search_in_codebase)
 read_tool = FunctionTool(read_code_file)
+read_many_tool = FunctionTool(read_code_files)
+find_symbol_tool = FunctionTool(find_symbol)
+list_symbols_tool = FunctionTool(list_symbols_in_file)
 
 code_impact_agent = Agent(
     model='gemini-2.0-flash-exp',
@@ -42,7 +66,13 @@ Your role is to analyze the ACTUAL codebase (not make assumptions) and identify
 - List main components that will be affected
 
 ### Step 2: Search the Codebase
-Use `search_in_codebase` to find:
+When you know a class or function name, use `find_symbol` first - it returns the
+definition's file and exact line span from the symbol index. Use
+`list_symbols_in_file` to see a file's classes and methods before reading it.
+
+Use `search_in_codebase` to find the following. Results come back ranked by file with
+a few matching lines each; only page further (`cursor=next_cursor`) if the first page
+doesn't cover what you need.
 - Existing similar features
 - Related services and components
 - Integration points
@@ -59,7 +89,13 @@ Use `search_in_codebase` to find:
 - "LocationService" → Find location/gps related code
 
 ### Step 3: Read and Analyze Files
-Use `read_code_file` to examine:
+Use `read_code_file` to examine the code. When you already know the lines you need
+(a symbol's span from `find_symbol`, a match from a search), pass `start_line`/`end_line`
+or `around_line` instead of reading the whole file. Large files are cut off with a
+marker saying which `start_line` (or `byte_start`) to continue from. When you need
+several files, read them together with `read_code_files` in one call instead of one
+`read_code_file` call each.
+Look at:
 - Implementation details
 - Class structure
 - Dependencies
@@ -402,5 +438,5 @@ CREATE TABLE bus_locations (
 
 Use the tools to analyze the REAL codebase, not generic assumptions!
 """,
-    tools=[search_tool, read_tool]
+    tools=[search_tool, read_tool, read_many_tool, find_symbol_tool, list_symbols_tool]
 )
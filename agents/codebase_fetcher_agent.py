@@ -7,29 +7,54 @@ from google.adk.agents.llm_agent import Agent
 from google.adk.tools import FunctionTool
 import sys
 import os
+import asyncio
+from typing import List
 
 # Add tools directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from tools.github_tool import fetch_github_repo as _fetch_github_repo, search_codebase as _search_codebase, read_code_file as _read_code_file
+from tools.github_tool import (
+    fetch_github_repo as _fetch_github_repo,
+    search_codebase as _search_codebase,
+    read_code_file as _read_code_file,
+    read_code_files as _read_code_files,
+    find_symbol as _find_symbol,
+    list_symbols_in_file as _list_symbols_in_file,
+)
 
 # Create wrapper functions for tools
-def fetch_github_repository(repo_url: str, branch: str = "main") -> str:
+# git, walks and index builds run in a worker thread so they never block the event loop
+async def fetch_github_repository(repo_url: str, branch: str = "main") -> str:
     """Clone and index a GitHub repository. Provide the full GitHub URL (e.g., https://github.com/user/repo)"""
-    return _fetch_github_repo(repo_url, branch)
+    return await asyncio.to_thread(_fetch_github_repo, repo_url, branch)
+
+async def search_in_codebase(repo_name: str, search_term: str, cursor: str = "") -> str:
+    """Search for a term in the cloned codebase. Provide repo_name and search_term; results are ranked by file and paged, pass next_cursor as cursor for more"""
+    return await asyncio.to_thread(_search_codebase, repo_name, search_term, cursor=cursor)
+
+async def read_code_file(repo_name: str, file_path: str, start_line: int = 0, end_line: int = 0, around_line: int = 0, byte_start: int = 0) -> str:
+    """Read a file from the codebase. Provide repo_name and file_path; optionally start_line/end_line or around_line to read only those lines, or the byte_start given by a truncation marker"""
+    return await asyncio.to_thread(_read_code_file, repo_name, file_path, start_line, end_line, around_line, byte_start=byte_start)
 
-def search_in_codebase(repo_name: str, search_term: str) -> str:
-    """Search for a term in the cloned codebase. Provide repo_name and search_term"""
-    return _search_codebase(repo_name, search_term)
+async def read_code_files(repo_name: str, file_paths: List[str]) -> str:
+    """Read several files from the codebase in one call. Provide repo_name and a list of file_paths (up to 20)"""
+    return await asyncio.to_thread(_read_code_files, repo_name, file_paths)
 
-def read_code_file(repo_name: str, file_path: str) -> str:
-    """Read a specific file from the codebase. Provide repo_name and file_path"""
-    return _read_code_file(repo_name, file_path)
+async def find_symbol(repo_name: str, symbol_name: str) -> str:
+    """Find where a class, function or method is defined. Provide repo_name and symbol_name"""
+    return await asyncio.to_thread(_find_symbol, repo_name, symbol_name)
+
+async def list_symbols_in_file(repo_name: str, file_path: str) -> str:
+    """List the classes, functions and methods defined in a file. Provide repo_name and file_path"""
+    return await asyncio.to_thread(_list_symbols_in_file, repo_name, file_path)
 
 # Create tools for codebase operations
 fetch_repo_tool = FunctionTool(fetch_github_repository)
 search_code_tool = FunctionTool(search_in_codebase)
 read_file_tool = FunctionTool(read_code_file)
+read_files_tool = FunctionTool(read_code_files)
+find_symbol_tool = FunctionTool(find_symbol)
+list_symbols_tool = FunctionTool(list_symbols_in_file)
 
 # Codebase Fetcher Agent
 codebase_fetcher_agent = Agent(
@@ -51,12 +76,18 @@ Your role is to:
    - Search for class names, function names, keywords
    - Return file paths and line numbers
 
-3. **Read Files**: Provide file contents when needed
+3. **Locate Definitions**: Answer "where is X defined" from the symbol index
+   - Use `find_symbol` with a class, function or method name (e.g. "BookingService" or "BookingService.cancel")
+   - Use `list_symbols_in_file` to see what a file defines and on which lines
+   - Prefer these over `search_in_codebase` when you know the name
+
+4. **Read Files**: Provide file contents when needed
    - Use `read_code_file` to retrieve specific files
+   - Use `read_code_files` to retrieve several files in one call
    - Help understand existing implementations
    - Identify patterns and conventions
 
-4. **Analyze Structure**: Understand the codebase organization
+5. **Analyze Structure**: Understand the codebase organization
    - Identify architecture patterns (MVC, microservices, etc.)
    - Locate key modules and services
    - Map out dependencies
@@ -72,10 +103,25 @@ Your role is to:
    ```
    search_in_codebase("repo-name", "SearchTerm")
    ```
+   Results are grouped by file, best matches first, a few lines per file.
+   If `next_cursor` is set, call again with `cursor=next_cursor` for more files.
 
-3. To read a file:
+3. To find where something is defined:
+   ```
+   find_symbol("repo-name", "TrackingService")
+   ```
+
+4. To read a file:
    ```
    read_code_file("repo-name", "path/to/file.java")
+   read_code_file("repo-name", "path/to/file.java", start_line=60, end_line=90)
+   ```
+   Prefer a line range when you know where to look; large files are cut off
+   with a marker saying which start_line (or byte_start) to continue from.
+
+   To read several files at once:
+   ```
+   read_code_files("repo-name", ["path/to/A.java", "path/to/B.java"])
    ```
 
 **Example Workflow:**
@@ -104,5 +150,5 @@ Always provide:
 
 Be thorough but concise. Provide actionable insights about the codebase structure.
 """,
-    tools=[fetch_repo_tool, search_code_tool, read_file_tool]
+    tools=[fetch_repo_tool, search_code_tool, read_file_tool, read_files_tool, find_symbol_tool, list_symbols_tool]
 )
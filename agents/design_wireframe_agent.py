@@ -7,6 +7,13 @@ from google.adk.agents.llm_agent import Agent
 from typing import List, Dict, Any, Optional
 import requests
 import json
+import sys
+import os
+
+# Add tools directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from tools import tracing
 
 # Figma MCP Configuration
 FIGMA_MCP_URL = "http://127.0.0.1:3845/mcp"
@@ -22,31 +29,35 @@ def search_figma_components(query: str, component_type: str = "all") -> Dict[str
     Returns:
         Dict containing matching components with their properties
     """
-    try:
-        # Try to connect to Figma MCP
-        payload = {
-            "method": "search_components",
-            "params": {
-                "query": query,
-                "component_type": component_type
+    with tracing.span("tool.search_figma_components", query=query, component_type=component_type) as span:
+        try:
+            # Try to connect to Figma MCP
+            payload = {
+                "method": "search_components",
+                "params": {
+                    "query": query,
+                    "component_type": component_type
+                }
             }
-        }
 
-        response = requests.post(FIGMA_MCP_URL, json=payload, timeout=10)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success"):
-            return result.get("data", {})
-        else:
-            # Fallback to mock data if MCP fails
+            response = requests.post(FIGMA_MCP_URL, json=payload, timeout=10)
+            response.raise_for_status()
+
+            result = response.json()
+            if result.get("success"):
+                span.set_attribute("source", "mcp")
+                return result.get("data", {})
+            else:
+                # Fallback to mock data if MCP fails
+                span.set_attribute("source", "mock")
+                return _get_mock_components(query, component_type)
+
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            # Fallback to mock data based on Rubicon Design System knowledge
+            print(f"Figma MCP not available ({e}), using mock data")
+            span.set_attributes(source="mock", mcp_error=str(e))
             return _get_mock_components(query, component_type)
 
-    except (requests.RequestException, json.JSONDecodeError) as e:
-        # Fallback to mock data based on Rubicon Design System knowledge
-        print(f"Figma MCP not available ({e}), using mock data")
-        return _get_mock_components(query, component_type)
-
 def _get_mock_components(query: str, component_type: str = "all") -> Dict[str, Any]:
     """
     Fallback mock data based on Rubicon Design System knowledge.
@@ -91,30 +102,34 @@ def get_figma_screen_patterns(feature_type: str) -> Dict[str, Any]:
     Returns:
         Dict containing common patterns and layouts
     """
-    try:
-        # Try to connect to Figma MCP
-        payload = {
-            "method": "get_screen_patterns",
-            "params": {
-                "feature_type": feature_type
+    with tracing.span("tool.get_figma_screen_patterns", feature_type=feature_type) as span:
+        try:
+            # Try to connect to Figma MCP
+            payload = {
+                "method": "get_screen_patterns",
+                "params": {
+                    "feature_type": feature_type
+                }
             }
-        }
 
-        response = requests.post(FIGMA_MCP_URL, json=payload, timeout=10)
-        response.raise_for_status()
-
-        result = response.json()
-        if result.get("success"):
-            return result.get("data", {})
-        else:
-            # Fallback to mock data if MCP fails
+            response = requests.post(FIGMA_MCP_URL, json=payload, timeout=10)
+            response.raise_for_status()
+
+            result = response.json()
+            if result.get("success"):
+                span.set_attribute("source", "mcp")
+                return result.get("data", {})
+            else:
+                # Fallback to mock data if MCP fails
+                span.set_attribute("source", "mock")
+                return _get_mock_screen_patterns(feature_type)
+
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            # Fallback to mock data
+            print(f"Figma MCP not available ({e}), using mock data")
+            span.set_attributes(source="mock", mcp_error=str(e))
             return _get_mock_screen_patterns(feature_type)
 
-    except (requests.RequestException, json.JSONDecodeError) as e:
-        # Fallback to mock data
-        print(f"Figma MCP not available ({e}), using mock data")
-        return _get_mock_screen_patterns(feature_type)
-
 def _get_mock_screen_patterns(feature_type: str) -> Dict[str, Any]:
     """
     Fallback mock data for screen patterns.
@@ -10,6 +10,12 @@ import time
 import base64
 import os
 from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from tools import tracing
 
 # Try to import browser automation libraries
 try:
@@ -376,7 +382,11 @@ class AutomateFigmaMakeTool(BaseTool):
         )
 
     def run(self, prompt: str, method: str = "auto", timeout: int = 60) -> Dict[str, Any]:
-        return automate_figma_make(prompt, method, timeout)
+        with tracing.span("tool.automate_figma_make", method=method, timeout=timeout) as span:
+            result = automate_figma_make(prompt, method, timeout)
+            if isinstance(result, dict):
+                span.set_attributes(success=result.get("success"), error=result.get("error"))
+            return result
 
 # Create tool instances
 figma_automation_tools = [
@@ -8,6 +8,12 @@ from typing import List, Dict, Any, Optional
 import requests
 import json
 import os
+import sys
+
+# Add tools directory to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from tools import tracing
 
 def generate_figma_make_prompt(screen_description: str, component_details: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -326,7 +332,11 @@ class GenerateFigmaMakePromptTool(BaseTool):
         )
 
     def run(self, screen_description: str, component_details: Dict[str, Any]) -> Dict[str, Any]:
-        return generate_figma_make_prompt(screen_description, component_details)
+        with tracing.span("tool.generate_figma_make_prompt", screen=screen_description[:100]) as span:
+            result = generate_figma_make_prompt(screen_description, component_details)
+            if isinstance(result, dict):
+                span.set_attributes(success=result.get("success"), error=result.get("error"))
+            return result
 
 # Create tool instances
 figma_import_tools = [
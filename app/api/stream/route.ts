@@ -1,19 +1,125 @@
 /**
  * Streaming API Route
  * Server-Sent Events (SSE) for real-time PRD generation updates
+ *
+ * Runs RedSpecOrchestrator.generate_spec in a warm agent worker and relays
+ * its progress events as they happen. Closing the connection cancels the
+ * workflow in the worker, including the agent calls in flight.
+ *
+ * Configuration (environment):
+ *   AGENT_WORKFLOW_TIMEOUT_MS  whole-workflow timeout (default 900000)
  */
 
 import { NextRequest } from 'next/server';
+import {
+  getAgentWorkerPool,
+  AgentWorkerCancelledError,
+  AgentWorkerTimeoutError,
+  PythonNotFoundError,
+} from '@/lib/python/agentWorkerPool';
 
 export const runtime = 'nodejs';
 export const dynamic = 'force-dynamic';
 
+const WORKFLOW_TIMEOUT_MS = parseInt(process.env.AGENT_WORKFLOW_TIMEOUT_MS || '900000', 10);
+
 interface StreamMessage {
-  type: 'progress' | 'prd_update' | 'complete' | 'error';
+  type: 'progress' | 'prd_update' | 'agent_output' | 'complete' | 'error';
   data: any;
   timestamp: string;
 }
 
+interface WorkerProgress {
+  agent_name: string;
+  phase: string;
+  status: 'started' | 'running' | 'streaming' | 'completed' | 'error';
+  message: string;
+  progress_percent: number;
+  data?: Record<string, any> | null;
+}
+
+/**
+ * Split streamed markdown into sections at headings
+ */
+function createSectionSplitter(emit: (section: { section: string; content: string }) => void) {
+  let buffer = '';
+
+  const title = (content: string) => {
+    const firstLine = content.trimStart().split('\n', 1)[0];
+    return firstLine.startsWith('#') ? firstLine.replace(/^#+\s*/, '').trim() : 'Overview';
+  };
+
+  return {
+    push(delta: string) {
+      buffer += delta;
+      // A section is complete once the next heading starts
+      let match: RegExpExecArray | null;
+      const heading = /\n(?=#{1,6}\s)/g;
+      let start = 0;
+      while ((match = heading.exec(buffer)) !== null) {
+        const end = match.index + 1;
+        if (end - start > 1) {
+          const content = buffer.slice(start, end);
+          emit({ section: title(content), content });
+          start = end;
+        }
+      }
+      buffer = buffer.slice(start);
+    },
+    flush() {
+      if (buffer) {
+        emit({ section: title(buffer), content: buffer });
+        buffer = '';
+      }
+    },
+  };
+}
+
+/**
+ * Messages waiting for the client; consecutive output deltas are merged
+ * so a slow client gets fewer, larger messages instead of a growing backlog
+ */
+function createMessageQueue() {
+  const messages: StreamMessage[] = [];
+  let closed = false;
+  let wake: (() => void) | null = null;
+
+  const notify = () => {
+    wake?.();
+    wake = null;
+  };
+
+  return {
+    push(message: StreamMessage) {
+      if (closed) {
+        return;
+      }
+      const last = messages[messages.length - 1];
+      if (last && last.type === message.type && message.type === 'agent_output' && last.data.agent === message.data.agent) {
+        last.data.delta += message.data.delta;
+      } else if (last && last.type === message.type && message.type === 'prd_update') {
+        last.data = { section: message.data.section, content: last.data.content + message.data.content };
+      } else {
+        messages.push(message);
+      }
+      notify();
+    },
+    close() {
+      closed = true;
+      notify();
+    },
+    async take(): Promise<StreamMessage[] | null> {
+      while (messages.length === 0 && !closed) {
+        await new Promise<void>((resolve) => (wake = resolve));
+      }
+      if (messages.length === 0) {
+        return null;
+      }
+      return messages.splice(0, messages.length);
+    },
+  };
+}
+
 export async function GET(request: NextRequest) {
   const searchParams = request.nextUrl.searchParams;
   const productIdea = searchParams.get('idea');
@@ -23,133 +129,112 @@ export async function GET(request: NextRequest) {
     return new Response('Missing product idea parameter', { status: 400 });
   }
 
-  // Create a readable stream
-  const stream = new ReadableStream({
-    async start(controller) {
-      const encoder = new TextEncoder();
-
-      // Helper function to send SSE message
-      const sendMessage = (message: StreamMessage) => {
-        const data = `data: ${JSON.stringify(message)}\n\n`;
-        controller.enqueue(encoder.encode(data));
-      };
-
-      try {
-        // Simulate streaming workflow
-        // TODO: Replace with actual Python orchestrator calls
-
-        // Phase 1: Context Gathering
-        sendMessage({
-          type: 'progress',
-          data: {
-            phase: 'context_gathering',
-            progress: 10,
-            message: 'Loading company context and analyzing codebase...',
-          },
-          timestamp: new Date().toISOString(),
-        });
-
-        await new Promise((resolve) => setTimeout(resolve, 1000));
-
-        // Phase 2: PRD Generation Start
-        sendMessage({
-          type: 'progress',
-          data: {
-            phase: 'prd_generation',
-            progress: 30,
-            message: 'Generating Product Requirements Document...',
-          },
-          timestamp: new Date().toISOString(),
-        });
-
-        await new Promise((resolve) => setTimeout(resolve, 500));
-
-        // Stream PRD sections
-        const prdSections = [
-          {
-            section: 'Problem Statement',
-            content: `# Problem Statement\n\nUsers currently lack...`,
-          },
-          {
-            section: 'User Stories',
-            content: `\n\n# User Stories\n\n- As a user, I want to...`,
-          },
-          {
-            section: 'Requirements',
-            content: `\n\n# Requirements\n\n## Functional\n- Feature 1\n- Feature 2`,
-          },
-        ];
-
-        for (const section of prdSections) {
-          sendMessage({
-            type: 'prd_update',
-            data: section,
-            timestamp: new Date().toISOString(),
-          });
-          await new Promise((resolve) => setTimeout(resolve, 800));
-        }
+  const encoder = new TextEncoder();
+  const queue = createMessageQueue();
+  const abort = new AbortController();
+  request.signal.addEventListener('abort', () => abort.abort());
 
-        // Phase 3: Technical Analysis
-        sendMessage({
-          type: 'progress',
-          data: {
-            phase: 'technical_analysis',
-            progress: 60,
-            message: 'Analyzing code impact and calculating story points...',
-          },
-          timestamp: new Date().toISOString(),
-        });
-
-        await new Promise((resolve) => setTimeout(resolve, 1000));
-
-        // Phase 4: Design & Analytics
-        sendMessage({
-          type: 'progress',
-          data: {
-            phase: 'design_tracking',
-            progress: 80,
-            message: 'Creating design specs and analytics plan...',
-          },
-          timestamp: new Date().toISOString(),
-        });
-
-        await new Promise((resolve) => setTimeout(resolve, 1000));
-
-        // Phase 5: Validation & JIRA
-        sendMessage({
-          type: 'progress',
-          data: {
-            phase: 'validation',
-            progress: 95,
-            message: 'Validating PRD and creating JIRA tickets...',
-          },
-          timestamp: new Date().toISOString(),
-        });
-
-        await new Promise((resolve) => setTimeout(resolve, 500));
-
-        // Complete
-        sendMessage({
-          type: 'complete',
-          data: {
-            totalStoryPoints: 42,
-            validationScore: 92,
-            jiraEpicKey: 'PROD-123',
-          },
-          timestamp: new Date().toISOString(),
-        });
+  const timestamp = () => new Date().toISOString();
+  let overallProgress = 0;
+  let prdStreamed = false;
 
+  const prdSections = createSectionSplitter((section) => {
+    queue.push({ type: 'prd_update', data: section, timestamp: timestamp() });
+  });
+
+  const onEvent = (event: { event: string; data: WorkerProgress }) => {
+    if (event.event !== 'progress') {
+      return;
+    }
+    const progress = event.data;
+
+    if (progress.status === 'streaming') {
+      const delta = progress.data?.delta || '';
+      if (progress.agent_name === 'prd') {
+        prdStreamed = true;
+        prdSections.push(delta);
+      } else {
+        queue.push({ type: 'agent_output', data: { agent: progress.agent_name, delta }, timestamp: timestamp() });
+      }
+      return;
+    }
+
+    if (progress.agent_name === 'prd' && progress.status === 'completed') {
+      prdSections.flush();
+    }
+
+    // Agent events report their own 0-100; the bar follows the workflow
+    if (progress.agent_name === 'orchestrator') {
+      overallProgress = progress.progress_percent;
+    }
+
+    queue.push({
+      type: 'progress',
+      data: {
+        phase: progress.phase,
+        progress: overallProgress,
+        message: progress.message,
+        agent: progress.agent_name,
+        status: progress.status,
+      },
+      timestamp: timestamp(),
+    });
+  };
+
+  getAgentWorkerPool()
+    .request(
+      'generate_spec',
+      { product_idea: productIdea, github_repo: githubRepo },
+      { timeoutMs: WORKFLOW_TIMEOUT_MS, signal: abort.signal, onEvent }
+    )
+    .then((result) => {
+      prdSections.flush();
+      if (!prdStreamed && result.prd) {
+        prdSections.push(result.prd);
+        prdSections.flush();
+      }
+      queue.push({
+        type: 'complete',
+        data: {
+          totalStoryPoints: result.total_story_points,
+          validationScore: result.validation_score,
+          jiraEpicKey: (result.jira_tickets || '').match(/\b[A-Z][A-Z0-9]+-\d+\b/)?.[0] ?? null,
+          errors: result.errors || [],
+          result,
+        },
+        timestamp: timestamp(),
+      });
+    })
+    .catch((error) => {
+      if (error instanceof AgentWorkerCancelledError) {
+        console.log('[STREAM] Client disconnected, workflow cancelled');
+        return;
+      }
+
+      let message = error instanceof Error ? error.message : 'Unknown error';
+      if (error instanceof PythonNotFoundError) {
+        message = 'Python 3.10+ not found';
+      } else if (error instanceof AgentWorkerTimeoutError) {
+        message = `Workflow timed out after ${WORKFLOW_TIMEOUT_MS / 1000}s`;
+      }
+      console.error('[STREAM] Workflow error:', error);
+      queue.push({ type: 'error', data: { message }, timestamp: timestamp() });
+    })
+    .finally(() => queue.close());
+
+  // Pull-based: the next batch is only encoded once the client has taken the last one
+  const stream = new ReadableStream({
+    async pull(controller) {
+      const messages = await queue.take();
+      if (!messages) {
         controller.close();
-      } catch (error) {
-        sendMessage({
-          type: 'error',
-          data: {
-            message: error instanceof Error ? error.message : 'Unknown error',
-          },
-          timestamp: new Date().toISOString(),
-        });
-        controller.close();
+        return;
       }
+      controller.enqueue(encoder.encode(messages.map((message) => `data: ${JSON.stringify(message)}\n\n`).join('')));
+    },
+    cancel() {
+      abort.abort();
+      queue.close();
     },
   });
 
@@ -0,0 +1,279 @@
+"""
+Workflow Benchmark
+Runs generate_spec end to end against generated fixture repositories with
+the fake LLM backend and reports wall time, per-stage latency, peak RSS
+and tokens
+
+No network access or API keys are needed: the agents' models are replaced
+by tools.fake_llm.FakeLlmBackend, while the repository tools (clone,
+index, search, read) run for real against a local git repository.
+
+Usage:
+    python benchmarks/workflow_benchmark.py --fixture medium --iterations 3
+    python benchmarks/workflow_benchmark.py --latency 0.5 --json results.json
+    python benchmarks/workflow_benchmark.py --replay recordings/run.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+
+# Run from anywhere: the repository root holds orchestrator.py, agents/ and tools/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+# name -> (source files, lines per file)
+FIXTURES = {
+    "small": (40, 60),
+    "medium": (400, 120),
+    "large": (3000, 150),
+}
+
+BENCH_IDEA = "Let travellers reschedule a bus booking to another date without cancelling and rebooking"
+
+# Tool calls the fake models make before answering, mirroring a typical real run
+BENCH_TOOL_SCRIPTS = {
+    "codebase": [
+        ("fetch_github_repository", {"repo_url": "{repo_url}"}),
+        ("search_in_codebase", {"repo_name": "{repo_name}", "search_term": "booking"}),
+    ],
+    "code_impact": [
+        ("search_in_codebase", {"repo_name": "{repo_name}", "search_term": "reschedule"}),
+        ("find_symbol", {"repo_name": "{repo_name}", "symbol_name": "BookingService"}),
+        ("read_code_file", {"repo_name": "{repo_name}", "file_path": "src/booking/service_0.py"}),
+        ("search_in_codebase", {"repo_name": "{repo_name}", "search_term": "payment"}),
+    ],
+}
+
+_DOMAINS = ["booking", "payment", "search", "tracking", "wallet", "offers", "reviews", "support"]
+
+
+def _source_file(rng: random.Random, domain: str, index: int, lines: int) -> str:
+    """Python module with classes and functions, about lines long"""
+    out = [f'"""{domain.title()} module {index}"""', "", "import json", ""]
+    cls = f"{domain.title()}Service" if index == 0 else f"{domain.title()}Helper{index}"
+    out += [f"class {cls}:", f'    """Handles {domain} operations"""', ""]
+    method = 0
+    while len(out) < lines:
+        name = f"{rng.choice(['get', 'update', 'validate', 'reschedule', 'cancel', 'list'])}_{domain}_{method}"
+        out += [
+            f"    def {name}(self, request):",
+            f'        """{name.replace("_", " ").capitalize()}"""',
+            f"        payload = json.loads(request.get('{domain}', '{{}}'))",
+            f"        if payload.get('status') == '{rng.choice(['pending', 'confirmed', 'failed'])}':",
+            "            return None",
+            f"        return {{'{domain}_id': payload.get('id'), 'step': {method}}}",
+            "",
+        ]
+        method += 1
+    return "\n".join(out[:lines]) + "\n"
+
+
+def make_fixture_repo(root: str, fixture: str, seed: int = 0) -> str:
+    """
+    Create (once) a git repository of generated source files
+
+    Args:
+        root: Directory to create the repository in
+        fixture: Key of FIXTURES
+        seed: Random seed for file contents
+
+    Returns:
+        Path of the repository (reused if it already exists)
+    """
+    files, lines = FIXTURES[fixture]
+    path = os.path.join(root, f"fixture-{fixture}")
+    if os.path.isdir(os.path.join(path, ".git")):
+        return path
+
+    rng = random.Random(seed)
+    for index in range(files):
+        domain = _DOMAINS[index % len(_DOMAINS)]
+        file_path = os.path.join(path, "src", domain, f"service_{index // len(_DOMAINS)}.py")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as f:
+            f.write(_source_file(rng, domain, index // len(_DOMAINS), lines))
+
+    # Ignored and binary content the walkers must skip
+    os.makedirs(os.path.join(path, "node_modules", "left-pad"), exist_ok=True)
+    with open(os.path.join(path, "node_modules", "left-pad", "index.js"), "w") as f:
+        f.write("module.exports = function () {};\n")
+    with open(os.path.join(path, "logo.png"), "wb") as f:
+        f.write(bytes(rng.getrandbits(8) for _ in range(4096)))
+    with open(os.path.join(path, "README.md"), "w") as f:
+        f.write(f"# Fixture {fixture}\n\nGenerated repository for workflow benchmarks.\n")
+
+    git = ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com"]
+    subprocess.run(["git", "init", "--quiet", "--initial-branch", "main", path], check=True)
+    subprocess.run(git + ["add", "-A"], cwd=path, check=True)
+    subprocess.run(git + ["commit", "--quiet", "-m", "Fixture"], cwd=path, check=True)
+    return path
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    values = sorted(values)
+    return {
+        "median": round(statistics.median(values), 4),
+        "min": round(values[0], 4),
+        "max": round(values[-1], 4),
+    }
+
+
+async def run_benchmark(
+    fixture: str = "small",
+    iterations: int = 3,
+    latency: float = 0.0,
+    response_tokens: int = 400,
+    replay_path: Optional[str] = None,
+    use_cache: bool = False,
+    work_dir: Optional[str] = None
+) -> Dict:
+    """
+    Run generate_spec repeatedly and collect timings
+
+    Args:
+        fixture: Key of FIXTURES
+        iterations: Number of generate_spec runs
+        latency: Fake model latency per call in seconds
+        response_tokens: Size of synthesised model responses
+        replay_path: Recorded responses to replay instead of synthesising
+        use_cache: Keep the response cache on (later iterations hit it)
+        work_dir: Directory for fixtures and clone caches (default: a new temp directory)
+
+    Returns:
+        Benchmark report
+    """
+    work_dir = work_dir or tempfile.mkdtemp(prefix="redspec_bench_")
+    # GitHubTool and ResponseCache keep their state under the temp directory
+    tempfile.tempdir = work_dir
+
+    from orchestrator import RedSpecOrchestrator, AGENT_CACHE_TTLS
+    from tools import tracing
+    from tools.fake_llm import FakeLlmBackend
+    from tools.response_cache import ResponseCache
+
+    repo_path = make_fixture_repo(work_dir, fixture)
+    backend = FakeLlmBackend(
+        replay_path=replay_path,
+        latency_seconds=latency,
+        response_tokens=response_tokens,
+        tool_scripts=BENCH_TOOL_SCRIPTS,
+        template_vars={"repo_url": repo_path, "repo_name": os.path.basename(repo_path)}
+    )
+    spans = tracing.InMemorySpanExporter()
+    previous_exporter = tracing.set_exporter(spans)
+
+    orchestrator = RedSpecOrchestrator(
+        response_cache=ResponseCache(
+            db_path=os.path.join(work_dir, "cache.sqlite3"),
+            agent_ttls=AGENT_CACHE_TTLS,
+            enabled=use_cache
+        ),
+        workflow_timeout=0,
+        llm_backend=backend
+    )
+
+    runs = []
+    try:
+        for iteration in range(iterations):
+            started = time.perf_counter()
+            result = await orchestrator.generate_spec(BENCH_IDEA, repo_path)
+            runs.append({
+                "iteration": iteration,
+                "wall_seconds": round(time.perf_counter() - started, 4),
+                "errors": result.errors,
+                "usage": result.usage,
+            })
+    finally:
+        tracing.set_exporter(previous_exporter)
+
+    # Per-stage latency from the agent and tool spans of every run
+    durations: Dict[str, List[float]] = {}
+    for span in spans.spans:
+        if span.name.startswith(("agent.", "tool.", "github.")):
+            durations.setdefault(span.name, []).append(span.duration_ms / 1000)
+
+    first = runs[0]["usage"] or {}
+    return {
+        "fixture": fixture,
+        "files": FIXTURES[fixture][0],
+        "iterations": iterations,
+        "fake_latency_seconds": latency,
+        "response_tokens": response_tokens,
+        "replay": replay_path,
+        "cache": use_cache,
+        "wall_seconds": _percentiles([run["wall_seconds"] for run in runs]),
+        "first_run_seconds": runs[0]["wall_seconds"],
+        "stages": {name: {"calls": len(values), **_percentiles(values)} for name, values in sorted(durations.items())},
+        "peak_rss_mb": peak_rss_mb(),
+        "tokens_per_run": {"input": first.get("input_tokens"), "output": first.get("output_tokens")},
+        "model_calls": backend.calls,
+        "errors": sorted({error for run in runs for error in run["errors"]}),
+        "runs": runs,
+    }
+
+
+def print_report(report: Dict):
+    """Human-readable summary of a run_benchmark report"""
+    wall = report["wall_seconds"]
+    print(f"\n📊 Workflow benchmark: fixture={report['fixture']} ({report['files']} files), "
+          f"{report['iterations']} iteration(s), fake latency {report['fake_latency_seconds']}s")
+    print(f"   Wall time: median {wall['median']}s (min {wall['min']}s, max {wall['max']}s, first {report['first_run_seconds']}s)")
+    print(f"   Peak RSS: {report['peak_rss_mb']} MB")
+    print(f"   Tokens per run: {report['tokens_per_run']['input']} in / {report['tokens_per_run']['output']} out")
+    print(f"   Model calls: {report['model_calls']}")
+    print(f"\n   {'stage':<36} {'calls':>6} {'median s':>10} {'max s':>10}")
+    for name, stage in sorted(report["stages"].items(), key=lambda item: -item[1]["median"]):
+        print(f"   {name:<36} {stage['calls']:>6} {stage['median']:>10.4f} {stage['max']:>10.4f}")
+    if report["errors"]:
+        print("\n⚠️  Errors:")
+        for error in report["errors"]:
+            print(f"   - {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_spec offline with the fake LLM backend")
+    parser.add_argument("--fixture", choices=sorted(FIXTURES), default="small")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model latency per call (seconds)")
+    parser.add_argument("--response-tokens", type=int, default=400)
+    parser.add_argument("--replay", help="replay responses recorded with REDSPEC_LLM_BACKEND=record:<file>")
+    parser.add_argument("--cache", action="store_true", help="keep the response cache on")
+    parser.add_argument("--work-dir", help="reuse fixtures and clone caches from this directory")
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(
+        fixture=args.fixture,
+        iterations=args.iterations,
+        latency=args.latency,
+        response_tokens=args.response_tokens,
+        replay_path=args.replay,
+        use_cache=args.cache,
+        work_dir=args.work_dir
+    ))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+/**
+ * Agent Worker Pool
+ * Long-lived pool of Python agent workers (agent_worker.py) shared by the API routes
+ *
+ * Workers import google.adk and the agents once and keep their runners warm,
+ * so a request costs one JSON line over stdio instead of a new interpreter.
+ *
+ * Configuration (environment):
+ *   AGENT_WORKER_POOL_SIZE        number of workers (default 2)
+ *   AGENT_WORKER_TIMEOUT_MS       per-request timeout (default 120000)
+ *   AGENT_WORKER_HEALTH_CHECK_MS  health check interval (default 30000)
+ */
+
+import { spawn, exec, ChildProcessWithoutNullStreams } from 'child_process';
+import path from 'path';
+import readline from 'readline';
+
+const POOL_SIZE = Math.max(1, parseInt(process.env.AGENT_WORKER_POOL_SIZE || '2', 10));
+const REQUEST_TIMEOUT_MS = parseInt(process.env.AGENT_WORKER_TIMEOUT_MS || '120000', 10);
+const HEALTH_CHECK_INTERVAL_MS = parseInt(process.env.AGENT_WORKER_HEALTH_CHECK_MS || '30000', 10);
+const HEALTH_CHECK_TIMEOUT_MS = 5000;
+// How long a worker gets to acknowledge cancelling a timed-out request before it is retired
+const CANCEL_GRACE_MS = 10000;
+const STARTUP_TIMEOUT_MS = 60000;
+const STDERR_TAIL_CHARS = 4000;
+
+// Google ADK requires Python 3.10+
+const PYTHON_COMMANDS = ['python3.11', 'python3.10', 'python3'];
+
+export class PythonNotFoundError extends Error {}
+
+export class AgentWorkerTimeoutError extends Error {}
+
+export class AgentWorkerCancelledError extends Error {}
+
+export class AgentWorkerError extends Error {
+  constructor(message: string, public details?: string) {
+    super(message);
+  }
+}
+
+export interface WorkerRequestOptions {
+  timeoutMs?: number;
+  /** Called for every event the worker sends for this request before it replies */
+  onEvent?: (event: any) => void;
+  /** Aborting cancels the request in the worker */
+  signal?: AbortSignal;
+}
+
+interface PendingRequest {
+  resolve: (value: any) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+  onEvent?: (event: any) => void;
+}
+
+let pythonCommand: Promise<string> | null = null;
+
+/**
+ * Find a Python 3.10+ interpreter once per server process
+ */
+function findPython(): Promise<string> {
+  if (!pythonCommand) {
+    pythonCommand = new Promise<string>((resolve, reject) => {
+      const tryNextPython = (index: number) => {
+        if (index >= PYTHON_COMMANDS.length) {
+          pythonCommand = null;
+          reject(new PythonNotFoundError('Python 3.10+ not found'));
+          return;
+        }
+
+        const cmd = PYTHON_COMMANDS[index];
+        exec(`${cmd} --version`, (error: Error | null, stdout: string) => {
+          const versionMatch = !error && stdout.match(/Python (\d+)\.(\d+)/);
+          if (!versionMatch) {
+            tryNextPython(index + 1);
+            return;
+          }
+
+          const major = parseInt(versionMatch[1]);
+          const minor = parseInt(versionMatch[2]);
+          if (major < 3 || (major === 3 && minor < 10)) {
+            tryNextPython(index + 1);
+            return;
+          }
+
+          console.log(`[AGENT POOL] Using ${cmd} (version ${major}.${minor})`);
+          resolve(cmd);
+        });
+      };
+
+      tryNextPython(0);
+    });
+  }
+  return pythonCommand;
+}
+
+/**
+ * A single agent_worker.py child process
+ */
+class AgentWorker {
+  private proc: ChildProcessWithoutNullStreams;
+  private pending = new Map<string, PendingRequest>();
+  /** Timed-out requests waiting for the worker to confirm they stopped */
+  private cancelling = new Map<string, NodeJS.Timeout>();
+  private nextId = 0;
+  private stderrTail = '';
+  private exited = false;
+  private retired = false;
+  readonly ready: Promise<void>;
+
+  constructor(pythonCmd: string, projectRoot: string, private onExit: (worker: AgentWorker) => void) {
+    this.proc = spawn(pythonCmd, [path.join(projectRoot, 'agent_worker.py')], {
+      cwd: projectRoot,
+      env: {
+        ...process.env,
+        PYTHONPATH: projectRoot,
+        PYTHONUNBUFFERED: '1',
+        GOOGLE_API_KEY: process.env.GOOGLE_API_KEY || '',
+      },
+    });
+
+    let markReady: () => void;
+    let failStartup: (error: Error) => void;
+    this.ready = new Promise<void>((resolve, reject) => {
+      markReady = resolve;
+      failStartup = reject;
+    });
+    // Avoid unhandled rejections when nobody is waiting on startup
+    this.ready.catch(() => undefined);
+
+    const startupTimer = setTimeout(() => {
+      failStartup(new AgentWorkerError('Agent worker did not start in time', this.stderrTail));
+      this.kill();
+    }, STARTUP_TIMEOUT_MS);
+
+    readline.createInterface({ input: this.proc.stdout }).on('line', (line: string) => {
+      let message: any;
+      try {
+        message = JSON.parse(line);
+      } catch {
+        console.warn('[AGENT POOL] Ignoring non-JSON worker output:', line.substring(0, 200));
+        return;
+      }
+
+      if (message.event === 'ready') {
+        clearTimeout(startupTimer);
+        console.log(`[AGENT POOL] Worker ${message.pid} ready`);
+        markReady();
+        return;
+      }
+
+      const cancelTimer = this.cancelling.get(String(message.id));
+      if (cancelTimer && !message.event) {
+        // The timed-out request stopped (or finished), so the worker is still responsive
+        clearTimeout(cancelTimer);
+        this.cancelling.delete(String(message.id));
+        return;
+      }
+
+      const request = this.pending.get(String(message.id));
+      if (!request) {
+        return;
+      }
+
+      if (message.event) {
+        try {
+          request.onEvent?.(message);
+        } catch (error) {
+          console.error('[AGENT POOL] Event handler error:', error);
+        }
+        return;
+      }
+
+      this.pending.delete(String(message.id));
+      clearTimeout(request.timer);
+      if (message.ok) {
+        request.resolve(message.result);
+      } else {
+        request.reject(new AgentWorkerError(message.error || 'Agent worker error', message.traceback));
+      }
+      this.drained();
+    });
+
+    this.proc.stderr.on('data', (data: Buffer) => {
+      const text = data.toString();
+      console.log('[AGENT POOL] Worker stderr:', text);
+      this.stderrTail = (this.stderrTail + text).slice(-STDERR_TAIL_CHARS);
+    });
+
+    const handleExit = (reason: string) => {
+      if (this.exited) {
+        return;
+      }
+      this.exited = true;
+      clearTimeout(startupTimer);
+      const error = new AgentWorkerError(`Agent worker ${reason}`, this.stderrTail);
+      failStartup(error);
+      for (const timer of this.cancelling.values()) {
+        clearTimeout(timer);
+      }
+      this.cancelling.clear();
+      for (const request of this.pending.values()) {
+        clearTimeout(request.timer);
+        request.reject(error);
+      }
+      this.pending.clear();
+      this.onExit(this);
+    };
+
+    // Writes to a dying worker surface through the exit handler instead
+    this.proc.stdin.on('error', () => undefined);
+    this.proc.on('exit', (code: number | null) => handleExit(`exited with code ${code}`));
+    this.proc.on('error', (error: Error) => handleExit(`failed to spawn: ${error.message}`));
+  }
+
+  /** Whether the worker can accept new requests */
+  get alive(): boolean {
+    return !this.exited && !this.retired;
+  }
+
+  get load(): number {
+    return this.pending.size;
+  }
+
+  request(method: string, params: Record<string, any> = {}, options: WorkerRequestOptions = {}): Promise<any> {
+    if (!this.alive) {
+      return Promise.reject(new AgentWorkerError('Agent worker is not running', this.stderrTail));
+    }
+
+    if (options.signal?.aborted) {
+      return Promise.reject(new AgentWorkerCancelledError('Agent worker request cancelled'));
+    }
+
+    const id = String(++this.nextId);
+    const timeoutMs = options.timeoutMs ?? REQUEST_TIMEOUT_MS;
+
+    return new Promise((resolve, reject) => {
+      const onAbort = () => {
+        const request = this.pending.get(id);
+        if (!request) {
+          return;
+        }
+        this.pending.delete(id);
+        clearTimeout(request.timer);
+        this.send('cancel', { id });
+        reject(new AgentWorkerCancelledError('Agent worker request cancelled'));
+        this.drained();
+      };
+
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        options.signal?.removeEventListener('abort', onAbort);
+        reject(new AgentWorkerTimeoutError(`Agent worker request timed out after ${timeoutMs}ms`));
+        // A late pong is harmless; healthCheck decides what a missed ping means
+        if (method !== 'ping') {
+          this.cancelTimedOut(id);
+        }
+        this.drained();
+      }, timeoutMs);
+
+      const settle = <T>(fn: (value: T) => void) => (value: T) => {
+        options.signal?.removeEventListener('abort', onAbort);
+        fn(value);
+      };
+
+      this.pending.set(id, { resolve: settle(resolve), reject: settle(reject), timer, onEvent: options.onEvent });
+      options.signal?.addEventListener('abort', onAbort, { once: true });
+      this.send(method, params, id);
+    });
+  }
+
+  /**
+   * Write a request line; without an id the reply is ignored
+   */
+  private send(method: string, params: Record<string, any>, id: string = `notify-${++this.nextId}`) {
+    if (!this.exited) {
+      this.proc.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    }
+  }
+
+  /**
+   * Ask the worker to stop a timed-out request, and retire the worker if it doesn't answer;
+   * the other requests on it are left to finish
+   */
+  private cancelTimedOut(id: string) {
+    this.send('cancel', { id });
+    this.cancelling.set(
+      id,
+      setTimeout(() => {
+        this.cancelling.delete(id);
+        console.warn(`[AGENT POOL] Worker did not cancel timed-out request ${id}, retiring it`);
+        this.retire();
+      }, CANCEL_GRACE_MS)
+    );
+  }
+
+  /**
+   * Stop taking new requests and exit once the pending ones are done
+   */
+  retire() {
+    this.retired = true;
+    this.drained();
+  }
+
+  /** Kill a retired worker whose last request just settled */
+  private drained() {
+    if (this.retired && this.pending.size === 0) {
+      this.kill();
+    }
+  }
+
+  kill() {
+    this.retired = true;
+    if (!this.exited) {
+      this.proc.kill();
+    }
+  }
+}
+
+/**
+ * Fixed-size pool of agent workers with health checks
+ */
+export class AgentWorkerPool {
+  private workers: AgentWorker[] = [];
+  private healthTimer: NodeJS.Timeout | null = null;
+
+  constructor(private size: number = POOL_SIZE, private projectRoot: string = process.cwd()) {}
+
+  private async spawnWorker(): Promise<AgentWorker> {
+    const pythonCmd = await findPython();
+    const worker = new AgentWorker(pythonCmd, this.projectRoot, (dead) => {
+      console.warn('[AGENT POOL] Worker exited, removing from pool');
+      this.workers = this.workers.filter((w) => w !== dead);
+    });
+    this.workers.push(worker);
+    return worker;
+  }
+
+  /**
+   * Start workers up to the configured pool size
+   */
+  async warm(): Promise<void> {
+    this.workers = this.workers.filter((w) => w.alive);
+    const spawned: Promise<AgentWorker>[] = [];
+    for (let i = this.workers.length; i < this.size; i++) {
+      spawned.push(this.spawnWorker());
+    }
+    await Promise.all(spawned);
+    this.startHealthChecks();
+  }
+
+  /**
+   * Pick the least-loaded live worker, starting one if the pool is not full
+   */
+  private async acquire(): Promise<AgentWorker> {
+    const live = this.workers.filter((w) => w.alive);
+    const idle = live.find((w) => w.load === 0);
+    if (idle) {
+      return idle;
+    }
+    if (live.length < this.size) {
+      const worker = await this.spawnWorker();
+      this.startHealthChecks();
+      return worker;
+    }
+    return live.reduce((least, w) => (w.load < least.load ? w : least));
+  }
+
+  async request(method: string, params: Record<string, any> = {}, options: WorkerRequestOptions = {}): Promise<any> {
+    const worker = await this.acquire();
+    await worker.ready;
+    return worker.request(method, params, options);
+  }
+
+  /**
+   * Ping every worker; replace idle ones that don't answer
+   */
+  async healthCheck(): Promise<{ healthy: number; replaced: number }> {
+    let healthy = 0;
+    let replaced = 0;
+
+    // Retired workers are draining and exit on their own
+    await Promise.all(
+      this.workers.filter((w) => w.alive).map(async (worker) => {
+        try {
+          await worker.ready;
+          await worker.request('ping', {}, { timeoutMs: HEALTH_CHECK_TIMEOUT_MS });
+          healthy++;
+        } catch (error) {
+          const reason = error instanceof Error ? error.message : error;
+          if (worker.alive && worker.load > 0) {
+            // Busy, not dead: its requests have their own timeouts, which retire a stuck worker
+            console.warn(`[AGENT POOL] Health check failed with ${worker.load} request(s) in flight, keeping worker:`, reason);
+            return;
+          }
+          console.warn('[AGENT POOL] Health check failed:', reason);
+          worker.kill();
+          replaced++;
+        }
+      })
+    );
+
+    if (replaced > 0) {
+      await this.warm();
+    }
+    return { healthy, replaced };
+  }
+
+  private startHealthChecks() {
+    if (this.healthTimer || HEALTH_CHECK_INTERVAL_MS <= 0) {
+      return;
+    }
+    this.healthTimer = setInterval(() => {
+      this.healthCheck().catch((error) => console.error('[AGENT POOL] Health check error:', error));
+    }, HEALTH_CHECK_INTERVAL_MS);
+    // Don't keep the server alive just for health checks
+    this.healthTimer.unref();
+  }
+
+  shutdown() {
+    if (this.healthTimer) {
+      clearInterval(this.healthTimer);
+      this.healthTimer = null;
+    }
+    for (const worker of this.workers) {
+      worker.kill();
+    }
+    this.workers = [];
+  }
+}
+
+// Survive Next.js dev hot reloads without leaking worker processes
+const globalForPool = globalThis as unknown as { agentWorkerPool?: AgentWorkerPool };
+
+export function getAgentWorkerPool(): AgentWorkerPool {
+  if (!globalForPool.agentWorkerPool) {
+    globalForPool.agentWorkerPool = new AgentWorkerPool();
+  }
+  return globalForPool.agentWorkerPool;
+}
@@ -4,17 +4,32 @@ Coordinates all 10 agents to generate comprehensive product specifications
 """
 
 import os
+import re
+import json
+import time
+import uuid
 import asyncio
-from typing import Dict, List, Any, Optional, AsyncIterator
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional, AsyncIterator, Awaitable, Callable
 from datetime import datetime
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 from dotenv import load_dotenv
 from google.adk.runners import InMemoryRunner
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.genai import types
 
 # Load environment variables
 load_dotenv()
 
+from tools.response_cache import ResponseCache, make_cache_key
+from tools.prd_sections import parse_prd_sections, compact_prd, truncate_to_budget, estimate_tokens
+from tools import tracing
+from tools.fake_llm import llm_backend_from_env
+from tools.rate_limiter import rate_limiter_from_env
+from tools.checkpoint_store import CheckpointStore
+from tools.github_tool import pin_repo
+
 # Import all agents
 from agents import (
     context_extraction_agent,
@@ -46,12 +61,38 @@ class AgentProgress:
     """Progress update from an agent"""
     agent_name: str
     phase: AgentPhase
-    status: str  # "started", "running", "completed", "error"
+    status: str  # "started", "running", "streaming", "completed", "error"
     message: str
     progress_percent: int
     data: Optional[Dict] = None
 
 
+@dataclass
+class AgentChunk:
+    """Piece of agent output yielded by stream_agent"""
+    agent_name: str
+    text: str  # New text since the previous chunk, or the whole output when final
+    final: bool = False
+    usage: Optional[Dict[str, int]] = None  # Token usage reported by the model (final chunk only)
+
+
+@dataclass
+class AgentCallStats:
+    """Cost and latency of one run_agent call"""
+    agent_name: str
+    model: str
+    started_at: str
+    status: str = "ok"  # "ok", "error", "timeout", "cancelled"
+    cached: bool = False
+    input_tokens: int = 0
+    output_tokens: int = 0
+    tokens_estimated: bool = True  # False when the counts come from the model's usage metadata
+    wall_seconds: float = 0.0
+    ttft_seconds: Optional[float] = None  # Time to first streamed chunk
+    cost_usd: Optional[float] = None  # None for models without a MODEL_PRICING entry
+    stage: Optional[str] = None  # Workflow stage that made the call
+
+
 @dataclass
 class WorkflowResult:
     """Complete workflow result"""
@@ -84,6 +125,226 @@ class WorkflowResult:
     total_story_points: Optional[int] = None
     validation_score: Optional[int] = None
     errors: List[str] = None
+    timed_out: List[str] = None  # Agents (or stages, at the workflow deadline) stopped by a deadline
+    prd_sections: Optional[Dict[str, str]] = None  # PRD split by template section
+    prd_compaction: Optional[Dict[str, Dict]] = None  # Per-agent PRD excerpt sizes (estimated tokens)
+    agent_calls: List[AgentCallStats] = None  # One entry per run_agent call, in completion order
+    usage: Optional[Dict] = None  # Totals and per-agent breakdown of agent_calls
+    run_id: Optional[str] = None  # Checkpoint key; resume_run(run_id) re-runs what did not complete
+
+
+class AgentTimeoutError(TimeoutError):
+    """An agent did not answer within its deadline"""
+
+    def __init__(self, agent_name: str, timeout: float):
+        super().__init__(f"{agent_name} timed out after {timeout:g}s")
+        self.agent_name = agent_name
+        self.timeout = timeout
+
+
+@dataclass
+class BatchItem:
+    """One product idea in a generate_batch run"""
+    id: str
+    product_idea: str
+    github_repo: Optional[str] = None
+
+
+@dataclass
+class WorkflowStage:
+    """A node in the workflow dependency graph"""
+    name: str
+    phase: AgentPhase
+    run: Callable[[WorkflowResult, Optional[callable]], Awaitable[bool]]
+    depends_on: List[str] = field(default_factory=list)
+    condition: Optional[Callable[[WorkflowResult], bool]] = None
+    outputs: List[str] = field(default_factory=list)  # WorkflowResult fields it writes (checkpointed)
+
+
+# Response cache TTLs in seconds. Agents whose tools read live state get
+# short TTLs; agents with side effects are never cached: the codebase agent
+# clones the repository that code_impact's tools read, and Figma automation
+# writes to Figma.
+AGENT_CACHE_TTLS = {
+    "context": 24 * 3600,
+    "codebase": 0,
+    "release_notes": 24 * 3600,
+    "code_impact": 15 * 60,
+    "figma_automation": 0,
+}
+
+# PRD sections each downstream agent reads, most important first, and the
+# token budget for its PRD excerpt. The validator scores completeness, so
+# it always gets the full PRD.
+AGENT_PRD_SECTIONS = {
+    "code_impact": [
+        "problem_statement", "scope", "functional_requirements", "technical_considerations",
+        "non_functional_requirements", "dependencies_blockers",
+    ],
+    "story_points": [
+        "user_stories_personas", "functional_requirements", "scope", "technical_considerations",
+        "dependencies_blockers",
+    ],
+    "design": [
+        "user_stories_personas", "design_requirements", "functional_requirements", "problem_statement",
+        "non_functional_requirements",
+    ],
+    "analytics": [
+        "goals_success_metrics", "analytics_tracking", "user_stories_personas", "functional_requirements",
+        "objective",
+    ],
+    "jira": [
+        "overview", "user_stories_personas", "functional_requirements", "scope", "release_plan",
+        "dependencies_blockers",
+    ],
+}
+PRD_TOKEN_BUDGETS = {
+    "code_impact": 3000,
+    "story_points": 2500,
+    "design": 3000,
+    "analytics": 2000,
+    "jira": 3000,
+}
+# Budget for the code impact / story point analyses quoted in the JIRA prompt
+JIRA_ATTACHMENT_TOKEN_BUDGET = 1500
+
+# Per-agent deadlines in seconds; other agents use DEFAULT_AGENT_TIMEOUT.
+# Agents that clone or search repositories get more time.
+AGENT_TIMEOUTS = {
+    "codebase": 300,
+    "code_impact": 300,
+    "prd": 240,
+}
+DEFAULT_AGENT_TIMEOUT = float(os.getenv("REDSPEC_AGENT_TIMEOUT", "180"))
+WORKFLOW_TIMEOUT = float(os.getenv("REDSPEC_WORKFLOW_TIMEOUT", "600"))
+
+# USD per million tokens (input, output). Experimental models are priced
+# like their GA counterparts so estimates stay comparable.
+MODEL_PRICING = {
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+# Every generate_spec run appends its agent calls here when set
+USAGE_LOG_PATH = os.getenv("REDSPEC_USAGE_LOG")
+
+# Quotas per model (requests and tokens per minute), shared by every workflow
+# in the process. Models not listed are not throttled. REDSPEC_RATE_LIMITS
+# replaces these ("gemini-2.5-flash=1000/1000000,...") or turns them "off".
+MODEL_RATE_LIMITS = {
+    "gemini-2.0-flash-exp": {"rpm": 10, "tpm": 4_000_000},
+    "gemini-2.5-flash": {"rpm": 1000, "tpm": 1_000_000},
+}
+
+# Completed stages of every generate_spec run are stored here (default: temp directory)
+CHECKPOINT_DB_PATH = os.getenv("REDSPEC_CHECKPOINT_DB")
+
+# Workflows generate_batch runs at once
+BATCH_CONCURRENCY = int(os.getenv("REDSPEC_BATCH_CONCURRENCY", "4"))
+
+# Agents whose prompt does not depend on the idea (company context) or only
+# on the repository; within a batch, identical calls to them run once
+BATCH_SHARED_AGENTS = {"context", "codebase"}
+
+# In-flight and finished shared agent calls of the current generate_batch, by cache key
+_batch_shared: ContextVar[Optional[Dict[str, asyncio.Task]]] = ContextVar("redspec_batch_shared", default=None)
+
+# WorkflowResult of the generate_spec run the current task belongs to
+_current_run: ContextVar[Optional["WorkflowResult"]] = ContextVar("redspec_current_run", default=None)
+
+# Name of the workflow stage the current task runs
+_current_stage: ContextVar[Optional[str]] = ContextVar("redspec_current_stage", default=None)
+
+
+def _usage_from_event(event) -> Optional[Dict[str, int]]:
+    """Input/output token counts from an ADK event's usage metadata"""
+    usage = getattr(event, "usage_metadata", None)
+    if usage is None:
+        return None
+    return {
+        "input_tokens": getattr(usage, "prompt_token_count", None) or 0,
+        # Thinking tokens are billed as output
+        "output_tokens": (getattr(usage, "candidates_token_count", None) or 0)
+        + (getattr(usage, "thoughts_token_count", None) or 0),
+    }
+
+
+def _add_usage(total: Optional[Dict[str, int]], usage: Optional[Dict[str, int]]) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return total
+    if total is None:
+        return dict(usage)
+    return {key: total[key] + usage[key] for key in total}
+
+
+def summarize_usage(calls: List[AgentCallStats]) -> Dict:
+    """
+    Aggregate agent call stats
+
+    Args:
+        calls: AgentCallStats from one or more runs
+
+    Returns:
+        Dict with overall totals and a per-agent breakdown
+    """
+    def totals(group: List[AgentCallStats]) -> Dict:
+        costs = [call.cost_usd for call in group if call.cost_usd is not None]
+        return {
+            "calls": len(group),
+            "cache_hits": sum(1 for call in group if call.cached),
+            "input_tokens": sum(call.input_tokens for call in group),
+            "output_tokens": sum(call.output_tokens for call in group),
+            "wall_seconds": round(sum(call.wall_seconds for call in group), 3),
+            "cost_usd": round(sum(costs), 6) if costs else None,
+        }
+
+    by_agent: Dict[str, List[AgentCallStats]] = {}
+    for call in calls:
+        by_agent.setdefault(call.agent_name, []).append(call)
+
+    return {
+        **totals(calls),
+        "agents": {name: totals(group) for name, group in by_agent.items()},
+    }
+
+
+def export_usage_jsonl(result: WorkflowResult, path: str):
+    """
+    Append a run's agent calls to a JSON lines file, one call per line
+
+    Args:
+        result: Finished WorkflowResult
+        path: File to append to (created if missing)
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        for call in result.agent_calls or []:
+            f.write(json.dumps({"run_id": result.run_id, "run_timestamp": result.timestamp, **asdict(call)}) + "\n")
+
+# Streamed text is forwarded to progress callbacks at most this often
+STREAM_FLUSH_SECONDS = 0.1
+
+# Progress announced when the first stage of each phase starts
+PHASE_ANNOUNCEMENTS = {
+    AgentPhase.CONTEXT_GATHERING: (10, "Phase 1: Gathering context..."),
+    AgentPhase.PRD_GENERATION: (30, "Phase 2: Generating PRD..."),
+    AgentPhase.TECHNICAL_ANALYSIS: (50, "Phase 3: Analyzing technical impact..."),
+    AgentPhase.DESIGN_TRACKING: (70, "Phase 4: Creating design specs and analytics plan..."),
+    AgentPhase.VALIDATION_INTEGRATION: (85, "Phase 5: Validating PRD and creating JIRA tickets..."),
+}
+
+
+def _model_name(agent) -> str:
+    """Model name of an agent whose model is a name or a model object"""
+    model = getattr(agent, "model", "")
+    return str(model if isinstance(model, str) else getattr(model, "model", model))
+
+
+def _has_prd(result: WorkflowResult) -> bool:
+    """Phases 3-5 only run once a PRD exists"""
+    return bool(result.prd)
 
 
 class RedSpecOrchestrator:
@@ -92,8 +353,35 @@ class RedSpecOrchestrator:
     Manages all 10 agents and coordinates their execution
     """
 
-    def __init__(self):
-        """Initialize orchestrator with all agent runners"""
+    def __init__(
+        self,
+        response_cache: Optional[ResponseCache] = None,
+        agent_timeouts: Optional[Dict[str, float]] = None,
+        workflow_timeout: Optional[float] = None,
+        compact_prompts: bool = True,
+        llm_backend=None,
+        rate_limiter=None,
+        checkpoint_store: Optional[CheckpointStore] = None
+    ):
+        """
+        Initialize orchestrator with all agent runners
+
+        Args:
+            response_cache: Cache for agent outputs (default: memory + SQLite cache with AGENT_CACHE_TTLS)
+            agent_timeouts: Per-agent deadlines in seconds, merged over AGENT_TIMEOUTS (0 disables)
+            workflow_timeout: Deadline for a whole generate_spec run (default: WORKFLOW_TIMEOUT, 0 disables)
+            compact_prompts: Give downstream agents PRD excerpts (AGENT_PRD_SECTIONS) instead of the full PRD
+            llm_backend: Replaces every agent's model, e.g. tools.fake_llm.FakeLlmBackend
+                for offline runs (default: from REDSPEC_LLM_BACKEND, else the agents' own models)
+            rate_limiter: tools.rate_limiter.ModelRateLimiter every model call waits for
+                (default: the process-wide limiter with MODEL_RATE_LIMITS, None if REDSPEC_RATE_LIMITS=off)
+            checkpoint_store: Where completed stages are saved for resume_run (default: SQLite at CHECKPOINT_DB_PATH)
+        """
+        self.response_cache = response_cache or ResponseCache(agent_ttls=AGENT_CACHE_TTLS)
+        self.agent_timeouts = {**AGENT_TIMEOUTS, **(agent_timeouts or {})}
+        self.workflow_timeout = WORKFLOW_TIMEOUT if workflow_timeout is None else workflow_timeout
+        self.compact_prompts = compact_prompts
+        self.checkpoints = checkpoint_store or CheckpointStore(db_path=CHECKPOINT_DB_PATH)
         self.runners = {
             # Phase 1: Context Gathering
             "context": InMemoryRunner(agent=context_extraction_agent),
@@ -118,24 +406,174 @@ class RedSpecOrchestrator:
             "jira": InMemoryRunner(agent=jira_integration_agent),
         }
 
+        self.llm_backend = llm_backend if llm_backend is not None else llm_backend_from_env()
+        if self.llm_backend is not None:
+            self.runners = {
+                name: InMemoryRunner(agent=self.llm_backend.bind(name, runner.agent))
+                for name, runner in self.runners.items()
+            }
+
+        self.rate_limiter = rate_limiter if rate_limiter is not None else rate_limiter_from_env(MODEL_RATE_LIMITS)
+        if self.rate_limiter is not None:
+            self.runners = {
+                name: InMemoryRunner(agent=runner.agent.clone(update={"model": self.rate_limiter.wrap(runner.agent.model)}))
+                for name, runner in self.runners.items()
+            }
+
     async def run_agent(
         self,
         agent_name: str,
         prompt: str,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        use_cache: bool = True,
+        stream: bool = True,
+        timeout: Optional[float] = None
     ) -> str:
         """
         Run a single agent and return its output
 
+        Outputs are cached by a hash of the agent, model, instruction, tool
+        set and prompt, so an identical call is answered without the model.
+        With a progress callback, output is also forwarded as "streaming"
+        updates (data["delta"]) while the model is still generating.
+        Every call is recorded as AgentCallStats on the current
+        generate_spec run (see WorkflowResult.agent_calls).
+
         Args:
             agent_name: Name of the agent to run
             prompt: Input prompt for the agent
             progress_callback: Optional callback for progress updates
+            use_cache: Set False to bypass the response cache for this call
+            stream: Set False to only report start and completion
+            timeout: Deadline in seconds (default: the agent's configured deadline, 0 disables)
 
         Returns:
             Agent output as string
+
+        Raises:
+            AgentTimeoutError: If the agent did not finish within its deadline
+        """
+        runner = self.runners[agent_name]
+        call = AgentCallStats(
+            agent_name=agent_name,
+            model=_model_name(runner.agent),
+            started_at=datetime.now().isoformat()
+        )
+        with tracing.span(f"agent.{agent_name}", agent=agent_name, model=call.model) as agent_span:
+            try:
+                shared = _batch_shared.get()
+                if shared is not None and agent_name in BATCH_SHARED_AGENTS:
+                    return await self._shared_call(
+                        shared, call, prompt, progress_callback, use_cache, stream, timeout
+                    )
+                return await self._call_agent(
+                    call, prompt, progress_callback, use_cache, stream, timeout
+                )
+            finally:
+                agent_span.set_attributes(
+                    status=call.status,
+                    cached=call.cached,
+                    input_tokens=call.input_tokens,
+                    output_tokens=call.output_tokens,
+                    tokens_estimated=call.tokens_estimated,
+                    ttft_seconds=call.ttft_seconds
+                )
+
+    async def _shared_call(
+        self,
+        shared: Dict[str, asyncio.Task],
+        call: AgentCallStats,
+        prompt: str,
+        progress_callback: Optional[callable],
+        use_cache: bool,
+        stream: bool,
+        timeout: Optional[float]
+    ) -> str:
         """
+        Run an agent call once per batch
+
+        The first workflow to make a call runs it; every other workflow in
+        the batch making the identical call waits for that result and
+        records it as a cache hit. The call is shielded, so one workflow
+        being cancelled does not cancel it for the others.
+        """
+        key = self._cache_key(call.agent_name, prompt)
+        task = shared.get(key)
+        if task is None:
+            task = shared[key] = asyncio.ensure_future(
+                self._call_agent(call, prompt, progress_callback, use_cache, stream, timeout)
+            )
+
+            def forget_failure(done: asyncio.Task):
+                # Failed calls are retried by the next workflow that needs them
+                if done.cancelled() or done.exception() is not None:
+                    shared.pop(key, None)
+
+            task.add_done_callback(forget_failure)
+            return await asyncio.shield(task)
+
+        started = time.monotonic()
+        try:
+            output = await asyncio.shield(task)
+        except BaseException as e:
+            call.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+            self._finish_call(call, started, prompt, None)
+            raise
+        call.cached = True
+        self._finish_call(call, started, prompt, output)
+        if progress_callback:
+            await progress_callback(AgentProgress(
+                agent_name=call.agent_name,
+                phase=self._get_phase_for_agent(call.agent_name),
+                status="completed",
+                message=f"{call.agent_name} completed (shared)",
+                progress_percent=100,
+                data={"output_length": len(output), "cached": True, "shared": True}
+            ))
+        return output
+
+    async def _call_agent(
+        self,
+        call: AgentCallStats,
+        prompt: str,
+        progress_callback: Optional[callable],
+        use_cache: bool,
+        stream: bool,
+        timeout: Optional[float]
+    ) -> str:
+        """Body of run_agent; fills in call as it goes"""
+        agent_name = call.agent_name
         runner = self.runners[agent_name]
+        cache_key = self._cache_key(agent_name, prompt)
+        stream = stream and progress_callback is not None
+        started = time.monotonic()
+
+        if use_cache:
+            cached = self.response_cache.get(cache_key, agent_name)
+            if cached is not None:
+                call.cached = True
+                self._finish_call(call, started, prompt, cached)
+
+                if progress_callback:
+                    if stream:
+                        # Stream consumers render from deltas, so hand them the whole output at once
+                        await progress_callback(AgentProgress(
+                            agent_name=agent_name,
+                            phase=self._get_phase_for_agent(agent_name),
+                            status="streaming",
+                            message=f"{agent_name} generating...",
+                            progress_percent=50,
+                            data={"delta": cached, "chunk_index": 0, "cached": True}
+                        ))
+                    await progress_callback(AgentProgress(
+                        agent_name=agent_name,
+                        phase=self._get_phase_for_agent(agent_name),
+                        status="completed",
+                        message=f"{agent_name} completed (cached)",
+                        progress_percent=100,
+                        data={"output_length": len(cached), "cached": True}
+                    ))
+                return cached
 
         if progress_callback:
             await progress_callback(AgentProgress(
@@ -146,15 +584,55 @@ class RedSpecOrchestrator:
                 progress_percent=0
             ))
 
-        try:
-            events = await runner.run_debug(prompt)
+        if timeout is None:
+            timeout = self.agent_timeouts.get(agent_name, DEFAULT_AGENT_TIMEOUT)
+
+        async def call_model():
+            if stream:
+                return await self._forward_stream(agent_name, prompt, progress_callback, call, started)
+
+            # A fresh session per call: run_debug's default session is shared by
+            # every call to the agent, so concurrent workflows would see each
+            # other's prompts and outputs
+            session_id = f"call-{uuid.uuid4().hex}"
+            try:
+                events = await runner.run_debug(prompt, user_id="redspec", session_id=session_id)
+            finally:
+                try:
+                    await runner.session_service.delete_session(
+                        app_name=runner.app_name,
+                        user_id="redspec",
+                        session_id=session_id
+                    )
+                except Exception:
+                    pass
+            usage = None
+            for event in events:
+                if not getattr(event, "partial", False):
+                    usage = _add_usage(usage, _usage_from_event(event))
 
             # Extract final response
-            output = ""
             for event in events:
                 if event.is_final_response():
-                    output = event.content.parts[0].text
-                    break
+                    return event.content.parts[0].text, usage
+            return "", usage
+
+        output, usage = None, None
+        finished = False
+        try:
+            try:
+                # wait_for cancels the model call when the deadline passes
+                output, usage = await asyncio.wait_for(call_model(), timeout or None)
+            except asyncio.TimeoutError:
+                call.status = "timeout"
+                run = _current_run.get()
+                if run is not None:
+                    run.timed_out.append(agent_name)
+                raise AgentTimeoutError(agent_name, timeout)
+
+            self.response_cache.set(cache_key, output, agent_name)
+            self._finish_call(call, started, prompt, output, usage)
+            finished = True
 
             if progress_callback:
                 await progress_callback(AgentProgress(
@@ -163,12 +641,24 @@ class RedSpecOrchestrator:
                     status="completed",
                     message=f"{agent_name} completed",
                     progress_percent=100,
-                    data={"output_length": len(output)}
+                    data={
+                        "output_length": len(output),
+                        "input_tokens": call.input_tokens,
+                        "output_tokens": call.output_tokens,
+                        "wall_seconds": call.wall_seconds,
+                        "ttft_seconds": call.ttft_seconds,
+                    }
                 ))
 
             return output
 
+        except asyncio.CancelledError:
+            call.status = "cancelled"
+            raise
+
         except Exception as e:
+            if call.status == "ok" and not finished:
+                call.status = "error"
             if progress_callback:
                 await progress_callback(AgentProgress(
                     agent_name=agent_name,
@@ -179,6 +669,190 @@ class RedSpecOrchestrator:
                 ))
             raise
 
+        finally:
+            if not finished:
+                self._finish_call(call, started, prompt, output, usage)
+
+    def _finish_call(
+        self,
+        call: AgentCallStats,
+        started: float,
+        prompt: str,
+        output: Optional[str],
+        usage: Optional[Dict[str, int]] = None
+    ):
+        """
+        Fill in a call's tokens, wall time and cost, and add it to the current run
+
+        Token counts come from the model's usage metadata when it reported
+        any, otherwise they are estimated from the prompt and output text.
+        """
+        call.wall_seconds = round(time.monotonic() - started, 3)
+        call.stage = call.stage or _current_stage.get()
+        if usage and not call.cached:
+            call.input_tokens = usage["input_tokens"]
+            call.output_tokens = usage["output_tokens"]
+            call.tokens_estimated = False
+        else:
+            call.input_tokens = estimate_tokens(prompt)
+            call.output_tokens = estimate_tokens(output)
+
+        pricing = MODEL_PRICING.get(call.model)
+        if call.cached:
+            call.cost_usd = 0.0
+        elif pricing:
+            call.cost_usd = round(
+                (call.input_tokens * pricing[0] + call.output_tokens * pricing[1]) / 1_000_000, 6
+            )
+
+        run = _current_run.get()
+        if run is not None and run.agent_calls is not None:
+            run.agent_calls.append(call)
+
+    async def stream_agent(self, agent_name: str, prompt: str) -> AsyncIterator[AgentChunk]:
+        """
+        Run a single agent and yield its output as the model produces it
+
+        Partial chunks carry the new text of each streamed model response,
+        including text the model writes around tool calls. The last chunk
+        has final=True and the complete final response, i.e. what run_agent
+        returns. Every call runs in a fresh session and bypasses the cache.
+
+        Args:
+            agent_name: Name of the agent to run
+            prompt: Input prompt for the agent
+
+        Yields:
+            AgentChunk pieces, ending with the final one
+        """
+        runner = self.runners[agent_name]
+        user_id = "redspec"
+        session = await runner.session_service.create_session(
+            app_name=runner.app_name,
+            user_id=user_id,
+            session_id=f"stream-{uuid.uuid4().hex}"
+        )
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+
+        output = None
+        usage = None
+        try:
+            async for event in runner.run_async(
+                user_id=user_id,
+                session_id=session.id,
+                new_message=message,
+                run_config=run_config
+            ):
+                parts = event.content.parts if event.content and event.content.parts else []
+                if getattr(event, "partial", False):
+                    text = "".join(part.text for part in parts if getattr(part, "text", None))
+                    if text:
+                        yield AgentChunk(agent_name=agent_name, text=text)
+                    continue
+                usage = _add_usage(usage, _usage_from_event(event))
+                if output is None and event.is_final_response():
+                    output = parts[0].text if parts else ""
+        finally:
+            try:
+                await runner.session_service.delete_session(
+                    app_name=runner.app_name,
+                    user_id=user_id,
+                    session_id=session.id
+                )
+            except Exception:
+                pass
+
+        yield AgentChunk(agent_name=agent_name, text=output or "", final=True, usage=usage)
+
+    async def _forward_stream(
+        self,
+        agent_name: str,
+        prompt: str,
+        progress_callback: callable,
+        call: Optional[AgentCallStats] = None,
+        started: Optional[float] = None
+    ):
+        """
+        Run stream_agent and forward its partial output to progress_callback
+
+        Deltas are coalesced so the callback sees at most one "streaming"
+        update per STREAM_FLUSH_SECONDS instead of one per model chunk.
+        When call is given, its time to first chunk is measured from started.
+
+        Returns:
+            (final agent output, reported token usage or None)
+        """
+        phase = self._get_phase_for_agent(agent_name)
+        pending: List[str] = []
+        chunk_index = 0
+        last_flush = time.monotonic()
+        output, usage = "", None
+
+        async def flush():
+            nonlocal pending, chunk_index, last_flush
+            if pending:
+                await progress_callback(AgentProgress(
+                    agent_name=agent_name,
+                    phase=phase,
+                    status="streaming",
+                    message=f"{agent_name} generating...",
+                    progress_percent=50,
+                    data={"delta": "".join(pending), "chunk_index": chunk_index}
+                ))
+                pending = []
+                chunk_index += 1
+            last_flush = time.monotonic()
+
+        async for chunk in self.stream_agent(agent_name, prompt):
+            if chunk.final:
+                output, usage = chunk.text, chunk.usage
+                continue
+            if call is not None and call.ttft_seconds is None:
+                call.ttft_seconds = round(time.monotonic() - started, 3)
+            pending.append(chunk.text)
+            if time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS:
+                await flush()
+
+        await flush()
+        return output, usage
+
+    def _cache_key(self, agent_name: str, prompt: str) -> str:
+        """Content-addressed cache key for running a prompt through an agent"""
+        agent = self.runners[agent_name].agent
+        tools = [
+            getattr(tool, "name", None) or type(tool).__name__
+            for tool in (getattr(agent, "tools", None) or [])
+        ]
+        return make_cache_key(
+            agent_name,
+            _model_name(agent),
+            str(getattr(agent, "instruction", "")),
+            tools,
+            prompt
+        )
+
+    def _prd_for(self, result: WorkflowResult, agent_name: str) -> str:
+        """
+        PRD text to put in an agent's prompt
+
+        Returns the sections listed for the agent in AGENT_PRD_SECTIONS,
+        cut to its PRD_TOKEN_BUDGETS entry, and records the excerpt size in
+        result.prd_compaction. Agents without an entry get the full PRD.
+        """
+        keys = AGENT_PRD_SECTIONS.get(agent_name)
+        if not self.compact_prompts or not keys or not result.prd:
+            return result.prd
+
+        if result.prd_sections is None:
+            result.prd_sections = parse_prd_sections(result.prd)
+        excerpt, info = compact_prd(result.prd_sections, keys, PRD_TOKEN_BUDGETS[agent_name], result.prd)
+
+        if result.prd_compaction is None:
+            result.prd_compaction = {}
+        result.prd_compaction[agent_name] = {"prd_tokens": estimate_tokens(result.prd), **info}
+        return excerpt
+
     def _get_phase_for_agent(self, agent_name: str) -> AgentPhase:
         """Map agent name to its phase"""
         phase_map = {
@@ -189,104 +863,502 @@ class RedSpecOrchestrator:
             "code_impact": AgentPhase.TECHNICAL_ANALYSIS,
             "story_points": AgentPhase.TECHNICAL_ANALYSIS,
             "design": AgentPhase.DESIGN_TRACKING,
+            "figma_import": AgentPhase.DESIGN_TRACKING,
+            "figma_automation": AgentPhase.DESIGN_TRACKING,
             "analytics": AgentPhase.DESIGN_TRACKING,
             "validator": AgentPhase.VALIDATION_INTEGRATION,
             "jira": AgentPhase.VALIDATION_INTEGRATION,
         }
         return phase_map.get(agent_name, AgentPhase.CONTEXT_GATHERING)
 
+    def _build_stages(self) -> List[WorkflowStage]:
+        """
+        Declare the workflow dependency graph
+
+        Each stage lists the stages whose outputs it reads. The scheduler
+        starts every stage as soon as its dependencies are done, so
+        independent agents run concurrently.
+        """
+        return [
+            # Phase 1: Context Gathering
+            WorkflowStage(
+                "context", AgentPhase.CONTEXT_GATHERING, self._context_stage,
+                outputs=["company_context"]
+            ),
+            WorkflowStage(
+                "codebase", AgentPhase.CONTEXT_GATHERING, self._codebase_stage,
+                condition=lambda result: bool(result.github_repo), outputs=["codebase_info"]
+            ),
+            WorkflowStage(
+                "release_notes", AgentPhase.CONTEXT_GATHERING, self._release_notes_stage,
+                outputs=["release_history"]
+            ),
+
+            # Phase 2: PRD Generation
+            WorkflowStage(
+                "prd", AgentPhase.PRD_GENERATION, self._prd_stage,
+                depends_on=["context", "release_notes"], outputs=["prd", "prd_sections"]
+            ),
+
+            # Phase 3: Technical Analysis
+            WorkflowStage(
+                "code_impact", AgentPhase.TECHNICAL_ANALYSIS, self._code_impact_stage,
+                depends_on=["prd", "codebase"], condition=_has_prd, outputs=["code_impact"]
+            ),
+            WorkflowStage(
+                "story_points", AgentPhase.TECHNICAL_ANALYSIS, self._story_points_stage,
+                depends_on=["prd", "code_impact"], condition=_has_prd,
+                outputs=["story_points", "total_story_points"]
+            ),
+
+            # Phase 4: Design & Tracking
+            WorkflowStage(
+                "design", AgentPhase.DESIGN_TRACKING, self._design_stage,
+                depends_on=["prd"], condition=_has_prd, outputs=["design_specs"]
+            ),
+            WorkflowStage(
+                "figma", AgentPhase.DESIGN_TRACKING, self._figma_stage,
+                depends_on=["design"], condition=_has_prd, outputs=["figma_files"]
+            ),
+            WorkflowStage(
+                "analytics", AgentPhase.DESIGN_TRACKING, self._analytics_stage,
+                depends_on=["prd"], condition=_has_prd, outputs=["analytics_plan"]
+            ),
+
+            # Phase 5: Validation & Integration
+            WorkflowStage(
+                "validator", AgentPhase.VALIDATION_INTEGRATION, self._validator_stage,
+                depends_on=["prd"], condition=_has_prd, outputs=["prd_validation", "validation_score"]
+            ),
+            WorkflowStage(
+                "jira", AgentPhase.VALIDATION_INTEGRATION, self._jira_stage,
+                depends_on=["prd", "story_points", "code_impact"], condition=_has_prd,
+                outputs=["jira_tickets"]
+            ),
+        ]
+
+    async def _run_stages(
+        self,
+        stages: List[WorkflowStage],
+        result: WorkflowResult,
+        progress_callback: Optional[callable] = None,
+        skip_phases: Optional[List[AgentPhase]] = None,
+        timeout: Optional[float] = None,
+        reuse: Optional[set] = None,
+        run_id: Optional[str] = None
+    ) -> List[str]:
+        """
+        Run workflow stages concurrently in dependency order
+
+        A stage is launched once all of its dependencies have finished.
+        Stages in a skipped phase, or whose condition is false, count as
+        finished without running so their dependents still go ahead.
+        A stage that returns False is treated as failed and everything
+        that depends on it (directly or transitively) is dropped.
+        Cancelling the caller cancels every stage that is still running.
+
+        When the timeout passes, running stages are cancelled and recorded
+        in result.timed_out; they and the stages that never started count
+        as failed, and whatever finished stays in the result.
+
+        Stages in reuse (restored from a checkpoint) count as finished
+        without running unless one of their dependencies runs again. With a
+        run_id, each stage whose agent calls all succeed is checkpointed.
+
+        Args:
+            stages: Stages to run
+            result: WorkflowResult the stages read from and write into
+            progress_callback: Optional callback for progress updates
+            skip_phases: Optional list of phases to skip
+            timeout: Deadline in seconds for all stages together (None or 0: no deadline)
+            reuse: Names of stages whose outputs are already in result
+            run_id: Checkpoint completed stages under this run
+
+        Returns:
+            Names of the stages that failed
+        """
+        skip_phases = skip_phases or []
+        reuse = reuse or set()
+        pending = {stage.name: stage for stage in stages}
+        finished: set = set()
+        ran: set = set()
+        failed: List[str] = []
+        running: Dict[asyncio.Task, WorkflowStage] = {}
+        started_phases: set = set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+
+        while pending or running:
+            launched = True
+            while launched:
+                launched = False
+                for name, stage in list(pending.items()):
+                    if any(dep in failed for dep in stage.depends_on):
+                        del pending[name]
+                        failed.append(name)
+                        launched = True
+                        continue
+
+                    if not all(dep in finished for dep in stage.depends_on):
+                        continue
+
+                    del pending[name]
+                    launched = True
+
+                    if stage.phase in skip_phases or (stage.condition and not stage.condition(result)):
+                        finished.add(name)
+                        continue
+
+                    if name in reuse and not any(dep in ran for dep in stage.depends_on):
+                        finished.add(name)
+                        continue
+                    ran.add(name)
+
+                    if progress_callback and stage.phase not in started_phases:
+                        started_phases.add(stage.phase)
+                        percent, message = PHASE_ANNOUNCEMENTS[stage.phase]
+                        await progress_callback(AgentProgress(
+                            agent_name="orchestrator",
+                            phase=stage.phase,
+                            status="running",
+                            message=message,
+                            progress_percent=percent
+                        ))
+
+                    task = asyncio.create_task(self._run_stage(stage, result, progress_callback, run_id))
+                    running[task] = stage
+
+            if not running:
+                break
+
+            remaining = None if deadline is None else max(deadline - loop.time(), 0)
+            try:
+                done, _ = await asyncio.wait(
+                    running.keys(),
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+            except asyncio.CancelledError:
+                # Stop the agent calls still in flight, not just the scheduler
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+                raise
+
+            if not done:
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+
+                stopped = [stage.name for task, stage in running.items() if task.cancelled()]
+                not_started = list(pending)
+                for task, stage in running.items():
+                    if not task.cancelled() and self._stage_succeeded(task, stage, result):
+                        finished.add(stage.name)
+                    else:
+                        failed.append(stage.name)
+                failed.extend(not_started)
+
+                result.timed_out.extend(stopped)
+                result.errors.append(
+                    f"Workflow timed out after {timeout:g}s"
+                    f" (stopped: {', '.join(stopped) or 'none'}; not started: {', '.join(not_started) or 'none'})"
+                )
+                break
+
+            for task in done:
+                stage = running.pop(task)
+                if self._stage_succeeded(task, stage, result):
+                    finished.add(stage.name)
+                else:
+                    failed.append(stage.name)
+
+        return failed
+
+    @staticmethod
+    def _stage_succeeded(task: asyncio.Task, stage: WorkflowStage, result: WorkflowResult) -> bool:
+        """
+        Whether a finished stage task succeeded
+
+        A stage that raised outside its own error handling (e.g. a
+        checkpoint write in _run_stage) is recorded in result.errors and
+        counts as failed instead of aborting the run.
+        """
+        error = task.exception()
+        if error is not None:
+            result.errors.append(f"Stage {stage.name} error: {str(error)}")
+            return False
+        return task.result() is not False
+
+    async def _run_stage(
+        self,
+        stage: WorkflowStage,
+        result: WorkflowResult,
+        progress_callback: Optional[callable],
+        run_id: Optional[str]
+    ) -> bool:
+        """Run one stage and checkpoint its outputs if all of its agent calls succeeded"""
+        # Runs in its own task, so this only tags this stage's agent calls
+        _current_stage.set(stage.name)
+        if run_id:
+            self.checkpoints.discard_stage(run_id, stage.name)
+
+        completed = await stage.run(result, progress_callback)
+
+        calls = [call for call in result.agent_calls or [] if call.stage == stage.name]
+        if run_id and completed is not False and all(call.status == "ok" for call in calls):
+            try:
+                self.checkpoints.save_stage(
+                    run_id, stage.name, {name: getattr(result, name) for name in stage.outputs}
+                )
+            except Exception as e:
+                print(f"⚠️  Could not checkpoint {stage.name}: {e}")
+        return completed
+
     async def generate_spec(
         self,
         product_idea: str,
         github_repo: Optional[str] = None,
         progress_callback: Optional[callable] = None,
-        skip_phases: Optional[List[AgentPhase]] = None
+        skip_phases: Optional[List[AgentPhase]] = None,
+        timeout: Optional[float] = None,
+        run_id: Optional[str] = None
     ) -> WorkflowResult:
         """
         Run the complete workflow to generate product specification
 
+        Agents are scheduled on a dependency graph (see _build_stages), so
+        independent agents run concurrently and total wall time follows the
+        critical path rather than the sum of all agent latencies.
+
+        Each agent call has its own deadline and the run as a whole has
+        another; on either, the affected work is cancelled and the partial
+        result is returned with result.timed_out saying what was stopped.
+
+        Token counts, latency and cost of every agent call end up in
+        result.agent_calls and result.usage, and are appended to
+        REDSPEC_USAGE_LOG when that is set.
+
+        With tracing on (tools/tracing.py), the run is a root span with one
+        child span per agent call and tool call.
+
+        Each stage's outputs are checkpointed under result.run_id as soon as
+        the stage completes; resume_run(run_id) re-runs only what did not.
+
         Args:
             product_idea: The rough product idea or PRD draft
             github_repo: Optional GitHub repository URL
             progress_callback: Optional callback for progress updates
             skip_phases: Optional list of phases to skip
+            timeout: Deadline in seconds for the whole run (default: the orchestrator's workflow_timeout)
+            run_id: Checkpoint key (default: a new unique ID)
 
         Returns:
             WorkflowResult with all outputs
         """
-        skip_phases = skip_phases or []
         result = WorkflowResult(
             timestamp=datetime.now().isoformat(),
             product_idea=product_idea,
             github_repo=github_repo,
-            errors=[]
+            errors=[],
+            timed_out=[],
+            agent_calls=[],
+            run_id=run_id or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
         )
+        return await self._run_workflow(result, progress_callback, skip_phases, timeout)
 
-        try:
-            # ============================================================
-            # PHASE 1: CONTEXT GATHERING
-            # ============================================================
-            if AgentPhase.CONTEXT_GATHERING not in skip_phases:
+    async def resume_run(
+        self,
+        run_id: str,
+        progress_callback: Optional[callable] = None,
+        skip_phases: Optional[List[AgentPhase]] = None,
+        timeout: Optional[float] = None
+    ) -> WorkflowResult:
+        """
+        Finish a checkpointed generate_spec run
+
+        Outputs of the stages that completed are restored from the
+        checkpoint store; stages that failed, timed out or never ran are
+        executed, as is every stage downstream of one that runs again.
+
+        Args:
+            run_id: WorkflowResult.run_id of the earlier run
+            progress_callback: Optional callback for progress updates
+            skip_phases: Optional list of phases to skip
+            timeout: Deadline in seconds for the resumed part (default: the orchestrator's workflow_timeout)
+
+        Returns:
+            WorkflowResult with restored and new outputs (agent_calls and usage cover only the new calls)
+
+        Raises:
+            KeyError: If no checkpoint exists for run_id
+        """
+        checkpoint = self.checkpoints.load_run(run_id)
+        if checkpoint is None:
+            raise KeyError(f"No checkpointed run {run_id}")
+
+        result = WorkflowResult(
+            timestamp=datetime.now().isoformat(),
+            product_idea=checkpoint["product_idea"],
+            github_repo=checkpoint["github_repo"],
+            errors=[],
+            timed_out=[],
+            agent_calls=[],
+            run_id=run_id
+        )
+        for outputs in checkpoint["stages"].values():
+            for name, value in outputs.items():
+                setattr(result, name, value)
+
+        print(f"♻️  Resuming run {run_id} ({len(checkpoint['stages'])} stage(s) restored)")
+        return await self._run_workflow(
+            result, progress_callback, skip_phases, timeout, reuse=set(checkpoint["stages"])
+        )
+
+    async def _run_workflow(
+        self,
+        result: WorkflowResult,
+        progress_callback: Optional[callable],
+        skip_phases: Optional[List[AgentPhase]],
+        timeout: Optional[float],
+        reuse: Optional[set] = None
+    ) -> WorkflowResult:
+        """Body of generate_spec and resume_run"""
+        self.checkpoints.start_run(result.run_id, result.product_idea, result.github_repo)
+        run_token = _current_run.set(result)
+        with pin_repo(result.github_repo), tracing.span(
+            "generate_spec",
+            product_idea=result.product_idea[:200],
+            github_repo=result.github_repo,
+            run_id=result.run_id,
+            resumed_stages=sorted(reuse) if reuse else None
+        ) as root_span:
+            try:
+                failed = await self._run_stages(
+                    self._build_stages(),
+                    result,
+                    progress_callback,
+                    skip_phases,
+                    self.workflow_timeout if timeout is None else timeout,
+                    reuse,
+                    result.run_id
+                )
+                if "prd" in failed:
+                    return result  # Can't continue without PRD
+
+                # ============================================================
+                # WORKFLOW COMPLETE
+                # ============================================================
                 if progress_callback:
                     await progress_callback(AgentProgress(
                         agent_name="orchestrator",
-                        phase=AgentPhase.CONTEXT_GATHERING,
-                        status="running",
-                        message="Phase 1: Gathering context...",
-                        progress_percent=10
+                        phase=AgentPhase.VALIDATION_INTEGRATION,
+                        status="completed",
+                        message=(
+                            f"Workflow completed with {len(result.timed_out)} timed out agent(s)"
+                            if result.timed_out else "Workflow completed successfully!"
+                        ),
+                        progress_percent=100,
+                        data={
+                            "total_story_points": result.total_story_points,
+                            "validation_score": result.validation_score,
+                            "errors_count": len(result.errors),
+                            "timed_out": result.timed_out,
+                            "usage": summarize_usage(result.agent_calls)
+                        }
                     ))
 
-                # Agent 1: Context Extraction
-                try:
-                    context_prompt = "Get the complete redBus company context including product principles, tech stack, and design system"
-                    result.company_context = await self.run_agent(
-                        "context",
-                        context_prompt,
-                        progress_callback
-                    )
-                except Exception as e:
-                    result.errors.append(f"Context extraction error: {str(e)}")
-
-                # Agent 2: Codebase Fetcher (if GitHub repo provided)
-                if github_repo:
-                    try:
-                        codebase_prompt = f"Fetch and analyze this GitHub repository: {github_repo}"
-                        result.codebase_info = await self.run_agent(
-                            "codebase",
-                            codebase_prompt,
-                            progress_callback
-                        )
-                    except Exception as e:
-                        result.errors.append(f"Codebase fetch error: {str(e)}")
-
-                # Agent 3: Release Notes (with context about the feature)
-                try:
-                    release_prompt = f"Analyze past release notes for features related to: {product_idea}"
-                    result.release_history = await self.run_agent(
-                        "release_notes",
-                        release_prompt,
-                        progress_callback
-                    )
-                except Exception as e:
-                    result.errors.append(f"Release notes error: {str(e)}")
+                return result
 
-            # ============================================================
-            # PHASE 2: PRD GENERATION
-            # ============================================================
-            if AgentPhase.PRD_GENERATION not in skip_phases:
+            except Exception as e:
+                result.errors.append(f"Orchestrator error: {str(e)}")
                 if progress_callback:
                     await progress_callback(AgentProgress(
                         agent_name="orchestrator",
-                        phase=AgentPhase.PRD_GENERATION,
-                        status="running",
-                        message="Phase 2: Generating PRD...",
-                        progress_percent=30
+                        phase=AgentPhase.VALIDATION_INTEGRATION,
+                        status="error",
+                        message=f"Workflow failed: {str(e)}",
+                        progress_percent=0
                     ))
-
-                # Agent 4: Conversational PRD Generator
+                return result
+            finally:
+                _current_run.reset(run_token)
+                result.usage = summarize_usage(result.agent_calls)
+                root_span.set_attributes(
+                    errors=len(result.errors),
+                    timed_out=result.timed_out,
+                    agent_calls=result.usage["calls"],
+                    input_tokens=result.usage["input_tokens"],
+                    output_tokens=result.usage["output_tokens"],
+                    cost_usd=result.usage["cost_usd"]
+                )
+                if USAGE_LOG_PATH:
+                    try:
+                        export_usage_jsonl(result, USAGE_LOG_PATH)
+                    except OSError as e:
+                        print(f"⚠️  Could not write usage log {USAGE_LOG_PATH}: {e}")
+                complete = not result.errors and not result.timed_out
                 try:
-                    prd_prompt = f"""
-Product Idea: {product_idea}
+                    if complete:
+                        # Nothing left to resume
+                        self.checkpoints.delete_run(result.run_id)
+                    else:
+                        self.checkpoints.finish_run(result.run_id, "incomplete", result.errors)
+                    if not complete and self.checkpoints.enabled:
+                        print(f"💾 Run {result.run_id} checkpointed; resume with: python orchestrator.py resume {result.run_id}")
+                except Exception as e:
+                    print(f"⚠️  Could not update checkpoint for run {result.run_id}: {e}")
+
+    # ================================================================
+    # PHASE 1: CONTEXT GATHERING
+    # ================================================================
+    async def _context_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 1: Context Extraction"""
+        try:
+            context_prompt = "Get the complete redBus company context including product principles, tech stack, and design system"
+            result.company_context = await self.run_agent(
+                "context",
+                context_prompt,
+                progress_callback
+            )
+        except Exception as e:
+            result.errors.append(f"Context extraction error: {str(e)}")
+        return True
+
+    async def _codebase_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 2: Codebase Fetcher (if GitHub repo provided)"""
+        try:
+            codebase_prompt = f"Fetch and analyze this GitHub repository: {result.github_repo}"
+            result.codebase_info = await self.run_agent(
+                "codebase",
+                codebase_prompt,
+                progress_callback
+            )
+        except Exception as e:
+            result.errors.append(f"Codebase fetch error: {str(e)}")
+        return True
+
+    async def _release_notes_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 3: Release Notes (with context about the feature)"""
+        try:
+            release_prompt = f"Analyze past release notes for features related to: {result.product_idea}"
+            result.release_history = await self.run_agent(
+                "release_notes",
+                release_prompt,
+                progress_callback
+            )
+        except Exception as e:
+            result.errors.append(f"Release notes error: {str(e)}")
+        return True
+
+    # ================================================================
+    # PHASE 2: PRD GENERATION
+    # ================================================================
+    async def _prd_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 4: Conversational PRD Generator"""
+        try:
+            prd_prompt = f"""
+Product Idea: {result.product_idea}
 
 Company Context:
 {result.company_context if result.company_context else 'Using default redBus context'}
@@ -296,108 +1368,96 @@ Historical Context:
 
 Please generate a comprehensive PRD for this feature. Follow the redBus PRD template with all 14 sections.
 """
-                    result.prd = await self.run_agent(
-                        "prd",
-                        prd_prompt,
-                        progress_callback
-                    )
-                except Exception as e:
-                    result.errors.append(f"PRD generation error: {str(e)}")
-                    return result  # Can't continue without PRD
-
-            # ============================================================
-            # PHASE 3: TECHNICAL ANALYSIS
-            # ============================================================
-            if AgentPhase.TECHNICAL_ANALYSIS not in skip_phases and result.prd:
-                if progress_callback:
-                    await progress_callback(AgentProgress(
-                        agent_name="orchestrator",
-                        phase=AgentPhase.TECHNICAL_ANALYSIS,
-                        status="running",
-                        message="Phase 3: Analyzing technical impact...",
-                        progress_percent=50
-                    ))
-
-                # Agent 5: Code Impact Analyzer
-                try:
-                    impact_prompt = f"""
+            result.prd = await self.run_agent(
+                "prd",
+                prd_prompt,
+                progress_callback
+            )
+            result.prd_sections = parse_prd_sections(result.prd)
+        except Exception as e:
+            result.errors.append(f"PRD generation error: {str(e)}")
+            return False
+        return True
+
+    # ================================================================
+    # PHASE 3: TECHNICAL ANALYSIS
+    # ================================================================
+    async def _code_impact_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 5: Code Impact Analyzer"""
+        try:
+            impact_prompt = f"""
 PRD:
-{result.prd}
+{self._prd_for(result, "code_impact")}
 
 Codebase Information:
 {result.codebase_info if result.codebase_info else 'No codebase information available - provide generic analysis'}
 
 Analyze the code impact for this PRD. Identify specific files, components, and systems that will be affected.
 """
-                    result.code_impact = await self.run_agent(
-                        "code_impact",
-                        impact_prompt,
-                        progress_callback
-                    )
-                except Exception as e:
-                    result.errors.append(f"Code impact analysis error: {str(e)}")
+            result.code_impact = await self.run_agent(
+                "code_impact",
+                impact_prompt,
+                progress_callback
+            )
+        except Exception as e:
+            result.errors.append(f"Code impact analysis error: {str(e)}")
+        return True
 
-                # Agent 6: Story Point Calculator
-                try:
-                    points_prompt = f"""
+    async def _story_points_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 6: Story Point Calculator"""
+        try:
+            points_prompt = f"""
 PRD:
-{result.prd}
+{self._prd_for(result, "story_points")}
 
 Code Impact Analysis:
 {result.code_impact if result.code_impact else 'No impact analysis available'}
 
 Calculate story points for each user story using the Fibonacci scale. Consider complexity, impact area, dependencies, and risk.
 """
-                    result.story_points = await self.run_agent(
-                        "story_points",
-                        points_prompt,
-                        progress_callback
-                    )
-
-                    # Extract total story points (if possible)
-                    if result.story_points and "Total" in result.story_points:
-                        # Simple extraction - could be made more robust
-                        import re
-                        match = re.search(r'Total.*?(\d+)', result.story_points)
-                        if match:
-                            result.total_story_points = int(match.group(1))
-
-                except Exception as e:
-                    result.errors.append(f"Story point calculation error: {str(e)}")
-
-            # ============================================================
-            # PHASE 4: DESIGN & TRACKING
-            # ============================================================
-            if AgentPhase.DESIGN_TRACKING not in skip_phases and result.prd:
-                if progress_callback:
-                    await progress_callback(AgentProgress(
-                        agent_name="orchestrator",
-                        phase=AgentPhase.DESIGN_TRACKING,
-                        status="running",
-                        message="Phase 4: Creating design specs and analytics plan...",
-                        progress_percent=70
-                    ))
+            result.story_points = await self.run_agent(
+                "story_points",
+                points_prompt,
+                progress_callback
+            )
+
+            # Extract total story points (if possible)
+            if result.story_points and "Total" in result.story_points:
+                # Simple extraction - could be made more robust
+                match = re.search(r'Total.*?(\d+)', result.story_points)
+                if match:
+                    result.total_story_points = int(match.group(1))
 
-                # Agent 7: Design & Wireframe Generator
-                try:
-                    design_prompt = f"""
+        except Exception as e:
+            result.errors.append(f"Story point calculation error: {str(e)}")
+        return True
+
+    # ================================================================
+    # PHASE 4: DESIGN & TRACKING
+    # ================================================================
+    async def _design_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 7: Design & Wireframe Generator"""
+        try:
+            design_prompt = f"""
 PRD:
-{result.prd}
+{self._prd_for(result, "design")}
 
 Generate wireframes and design specifications aligned with redBus Design System. Include ASCII wireframes, component specs, and design tokens.
 """
-                    result.design_specs = await self.run_agent(
-                        "design",
-                        design_prompt,
-                        progress_callback
-                    )
-                except Exception as e:
-                    result.errors.append(f"Design generation error: {str(e)}")
+            result.design_specs = await self.run_agent(
+                "design",
+                design_prompt,
+                progress_callback
+            )
+        except Exception as e:
+            result.errors.append(f"Design generation error: {str(e)}")
+        return True
 
-                # Agent 7.1: Figma Make Integration
-                try:
-                    if result.design_specs:
-                        figma_make_prompt = f"""
+    async def _figma_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 7.1: Figma Make Integration, followed by Agent 7.2: Figma Automation"""
+        try:
+            if result.design_specs:
+                figma_make_prompt = f"""
 Based on the design specifications generated, create optimized prompts for Figma Make AI wireframe generator.
 
 Design Specs:
@@ -409,16 +1469,16 @@ Include step-by-step instructions for using Figma Make and adding the resulting
 
 Focus on creating prompts that will generate high-quality, modern mobile interfaces aligned with redBus design principles.
 """
-                        figma_result = await self.run_agent(
-                            "figma_import",
-                            figma_make_prompt,
-                            progress_callback
-                        )
-
-                        # Agent 7.2: Figma Automation (if prompts generated successfully)
-                        if figma_result and "figma_make_prompt" in str(figma_result):
-                            try:
-                                automation_prompt = f"""
+                figma_result = await self.run_agent(
+                    "figma_import",
+                    figma_make_prompt,
+                    progress_callback
+                )
+
+                # Agent 7.2: Figma Automation (if prompts generated successfully)
+                if figma_result and "figma_make_prompt" in str(figma_result):
+                    try:
+                        automation_prompt = f"""
 Using the generated Figma Make prompt, automatically generate the actual Figma design.
 
 Figma Prompt: {figma_result.get('figma_make_prompt', '')}
@@ -432,137 +1492,212 @@ Use browser automation to:
 
 This should give us actual Figma design links and screenshots instead of just prompts.
 """
-                                automation_result = await self.run_agent(
-                                    "figma_automation",
-                                    automation_prompt,
-                                    progress_callback
-                                )
-
-                                # Combine results
-                                result.figma_files = {
-                                    "prompts": figma_result,
-                                    "automated_designs": automation_result
-                                }
-                            except Exception as automation_error:
-                                result.figma_files = {
-                                    "prompts": figma_result,
-                                    "automation_error": str(automation_error),
-                                    "note": "Prompts generated successfully, but automation failed. Use manual Figma Make workflow."
-                                }
-                        else:
-                            result.figma_files = figma_result
-                    else:
-                        result.figma_files = "Design specs not available for Figma Make integration"
-                except Exception as e:
-                    result.errors.append(f"Figma integration error: {str(e)}")
-                    result.figma_files = f"Figma integration failed: {str(e)}"
+                        automation_result = await self.run_agent(
+                            "figma_automation",
+                            automation_prompt,
+                            progress_callback
+                        )
 
-                # Agent 8: Analytics Tracking
-                try:
-                    analytics_prompt = f"""
+                        # Combine results
+                        result.figma_files = {
+                            "prompts": figma_result,
+                            "automated_designs": automation_result
+                        }
+                    except Exception as automation_error:
+                        result.figma_files = {
+                            "prompts": figma_result,
+                            "automation_error": str(automation_error),
+                            "note": "Prompts generated successfully, but automation failed. Use manual Figma Make workflow."
+                        }
+                else:
+                    result.figma_files = figma_result
+            else:
+                result.figma_files = "Design specs not available for Figma Make integration"
+        except Exception as e:
+            result.errors.append(f"Figma integration error: {str(e)}")
+            result.figma_files = f"Figma integration failed: {str(e)}"
+        return True
+
+    async def _analytics_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 8: Analytics Tracking"""
+        try:
+            analytics_prompt = f"""
 PRD:
-{result.prd}
+{self._prd_for(result, "analytics")}
 
 Define comprehensive analytics tracking strategy including GA4 events, Mixpanel events, conversion funnels, and success metrics.
 """
-                    result.analytics_plan = await self.run_agent(
-                        "analytics",
-                        analytics_prompt,
-                        progress_callback
-                    )
-                except Exception as e:
-                    result.errors.append(f"Analytics planning error: {str(e)}")
-
-            # ============================================================
-            # PHASE 5: VALIDATION & INTEGRATION
-            # ============================================================
-            if AgentPhase.VALIDATION_INTEGRATION not in skip_phases and result.prd:
-                if progress_callback:
-                    await progress_callback(AgentProgress(
-                        agent_name="orchestrator",
-                        phase=AgentPhase.VALIDATION_INTEGRATION,
-                        status="running",
-                        message="Phase 5: Validating PRD and creating JIRA tickets...",
-                        progress_percent=85
-                    ))
-
-                # Agent 9: PRD Validator
-                try:
-                    validation_prompt = f"""
+            result.analytics_plan = await self.run_agent(
+                "analytics",
+                analytics_prompt,
+                progress_callback
+            )
+        except Exception as e:
+            result.errors.append(f"Analytics planning error: {str(e)}")
+        return True
+
+    # ================================================================
+    # PHASE 5: VALIDATION & INTEGRATION
+    # ================================================================
+    async def _validator_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 9: PRD Validator"""
+        try:
+            validation_prompt = f"""
 PRD to validate:
 {result.prd}
 
 Validate this PRD against redBus standards. Provide a quality score (0-100) and detailed feedback.
 """
-                    result.prd_validation = await self.run_agent(
-                        "validator",
-                        validation_prompt,
-                        progress_callback
-                    )
+            result.prd_validation = await self.run_agent(
+                "validator",
+                validation_prompt,
+                progress_callback
+            )
 
-                    # Extract validation score
-                    if result.prd_validation:
-                        import re
-                        match = re.search(r'Score:?\s*(\d+)', result.prd_validation)
-                        if match:
-                            result.validation_score = int(match.group(1))
+            # Extract validation score
+            if result.prd_validation:
+                match = re.search(r'Score:?\s*(\d+)', result.prd_validation)
+                if match:
+                    result.validation_score = int(match.group(1))
 
-                except Exception as e:
-                    result.errors.append(f"PRD validation error: {str(e)}")
+        except Exception as e:
+            result.errors.append(f"PRD validation error: {str(e)}")
+        return True
 
-                # Agent 10: JIRA Integration
-                try:
-                    jira_prompt = f"""
+    async def _jira_stage(self, result: WorkflowResult, progress_callback: Optional[callable]) -> bool:
+        """Agent 10: JIRA Integration"""
+        try:
+            story_points = result.story_points
+            code_impact = result.code_impact
+            if self.compact_prompts:
+                story_points = truncate_to_budget(story_points, JIRA_ATTACHMENT_TOKEN_BUDGET)
+                code_impact = truncate_to_budget(code_impact, JIRA_ATTACHMENT_TOKEN_BUDGET)
+
+            jira_prompt = f"""
 PRD:
-{result.prd}
+{self._prd_for(result, "jira")}
 
 Story Points:
-{result.story_points if result.story_points else 'No story points available'}
+{story_points if story_points else 'No story points available'}
 
 Code Impact:
-{result.code_impact if result.code_impact else 'No impact analysis available'}
+{code_impact if code_impact else 'No impact analysis available'}
 
 Create complete JIRA ticket structure including epic, stories, tasks, and sub-tasks with story points and acceptance criteria.
 """
-                    result.jira_tickets = await self.run_agent(
-                        "jira",
-                        jira_prompt,
-                        progress_callback
-                    )
-                except Exception as e:
-                    result.errors.append(f"JIRA integration error: {str(e)}")
+            result.jira_tickets = await self.run_agent(
+                "jira",
+                jira_prompt,
+                progress_callback
+            )
+        except Exception as e:
+            result.errors.append(f"JIRA integration error: {str(e)}")
+        return True
 
-            # ============================================================
-            # WORKFLOW COMPLETE
-            # ============================================================
-            if progress_callback:
-                await progress_callback(AgentProgress(
-                    agent_name="orchestrator",
-                    phase=AgentPhase.VALIDATION_INTEGRATION,
-                    status="completed",
-                    message="Workflow completed successfully!",
-                    progress_percent=100,
-                    data={
-                        "total_story_points": result.total_story_points,
-                        "validation_score": result.validation_score,
-                        "errors_count": len(result.errors)
-                    }
-                ))
+    async def generate_batch(
+        self,
+        items: List[BatchItem],
+        concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[BatchItem, WorkflowResult], Awaitable[None]]] = None,
+        progress_callback: Optional[Callable[[BatchItem, AgentProgress], Awaitable[None]]] = None
+    ) -> List[WorkflowResult]:
+        """
+        Run generate_spec for many product ideas on this orchestrator
 
-            return result
+        At most concurrency workflows run at once. Agent calls that do not
+        depend on the idea (BATCH_SHARED_AGENTS: company context, and the
+        repository fetch per repository) run once and are shared by every
+        workflow in the batch.
 
-        except Exception as e:
-            result.errors.append(f"Orchestrator error: {str(e)}")
-            if progress_callback:
-                await progress_callback(AgentProgress(
-                    agent_name="orchestrator",
-                    phase=AgentPhase.VALIDATION_INTEGRATION,
-                    status="error",
-                    message=f"Workflow failed: {str(e)}",
-                    progress_percent=0
-                ))
+        Args:
+            items: Product ideas to generate specs for
+            concurrency: Workflows in flight (default: BATCH_CONCURRENCY)
+            on_result: Awaited with each item and its result as soon as it finishes
+            progress_callback: Awaited with the item and each progress update
+
+        Returns:
+            WorkflowResults in the order of items
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency or BATCH_CONCURRENCY))
+        shared_token = _batch_shared.set({})
+
+        async def run(item: BatchItem) -> WorkflowResult:
+            async def item_progress(progress: AgentProgress):
+                await progress_callback(item, progress)
+
+            async with semaphore:
+                result = await self.generate_spec(
+                    item.product_idea,
+                    item.github_repo,
+                    item_progress if progress_callback else None
+                )
+            if on_result:
+                try:
+                    await on_result(item, result)
+                except Exception as e:
+                    print(f"⚠️  Could not handle result for {item.id}: {e}")
             return result
 
+        try:
+            # Tasks copy the context now, so they all see the same shared calls
+            tasks = [asyncio.create_task(run(item)) for item in items]
+            try:
+                return list(await asyncio.gather(*tasks))
+            except asyncio.CancelledError:
+                for task in tasks:
+                    task.cancel()
+                raise
+        finally:
+            _batch_shared.reset(shared_token)
+
+    def generate_batch_sync(
+        self,
+        items: List[BatchItem],
+        output_dir: str = "output/batch",
+        concurrency: Optional[int] = None
+    ) -> List[WorkflowResult]:
+        """
+        Synchronous wrapper for generate_batch that writes results as they finish
+
+        Each item's outputs go to output_dir/<item id>/ and one summary line
+        per finished item is appended to output_dir/results.jsonl.
+
+        Args:
+            items: Product ideas to generate specs for
+            output_dir: Directory to save outputs
+            concurrency: Workflows in flight (default: BATCH_CONCURRENCY)
+
+        Returns:
+            WorkflowResults in the order of items
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        results_path = os.path.join(output_dir, "results.jsonl")
+        done = 0
+
+        async def save(item: BatchItem, result: WorkflowResult):
+            nonlocal done
+            item_dir = os.path.join(output_dir, item.id)
+            save_workflow_outputs(result, item_dir)
+            with open(results_path, "a") as f:
+                f.write(json.dumps({
+                    "id": item.id,
+                    "run_id": result.run_id,
+                    "product_idea": item.product_idea,
+                    "github_repo": item.github_repo,
+                    "timestamp": result.timestamp,
+                    "total_story_points": result.total_story_points,
+                    "validation_score": result.validation_score,
+                    "errors": result.errors,
+                    "timed_out": result.timed_out,
+                    "usage": result.usage,
+                    "output_dir": item_dir,
+                }) + "\n")
+            done += 1
+            status = "⚠️ " if result.errors else "✅"
+            print(f"{status} [{done}/{len(items)}] {item.id}: {item.product_idea[:60]}")
+
+        return asyncio.run(self.generate_batch(items, concurrency, on_result=save))
+
     def generate_spec_sync(
         self,
         product_idea: str,
@@ -582,60 +1717,139 @@ Create complete JIRA ticket structure including epic, stories, tasks, and sub-ta
         """
         async def run_with_save():
             result = await self.generate_spec(product_idea, github_repo)
+            save_workflow_outputs(result, output_dir)
+            return result
 
-            # Save outputs to files
-            os.makedirs(output_dir, exist_ok=True)
-            timestamp = result.timestamp.replace(":", "-").replace(".", "-")
+        return asyncio.run(run_with_save())
 
-            if result.prd:
-                with open(f"{output_dir}/prd_{timestamp}.md", "w") as f:
-                    f.write(result.prd)
+    def resume_run_sync(self, run_id: str, output_dir: str = "output") -> WorkflowResult:
+        """
+        Synchronous wrapper for resume_run
 
-            if result.code_impact:
-                with open(f"{output_dir}/code_impact_{timestamp}.md", "w") as f:
-                    f.write(result.code_impact)
+        Args:
+            run_id: WorkflowResult.run_id of the earlier run
+            output_dir: Directory to save outputs
 
-            if result.story_points:
-                with open(f"{output_dir}/story_points_{timestamp}.md", "w") as f:
-                    f.write(result.story_points)
+        Returns:
+            WorkflowResult
+        """
+        async def run_with_save():
+            result = await self.resume_run(run_id)
+            save_workflow_outputs(result, output_dir)
+            return result
 
-            if result.design_specs:
-                with open(f"{output_dir}/design_specs_{timestamp}.md", "w") as f:
-                    f.write(result.design_specs)
+        return asyncio.run(run_with_save())
 
-            if result.figma_files:
-                with open(f"{output_dir}/figma_files_{timestamp}.md", "w") as f:
-                    f.write(result.figma_files)
 
-            if result.analytics_plan:
-                with open(f"{output_dir}/analytics_{timestamp}.md", "w") as f:
-                    f.write(result.analytics_plan)
+def load_batch_items(path: str) -> List[BatchItem]:
+    """
+    Read product ideas for generate_batch from a JSON lines file
 
-            if result.prd_validation:
-                with open(f"{output_dir}/validation_{timestamp}.md", "w") as f:
-                    f.write(result.prd_validation)
-
-            if result.jira_tickets:
-                with open(f"{output_dir}/jira_{timestamp}.md", "w") as f:
-                    f.write(result.jira_tickets)
-
-            # Save summary
-            with open(f"{output_dir}/summary_{timestamp}.txt", "w") as f:
-                f.write(f"redSpec.AI Summary\n")
-                f.write(f"==================\n\n")
-                f.write(f"Product Idea: {result.product_idea}\n")
-                f.write(f"GitHub Repo: {result.github_repo}\n")
-                f.write(f"Total Story Points: {result.total_story_points}\n")
-                f.write(f"Validation Score: {result.validation_score}/100\n")
-                f.write(f"Errors: {len(result.errors)}\n")
-                if result.errors:
-                    f.write(f"\nErrors:\n")
-                    for error in result.errors:
-                        f.write(f"  - {error}\n")
+    Each line is an object with "idea" (or "product_idea") and optional
+    "repo" (or "github_repo") and "id", or just a JSON string with the
+    idea. Blank lines and lines starting with # are skipped. Items
+    without an id are numbered by line.
 
-            return result
+    Args:
+        path: JSON lines file
 
-        return asyncio.run(run_with_save())
+    Returns:
+        BatchItems in file order
+    """
+    items = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {"idea": entry}
+            idea = entry.get("idea") or entry.get("product_idea")
+            if not idea:
+                raise ValueError(f"{path}:{line_number}: missing idea")
+            items.append(BatchItem(
+                id=re.sub(r"[^\w.-]+", "-", str(entry.get("id") or f"{line_number:04d}")),
+                product_idea=idea,
+                github_repo=entry.get("repo") or entry.get("github_repo")
+            ))
+
+    ids = [item.id for item in items]
+    duplicates = sorted({item_id for item_id in ids if ids.count(item_id) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate ids {', '.join(duplicates)}")
+    return items
+
+
+def save_workflow_outputs(result: WorkflowResult, output_dir: str):
+    """
+    Write a workflow's outputs as markdown files plus a summary
+
+    Args:
+        result: Finished WorkflowResult
+        output_dir: Directory to write to (created if missing)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = result.timestamp.replace(":", "-").replace(".", "-")
+
+    if result.prd:
+        with open(f"{output_dir}/prd_{timestamp}.md", "w") as f:
+            f.write(result.prd)
+
+    if result.code_impact:
+        with open(f"{output_dir}/code_impact_{timestamp}.md", "w") as f:
+            f.write(result.code_impact)
+
+    if result.story_points:
+        with open(f"{output_dir}/story_points_{timestamp}.md", "w") as f:
+            f.write(result.story_points)
+
+    if result.design_specs:
+        with open(f"{output_dir}/design_specs_{timestamp}.md", "w") as f:
+            f.write(result.design_specs)
+
+    if result.figma_files:
+        with open(f"{output_dir}/figma_files_{timestamp}.md", "w") as f:
+            f.write(result.figma_files)
+
+    if result.analytics_plan:
+        with open(f"{output_dir}/analytics_{timestamp}.md", "w") as f:
+            f.write(result.analytics_plan)
+
+    if result.prd_validation:
+        with open(f"{output_dir}/validation_{timestamp}.md", "w") as f:
+            f.write(result.prd_validation)
+
+    if result.jira_tickets:
+        with open(f"{output_dir}/jira_{timestamp}.md", "w") as f:
+            f.write(result.jira_tickets)
+
+    if result.agent_calls:
+        export_usage_jsonl(result, f"{output_dir}/usage_{timestamp}.jsonl")
+
+    # Save summary
+    with open(f"{output_dir}/summary_{timestamp}.txt", "w") as f:
+        f.write(f"redSpec.AI Summary\n")
+        f.write(f"==================\n\n")
+        f.write(f"Run ID: {result.run_id}\n")
+        f.write(f"Product Idea: {result.product_idea}\n")
+        f.write(f"GitHub Repo: {result.github_repo}\n")
+        f.write(f"Total Story Points: {result.total_story_points}\n")
+        f.write(f"Validation Score: {result.validation_score}/100\n")
+        f.write(f"Errors: {len(result.errors)}\n")
+        if result.timed_out:
+            f.write(f"Timed out: {', '.join(result.timed_out)}\n")
+        if result.usage:
+            cost = result.usage["cost_usd"]
+            f.write(
+                f"Tokens: {result.usage['input_tokens']} in / {result.usage['output_tokens']} out"
+                f" ({result.usage['calls']} agent calls, {result.usage['cache_hits']} cached)\n"
+            )
+            f.write(f"Estimated cost: {'n/a' if cost is None else f'${cost:.4f}'}\n")
+        if result.errors:
+            f.write(f"\nErrors:\n")
+            for error in result.errors:
+                f.write(f"  - {error}\n")
 
 
 # Convenience function
@@ -670,8 +1884,39 @@ if __name__ == "__main__":
 
     if len(sys.argv) < 2:
         print("Usage: python orchestrator.py 'Your product idea' [github_repo_url]")
+        print("       python orchestrator.py batch ideas.jsonl [--output-dir DIR] [--concurrency N]")
+        print("       python orchestrator.py resume RUN_ID")
         sys.exit(1)
 
+    if sys.argv[1] == "resume" and len(sys.argv) == 3:
+        result = RedSpecOrchestrator().resume_run_sync(sys.argv[2])
+        status = "⚠️  Incomplete" if result.errors or result.timed_out else "✅ Complete!"
+        print(f"\n{status} ({len(result.errors)} errors)")
+        print(f"Story Points: {result.total_story_points}")
+        print(f"Validation Score: {result.validation_score}/100")
+        print(f"Outputs saved to: output/")
+        sys.exit(0)
+
+    if sys.argv[1] == "batch":
+        import argparse
+
+        parser = argparse.ArgumentParser(prog="orchestrator.py batch")
+        parser.add_argument("ideas", help="JSON lines file of ideas (see load_batch_items)")
+        parser.add_argument("--output-dir", default="output/batch")
+        parser.add_argument("--concurrency", type=int, default=None)
+        args = parser.parse_args(sys.argv[2:])
+
+        items = load_batch_items(args.ideas)
+        print(f"\n🚀 Running redSpec.AI for {len(items)} ideas\n")
+        results = RedSpecOrchestrator().generate_batch_sync(items, args.output_dir, args.concurrency)
+
+        usage = summarize_usage([call for result in results for call in result.agent_calls or []])
+        failed = sum(1 for result in results if result.errors)
+        print(f"\n✅ Batch complete: {len(results) - failed} ok, {failed} with errors")
+        print(f"Tokens: {usage['input_tokens']} in / {usage['output_tokens']} out ({usage['cache_hits']} shared or cached calls)")
+        print(f"Outputs saved to: {args.output_dir}/")
+        sys.exit(0)
+
     idea = sys.argv[1]
     repo = sys.argv[2] if len(sys.argv) > 2 else None
 
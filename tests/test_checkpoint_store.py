@@ -0,0 +1,81 @@
+"""Run bookkeeping and pruning in tools/checkpoint_store.py"""
+
+import time
+
+from tools.checkpoint_store import CheckpointStore
+
+
+def _store(tmp_path, **kwargs) -> CheckpointStore:
+    return CheckpointStore(db_path=str(tmp_path / "checkpoints.sqlite3"), **kwargs)
+
+
+def _age(store: CheckpointStore, run_id: str, seconds: float):
+    store._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time() - seconds, run_id))
+    store._conn.commit()
+
+
+def test_stages_round_trip(tmp_path):
+    store = _store(tmp_path)
+    store.start_run("r1", "idea", "https://github.com/o/r")
+    store.save_stage("r1", "prd", {"prd_content": "# PRD"})
+    store.save_stage("r1", "design", {"design_specs": "specs"})
+    store.discard_stage("r1", "design")
+    store.finish_run("r1", "incomplete", ["design failed"])
+
+    run = store.load_run("r1")
+    assert run["status"] == "incomplete"
+    assert run["errors"] == ["design failed"]
+    assert run["stages"] == {"prd": {"prd_content": "# PRD"}}
+    assert store.load_run("missing") is None
+
+
+def test_restarting_a_run_keeps_its_stages(tmp_path):
+    store = _store(tmp_path)
+    store.start_run("r1", "idea")
+    store.save_stage("r1", "prd", {"prd_content": "x"})
+    store.finish_run("r1", "incomplete")
+    store.start_run("r1", "idea")
+    run = store.load_run("r1")
+    assert run["status"] == "running" and set(run["stages"]) == {"prd"}
+
+
+def test_save_stage_refreshes_run(tmp_path):
+    store = _store(tmp_path)
+    store.start_run("r1", "idea")
+    _age(store, "r1", 3600)
+    before = store.load_run("r1")["updated_at"]
+    store.save_stage("r1", "prd", {})
+    assert store.load_run("r1")["updated_at"] > before
+
+
+def test_prune_drops_old_and_excess_finished_runs(tmp_path):
+    store = _store(tmp_path, max_age_seconds=100, max_runs=2)
+    for i in range(4):
+        store.start_run(f"r{i}", "idea")
+        store.finish_run(f"r{i}", "incomplete")
+        _age(store, f"r{i}", 10 - i)
+    store.start_run("old", "idea")
+    store.finish_run("old", "incomplete")
+    _age(store, "old", 1000)
+
+    store.prune()
+    assert {run["run_id"] for run in store.list_runs()} == {"r2", "r3"}
+
+
+def test_prune_never_drops_running_runs(tmp_path):
+    store = _store(tmp_path, max_age_seconds=100, max_runs=1)
+    for i in range(3):
+        store.start_run(f"running{i}", "idea")
+    _age(store, "running0", 1000)
+    store.start_run("done", "idea")
+    store.finish_run("done", "incomplete")
+
+    assert store.prune() == 0
+    assert len(store.list_runs()) == 4
+
+
+def test_disabled_store_is_a_no_op(tmp_path):
+    store = _store(tmp_path, enabled=False)
+    store.start_run("r1", "idea")
+    store.save_stage("r1", "prd", {})
+    assert store.load_run("r1") is None and store.list_runs() == [] and store.prune() == 0
@@ -0,0 +1,76 @@
+"""Trigram index in tools/code_index.py"""
+
+import os
+
+import pytest
+
+from tools.code_index import INDEX_MAGIC, TrigramIndex
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "booking.py").write_text("class BookingService:\n    def cancel(self): pass\n")
+    (root / "src" / "tracking.py").write_text("def track_bus(bus_id):\n    return LiveTracker(bus_id)\n")
+    (root / "README.md").write_text("Bus booking app\n")
+    (root / "logo.bin").write_bytes(b"\0\1\2BookingService")
+    (root / "big.txt").write_text("x" * 2000)
+    for i in range(4):
+        (root / "src" / f"util{i}.py").write_text(f"def helper_{i}(): pass\n")
+    return root
+
+
+FILES = ["src/booking.py", "src/tracking.py", "README.md", "logo.bin", "big.txt"] + [f"src/util{i}.py" for i in range(4)]
+
+
+def _index(repo, tmp_path) -> TrigramIndex:
+    return TrigramIndex(str(repo), str(tmp_path / "index"), max_file_size=1000)
+
+
+def test_candidates_are_files_containing_the_term(repo, tmp_path):
+    index = _index(repo, tmp_path)
+    stats = index.build(FILES)
+    assert stats["files_read"] == 9 and stats["files_unindexed"] == 1
+
+    # Case-insensitive; binary files never match; unindexed files always might
+    assert index.candidates("bookingservice") == ["big.txt", "src/booking.py"]
+    assert index.candidates("bus") == ["README.md", "big.txt", "src/tracking.py"]
+    assert index.candidates("nowhere to be found") == ["big.txt"]
+    assert index.candidates("ab") is None
+
+
+def test_round_trip(repo, tmp_path):
+    index = _index(repo, tmp_path)
+    index.build(FILES)
+    with open(index.index_path, "rb") as f:
+        assert f.read(4) == INDEX_MAGIC
+
+    loaded = _index(repo, tmp_path)
+    assert loaded.load()
+    assert loaded.paths == index.paths and loaded.signatures == index.signatures
+    assert loaded.unindexed == index.unindexed
+    for term in ("booking", "LiveTracker", "cancel(self)"):
+        assert loaded.candidates(term) == index.candidates(term)
+
+
+def test_rebuild_reads_only_changed_files(repo, tmp_path):
+    _index(repo, tmp_path).build(FILES)
+    (repo / "src" / "tracking.py").write_text("def eta(): return 5\n")
+    os.utime(repo / "src" / "tracking.py", ns=(1, 1))
+    os.remove(repo / "README.md")
+
+    index = _index(repo, tmp_path)
+    stats = index.build([path for path in FILES if path != "README.md"])
+    assert stats["files_read"] == 1 and stats["files_removed"] == 2
+    assert index.candidates("livetracker") == ["big.txt"]
+    assert index.candidates("eta()") == ["big.txt", "src/tracking.py"]
+
+
+def test_load_rejects_other_files(tmp_path):
+    index = _index(tmp_path, tmp_path)
+    assert not index.load()
+    os.makedirs(index.index_dir)
+    with open(index.index_path, "wb") as f:
+        f.write(b"\x80\x04pickle")
+    assert not index.load()
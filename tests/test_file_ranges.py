@@ -0,0 +1,95 @@
+"""Ranged reads in tools/file_ranges.py"""
+
+import pytest
+
+from tools.file_ranges import LineRangeError, read_bytes_range, read_range
+
+
+def _follow(data: bytes, max_bytes: int):
+    """Read data to the end through the continuation markers, like an agent would"""
+    reads = []
+    read = read_bytes_range(data, byte_start=0, max_bytes=max_bytes)
+    while True:
+        reads.append(read)
+        if read["next_byte"] is None and read["next_line"] is None:
+            return reads
+        if read["next_byte"] is not None:
+            assert read["next_byte"] > read["start_byte"]
+            read = read_bytes_range(data, byte_start=read["next_byte"], max_bytes=max_bytes)
+        else:
+            # Never points back at a line already returned
+            assert read["next_line"] > read["end_line"]
+            read = read_bytes_range(data, start_line=read["next_line"], max_bytes=max_bytes)
+
+
+@pytest.mark.parametrize("data", [
+    b"".join(b"line %d\n" % i for i in range(1, 2001)),
+    b"short\n" + b"x" * 50000 + b"\nafter\n",
+    b"a" * 10 + b"\n" + b"b" * 1500 + b"\n" + b"c" * 900 + b"\n",
+    b"no trailing newline " * 300,
+])
+def test_continuation_moves_forward_and_covers_file(data):
+    reads = _follow(data, max_bytes=1024)
+    assert b"".join(read["content"].encode() for read in reads) == data
+
+
+def test_line_cut_by_cap_is_finished():
+    data = b"x" * 100 + b"\n" + b"y" * 2000 + b"\n" + b"z\n"
+    read = read_bytes_range(data, start_line=1, max_bytes=1024)
+    assert read["content"].endswith("y\n")
+    assert read["truncated"] and read["end_line"] == 2
+    assert read["next_line"] == 3 and read["next_byte"] is None
+
+
+def test_very_long_line_continues_by_byte():
+    data = b"x" * 100000 + b"\nend\n"
+    read = read_bytes_range(data, start_line=1, max_bytes=1024)
+    assert read["end_byte"] == 1024 and read["next_byte"] == 1024
+    assert read["next_line"] == 2
+
+
+LINES = b"".join(b"line %d\n" % i for i in range(1, 101))
+
+
+def test_line_range():
+    read = read_bytes_range(LINES, start_line=10, end_line=12)
+    assert read["content"] == "line 10\nline 11\nline 12\n"
+    assert (read["start_line"], read["end_line"], read["total_lines"]) == (10, 12, 100)
+    assert not read["truncated"] and read["next_line"] == 13
+
+
+def test_around_line_is_clamped_to_file():
+    read = read_bytes_range(LINES, around_line=2, context_lines=3)
+    assert (read["start_line"], read["end_line"]) == (1, 5)
+    read = read_bytes_range(LINES, around_line=99, context_lines=3)
+    assert (read["start_line"], read["end_line"], read["next_line"]) == (96, 100, None)
+
+
+def test_line_past_end_of_file_is_an_error():
+    with pytest.raises(LineRangeError):
+        read_bytes_range(LINES, start_line=101)
+    with pytest.raises(LineRangeError):
+        read_bytes_range(LINES, around_line=500)
+
+
+def test_byte_range():
+    read = read_bytes_range(LINES, byte_start=7, byte_end=21)
+    assert read["content"] == "line 2\nline 3\n"
+    assert (read["start_line"], read["end_line"], read["next_line"]) == (2, 3, 4)
+
+
+def test_cap_cuts_at_line_end():
+    read = read_bytes_range(LINES, max_bytes=100)
+    assert read["truncated"] and read["content"].endswith("\n")
+    assert read["end_byte"] <= 100 and read["next_byte"] is None
+    assert read["next_line"] == read["end_line"] + 1
+
+
+def test_read_range_matches_in_memory_read(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(LINES)
+    for ranges in ({"start_line": 40, "end_line": 45}, {"around_line": 70}, {"byte_start": 300}, {}):
+        assert read_range(str(path), **ranges) == read_bytes_range(LINES, **ranges)
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    assert read_range(str(empty))["content"] == ""
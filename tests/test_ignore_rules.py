@@ -0,0 +1,59 @@
+"""Gitignore handling in tools/ignore_rules.py"""
+
+import pytest
+
+from tools.ignore_rules import IgnoreRules, looks_binary
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / ".git" / "info").mkdir(parents=True)
+    (tmp_path / ".git" / "info" / "exclude").write_text("secrets.txt\n")
+    (tmp_path / ".gitignore").write_text(
+        "# build output\n"
+        "*.log\n"
+        "!keep.log\n"
+        "/root_only.txt\n"
+        "docs/*.md\n"
+        "tmp/\n"
+        "**/generated/**\n"
+    )
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / ".gitignore").write_text("*.txt\n!notes.txt\n")
+    return IgnoreRules(str(tmp_path), skip_binary=True)
+
+
+@pytest.mark.parametrize("path, is_dir, ignored", [
+    ("debug.log", False, True),
+    ("app/deep/debug.log", False, True),
+    ("keep.log", False, False),
+    ("root_only.txt", False, True),
+    ("app/root_only.txt", False, True),  # by app/.gitignore's *.txt, not the anchored rule
+    ("lib/root_only.txt", False, False),
+    ("docs/guide.md", False, True),
+    ("docs/api/guide.md", False, False),
+    ("tmp", True, True),
+    ("tmp", False, False),
+    ("src/generated/api.py", False, True),
+    ("secrets.txt", False, True),
+    ("app/readme.txt", False, True),
+    ("app/notes.txt", False, False),
+    ("node_modules", True, True),
+    ("logo.png", False, True),
+    ("src/main.py", False, False),
+])
+def test_is_ignored(repo, path, is_dir, ignored):
+    assert repo.is_ignored(path, is_dir) is ignored
+
+
+def test_gitignore_can_be_turned_off(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.log\n")
+    rules = IgnoreRules(str(tmp_path), use_gitignore=False)
+    assert not rules("debug.log", False)
+    assert rules(".git", True)
+
+
+def test_looks_binary():
+    assert looks_binary(b"abc\0def")
+    assert not looks_binary(b"plain text")
+    assert not looks_binary("plain text")
@@ -0,0 +1,81 @@
+"""PRD section parsing and excerpts in tools/prd_sections.py"""
+
+import pytest
+
+from tools.prd_sections import compact_prd, parse_prd_sections, truncate_to_budget, estimate_tokens
+
+
+@pytest.mark.parametrize("heading, key", [
+    ("## 1. Objective", "objective"),
+    ("## 🚀 Objectives", "objective"),
+    ("## 6. Goals & Success Metrics", "goals_success_metrics"),
+    ("## 7. User Stories & Personas", "user_stories_personas"),
+    ("## 👥 Users & Stories", "user_stories_personas"),
+    ("## 9. Non-Functional Requirements", "non_functional_requirements"),
+    ("## 8. Functional Requirements", "functional_requirements"),
+    ("## 11. Analytics & Tracking", "analytics_tracking"),
+    ("## ⚙️ Technical Notes", "technical_considerations"),
+    ("## Tech Stack", "technical_considerations"),
+    ("## 15. Dependencies & Blockers", "dependencies_blockers"),
+    ("## 13. Open Questions & Risks", "open_questions_risks"),
+    # Keywords match whole words only
+    ("## Linux Support", "linux_support"),
+    ("## Bus Tracking", "bus_tracking"),
+    ("## Contextual Help", "contextual_help"),
+])
+def test_headings_map_to_section_keys(heading, key):
+    sections = parse_prd_sections(f"# Title\n\n{heading}\nbody\n")
+    assert list(sections) == ["title", key]
+    assert sections[key] == f"{heading}\nbody"
+
+
+def test_markers_map_to_section_keys():
+    prd = (
+        "[PRD_SECTION:title]# Live Tracking[/PRD_SECTION]\n"
+        "[PRD_SECTION:objectives]\n## 🚀 Objectives\nShip it\n[/PRD_SECTION]\n"
+        "[PRD_SECTION:design_requirements]\n## Linux Support\nGTK\n[/PRD_SECTION]\n"
+        "[PRD_SECTION:notes]\n## Release Plan\nQ3\n[/PRD_SECTION]\n"
+        "Trailing text\n"
+    )
+    sections = parse_prd_sections(prd)
+    assert sections["title"] == "# Live Tracking"
+    assert sections["objective"] == "## 🚀 Objectives\nShip it"
+    # The marker name wins over the heading inside it
+    assert sections["design_requirements"] == "## Linux Support\nGTK"
+    # An unknown marker name falls back to its heading
+    assert sections["release_plan"] == "## Release Plan\nQ3"
+    assert sections["other"] == "Trailing text"
+
+
+def test_markers_and_markdown_mix():
+    prd = "# Title\nIntro\n\n## Scope\nIn scope\n[PRD_SECTION:assumptions]\n## Assumptions\nNone\n[/PRD_SECTION]\n## Risks\nMany\n"
+    sections = parse_prd_sections(prd)
+    assert list(sections) == ["title", "scope", "assumptions", "open_questions_risks"]
+    assert sections["title"] == "# Title\nIntro"
+
+
+def test_compact_prd_fits_budget_and_names_omissions():
+    sections = {
+        "title": "# T",
+        "objective": "## Objective\n" + "o" * 400,
+        "scope": "## Scope\n" + "s" * 2000,
+        "release_plan": "## Release Plan\n" + "r" * 400,
+    }
+    text, info = compact_prd(sections, ["objective", "scope", "release_plan"], max_tokens=300)
+    assert info["sections"] == ["title", "objective", "scope"]
+    assert info["truncated"] == ["scope"] and info["omitted"] == ["release_plan"]
+    assert "Sections omitted for length: release_plan" in text
+    assert estimate_tokens(text) <= 330
+
+
+def test_compact_prd_falls_back_to_full_prd():
+    prd = "# T\n\nSome unstructured PRD text"
+    text, info = compact_prd(parse_prd_sections(prd), ["objective"], max_tokens=100, prd=prd)
+    assert info["fallback"] and text == prd
+
+
+def test_truncate_to_budget_prefers_line_end():
+    text = "\n".join("line %02d" % i for i in range(100))
+    cut = truncate_to_budget(text, 20)
+    assert cut.endswith("\n...(truncated)") and cut.split("\n")[-2].startswith("line ")
+    assert truncate_to_budget("short", 20) == "short"
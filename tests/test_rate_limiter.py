@@ -0,0 +1,88 @@
+"""Model rate limiting in tools/rate_limiter.py"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.models.llm_request import LlmRequest  # noqa: E402
+
+from tools import rate_limiter  # noqa: E402
+from tools.rate_limiter import (  # noqa: E402
+    ModelRateLimiter, RateLimitedLlm, TokenBucket, backoff_seconds, is_quota_error, parse_rate_limits
+)
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+def test_token_bucket_serves_in_order():
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    # The balance goes negative; each later caller waits one refill longer
+    assert bucket.reserve(1) == pytest.approx(1, abs=0.05)
+    assert bucket.reserve(1) == pytest.approx(2, abs=0.05)
+    bucket.adjust(-10)
+    assert bucket.tokens <= 2
+    bucket.drain()
+    assert bucket.tokens <= 0
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("gemini-2.5-flash=10/250000/4, gemini-2.5-pro=5") == {
+        "gemini-2.5-flash": {"rpm": 10, "tpm": 250000, "max_concurrent": 4},
+        "gemini-2.5-pro": {"rpm": 5},
+    }
+    with pytest.raises(ValueError):
+        parse_rate_limits("gemini=")
+
+
+def test_quota_errors_and_backoff():
+    assert is_quota_error(QuotaError())
+    assert is_quota_error(Exception("429 RESOURCE_EXHAUSTED. Quota exceeded"))
+    assert not is_quota_error(Exception("500 internal. Retry later"))
+    assert 3 <= backoff_seconds(0, Exception("Please retry in 3s")) <= 4
+    assert 0 <= backoff_seconds(10) <= rate_limiter.RATE_LIMIT_MAX_BACKOFF_SECONDS
+
+
+def test_slot_throttles_and_settles_tokens():
+    limiter = ModelRateLimiter({"m": {"rpm": 6000, "tpm": 1000, "max_concurrent": 1}})
+
+    async def run():
+        async with limiter.slot("m", 900) as usage:
+            usage["tokens"] = 100
+        async with limiter.slot("unlimited", 10 ** 9):
+            pass
+        async with limiter.slot("m", 900):
+            pass
+
+    asyncio.run(run())
+    # The first call gave back 800 of its 900 estimated tokens, so the second did not wait
+    assert limiter.stats["calls"] == 3 and limiter.stats["throttled"] == 0
+    assert limiter.limits["m"].tokens.tokens < 100
+
+
+def test_quota_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "backoff_seconds", lambda attempt, error=None: 0)
+
+    class Inner:
+        model = "m"
+        attempts = 0
+
+        async def generate_content_async(self, llm_request, stream=False):
+            Inner.attempts += 1
+            if Inner.attempts < 3:
+                raise QuotaError("429 quota")
+            yield "response"
+
+    limiter = ModelRateLimiter({"m": {"rpm": 6000}})
+    llm = RateLimitedLlm(model="m", inner=Inner(), limiter=limiter)
+
+    async def collect():
+        return [response async for response in llm.generate_content_async(LlmRequest())]
+
+    assert asyncio.run(collect()) == ["response"]
+    assert limiter.stats["retries"] == 2 and limiter.stats["quota_errors"] == 2
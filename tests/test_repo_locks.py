@@ -0,0 +1,168 @@
+"""Reader/writer locks and single-flight calls in tools/repo_locks.py"""
+
+import sys
+import time
+import threading
+import subprocess
+
+import pytest
+
+from tools.repo_locks import RepoLock, SingleFlight, repo_lock
+
+
+def _in_thread(fn) -> threading.Thread:
+    thread = threading.Thread(target=fn, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_and_block_writers(tmp_path):
+    lock = RepoLock(str(tmp_path / "locks" / "repo.lock"))
+    reading, done = threading.Event(), threading.Event()
+
+    def read():
+        with lock.read():
+            reading.set()
+            done.wait(2)
+
+    with lock.read():
+        with lock.read():  # Re-entrant
+            reader = _in_thread(read)
+            assert reading.wait(2)
+    # The other thread still holds its lease
+    assert not lock.try_write()
+    done.set()
+    reader.join(2)
+    assert lock.try_write()
+    lock.release_write()
+
+
+def test_writer_waits_for_readers(tmp_path):
+    lock = RepoLock(str(tmp_path / "repo.lock"))
+    events = []
+
+    def write():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        writer = _in_thread(write)
+        time.sleep(0.1)
+        assert events == []
+        assert not lock.try_write()
+    writer.join(2)
+    assert events == ["write"]
+    assert lock.try_write()
+    lock.release_write()
+
+
+def test_waiting_writer_keeps_new_readers_out(tmp_path):
+    lock = RepoLock(str(tmp_path / "repo.lock"))
+    events = []
+
+    def write():
+        with lock.write():
+            events.append("write")
+
+    def read():
+        with lock.read():
+            events.append("read")
+
+    with lock.read():
+        writer = _in_thread(write)
+        time.sleep(0.1)
+        reader = _in_thread(read)
+        time.sleep(0.1)
+        assert events == []
+    writer.join(2)
+    reader.join(2)
+    assert events == ["write", "read"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock only")
+def test_waiting_on_another_process_does_not_stall_the_lock(tmp_path):
+    path = tmp_path / "repo.lock"
+    holder = subprocess.Popen(
+        [sys.executable, "-c",
+         "import fcntl, os, sys\n"
+         f"fd = os.open({str(path)!r}, os.O_RDWR | os.O_CREAT)\n"
+         "fcntl.flock(fd, fcntl.LOCK_EX)\n"
+         "print('locked', flush=True)\n"
+         "sys.stdin.read()\n"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+        lock = RepoLock(str(path))
+        events = []
+
+        def read():
+            with lock.read():
+                events.append("read")
+
+        reader = _in_thread(read)
+        time.sleep(0.2)
+        assert events == []
+
+        # The blocked reader must not hold the condition while it waits
+        attempt = _in_thread(lambda: events.append(("try_write", lock.try_write())))
+        attempt.join(2)
+        assert ("try_write", False) in events
+    finally:
+        holder.stdin.close()
+        holder.wait(5)
+    reader.join(5)
+    assert "read" in events
+
+
+def test_repo_lock_is_shared_per_repository(tmp_path):
+    cache = str(tmp_path / "repos")
+    assert repo_lock(cache, "a") is repo_lock(cache, "a")
+    assert repo_lock(cache, "a") is not repo_lock(cache, "b")
+
+
+def test_single_flight_runs_once_per_key():
+    flight = SingleFlight()
+    calls, results = [], []
+    started = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "done"
+
+    leader = _in_thread(lambda: results.append(flight.do("k", work)))
+    started.wait(2)
+    followers = [_in_thread(lambda: results.append(flight.do("k", work))) for _ in range(4)]
+    for thread in [leader] + followers:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("done", False)] + [("done", True)] * 4
+    # Later calls run again
+    assert flight.do("k", lambda: "again") == ("again", False)
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError("clone failed")
+
+    def call():
+        try:
+            flight.do("k", fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = _in_thread(call)
+    started.wait(2)
+    follower = _in_thread(call)
+    leader.join(2)
+    follower.join(2)
+    assert errors == ["clone failed", "clone failed"]
@@ -0,0 +1,118 @@
+"""Stage scheduling in RedSpecOrchestrator._run_stages, with the fake LLM backend"""
+
+import sqlite3
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from orchestrator import AgentPhase, RedSpecOrchestrator, WorkflowResult, WorkflowStage  # noqa: E402
+from tools.checkpoint_store import CheckpointStore  # noqa: E402
+from tools.fake_llm import FakeLlmBackend  # noqa: E402
+from tools.response_cache import ResponseCache  # noqa: E402
+
+
+@pytest.fixture
+def orchestrator(tmp_path, monkeypatch):
+    monkeypatch.setenv("REDSPEC_RATE_LIMITS", "off")
+    return RedSpecOrchestrator(
+        response_cache=ResponseCache(db_path=str(tmp_path / "cache.sqlite3"), enabled=False),
+        workflow_timeout=0,
+        llm_backend=FakeLlmBackend(),
+        checkpoint_store=CheckpointStore(db_path=str(tmp_path / "checkpoints.sqlite3"))
+    )
+
+
+def _result() -> WorkflowResult:
+    return WorkflowResult(timestamp=datetime.now().isoformat(), product_idea="idea", github_repo=None, errors=[], timed_out=[])
+
+
+def _stage(name, log, depends_on=(), seconds=0.0, outcome=True):
+    async def run(result, progress_callback):
+        log.append(f"start {name}")
+        await asyncio.sleep(seconds)
+        log.append(f"end {name}")
+        return outcome
+    return WorkflowStage(name=name, phase=AgentPhase.CONTEXT_GATHERING, run=run, depends_on=list(depends_on))
+
+
+def test_stage_raising_outside_its_handler_fails_only_its_branch(orchestrator):
+    class BrokenStore(CheckpointStore):
+        def discard_stage(self, run_id, stage):
+            if stage == "broken":
+                raise sqlite3.OperationalError("database is locked")
+
+    orchestrator.checkpoints = BrokenStore(enabled=False)
+    log = []
+    stages = [
+        _stage("broken", log),
+        _stage("after_broken", log, depends_on=["broken"]),
+        _stage("fine", log),
+    ]
+    result = _result()
+    failed = asyncio.run(orchestrator._run_stages(stages, result, run_id="run"))
+
+    assert sorted(failed) == ["after_broken", "broken"]
+    assert "end fine" in log
+    assert result.errors == ["Stage broken error: database is locked"]
+
+
+def test_stages_run_after_their_dependencies_and_concurrently(orchestrator):
+    log = []
+    stages = [
+        _stage("prd", log, depends_on=["context", "codebase"], seconds=0.01),
+        _stage("context", log, seconds=0.05),
+        _stage("codebase", log, seconds=0.02),
+        _stage("design", log, depends_on=["prd"]),
+        _stage("jira", log, depends_on=["design", "prd"]),
+    ]
+    failed = asyncio.run(orchestrator._run_stages(stages, _result()))
+
+    assert failed == []
+    # Independent stages start together; the rest wait for everything they depend on
+    assert log[:2] == ["start context", "start codebase"]
+    assert log.index("start prd") > max(log.index("end context"), log.index("end codebase"))
+    assert log[-4:] == ["start design", "end design", "start jira", "end jira"]
+
+
+def test_failed_stage_drops_its_dependents(orchestrator):
+    log = []
+    stages = [
+        _stage("prd", log, outcome=False),
+        _stage("design", log, depends_on=["prd"]),
+        _stage("jira", log, depends_on=["design"]),
+        _stage("release_notes", log),
+    ]
+    failed = asyncio.run(orchestrator._run_stages(stages, _result()))
+    assert sorted(failed) == ["design", "jira", "prd"]
+    assert "start design" not in log and "end release_notes" in log
+
+
+def test_skipped_and_reused_stages_count_as_finished(orchestrator):
+    log = []
+    stages = [
+        _stage("context", log),
+        _stage("prd", log, depends_on=["context"]),
+        _stage("design", log, depends_on=["prd"]),
+    ]
+    stages[1].condition = lambda result: False
+    failed = asyncio.run(orchestrator._run_stages(stages, _result(), reuse={"context"}))
+    assert failed == [] and log == ["start design", "end design"]
+
+
+def test_deadline_stops_running_stages(orchestrator):
+    log = []
+    stages = [
+        _stage("fast", log, seconds=0.01),
+        _stage("slow", log, seconds=5),
+        _stage("after_slow", log, depends_on=["slow"]),
+    ]
+    result = _result()
+    failed = asyncio.run(orchestrator._run_stages(stages, result, timeout=0.2))
+
+    assert sorted(failed) == ["after_slow", "slow"]
+    assert result.timed_out == ["slow"]
+    assert "end fast" in log and "end slow" not in log
+    assert result.errors == ["Workflow timed out after 0.2s (stopped: slow; not started: after_slow)"]
@@ -0,0 +1,77 @@
+"""Symbol extraction and lookup in tools/symbol_index.py"""
+
+from tools.symbol_index import SymbolIndex, extract_symbols
+
+PYTHON = '''\
+class BookingService:
+    def cancel(self, booking_id):
+        return booking_id
+
+    async def refund(self):
+        pass
+
+
+def track_bus(bus_id):
+    return bus_id
+'''
+
+JAVA = '''\
+package com.redbus.tracking;
+
+public class TrackingService {
+    private final Client client;
+
+    public TrackingService(Client client) {
+        this.client = client;
+    }
+
+    public Location locate(String busId) {
+        if (busId == null) {
+            return null;
+        }
+        return client.fetch(busId);
+    }
+}
+'''
+
+
+def _spans(symbols):
+    return {symbol["qualified_name"]: (symbol["kind"], symbol["start_line"], symbol["end_line"]) for symbol in symbols}
+
+
+def test_python_symbols():
+    spans = _spans(extract_symbols(PYTHON, "python"))
+    assert spans["BookingService"] == ("class", 1, 6)
+    assert spans["BookingService.cancel"][0] == "method"
+    assert spans["BookingService.cancel"][1:] == (2, 3)
+    assert spans["track_bus"] == ("function", 9, 10)
+    assert extract_symbols("def broken(:\n", "python") == []
+
+
+def test_java_symbols():
+    spans = _spans(extract_symbols(JAVA, "java"))
+    assert spans["TrackingService"][1:] == (3, 16)
+    assert spans["TrackingService.locate"][1:] == (10, 15)
+
+
+def test_index_find_and_round_trip(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "src" / "booking.py").write_text(PYTHON)
+    (repo / "src" / "TrackingService.java").write_text(JAVA)
+    (repo / "README.md").write_text("# TrackingService\n")
+    files = ["src/booking.py", "src/TrackingService.java", "README.md"]
+
+    index = SymbolIndex(str(repo), str(tmp_path / "index"))
+    stats = index.build(files)
+    assert stats["files"] == 2 and stats["files_parsed"] == 2
+
+    found = index.find("trackingservice", kind="class")
+    assert [(s["file"], s["start_line"]) for s in found] == [("src/TrackingService.java", 3)]
+    assert [s["file"] for s in index.find("BookingService.cancel")] == ["src/booking.py"]
+    assert index.symbols_in_file("README.md") is None
+
+    loaded = SymbolIndex(str(repo), str(tmp_path / "index"))
+    assert loaded.load()
+    assert loaded.find("track_bus") == index.find("track_bus")
+    assert loaded.build(files)["files_reused"] == 2
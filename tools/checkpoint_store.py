@@ -0,0 +1,246 @@
+"""
+Workflow Checkpoint Store
+Persists each generate_spec stage's outputs as soon as the stage completes,
+keyed by run ID, so a failed or interrupted run can be resumed
+"""
+
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+
+# Incomplete runs are kept this long, and at most this many, for resume
+CHECKPOINT_MAX_AGE_SECONDS = 7 * 24 * 3600
+CHECKPOINT_MAX_RUNS = 100
+
+
+class CheckpointStore:
+    """
+    SQLite-backed store of workflow runs and their completed stages
+
+    A run row holds the inputs needed to restart the workflow; each
+    completed stage adds a row with the WorkflowResult fields it wrote.
+    Starting a run prunes finished runs not updated for max_age_seconds and
+    all but the max_runs most recently updated ones; runs still marked
+    running are never pruned.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        enabled: bool = True,
+        max_age_seconds: float = CHECKPOINT_MAX_AGE_SECONDS,
+        max_runs: int = CHECKPOINT_MAX_RUNS
+    ):
+        """
+        Initialize checkpoint store
+
+        Args:
+            db_path: SQLite file (default: temp directory)
+            enabled: Set False to turn the store into a no-op
+            max_age_seconds: Finished runs not updated for this long are pruned
+            max_runs: Most finished runs kept
+        """
+        if db_path is None:
+            db_path = os.path.join(tempfile.gettempdir(), "redspec_checkpoints", "checkpoints.sqlite3")
+
+        self.enabled = enabled
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._conn = None
+        if not enabled:
+            return
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                product_idea TEXT NOT NULL,
+                github_repo TEXT,
+                status TEXT NOT NULL,
+                errors TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS stages (
+                run_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (run_id, stage)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def start_run(self, run_id: str, product_idea: str, github_repo: Optional[str] = None):
+        """Record a run as running (keeps the stages of an existing run) and prune old runs"""
+        if not self.enabled:
+            return
+        self.prune(keep=run_id)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO runs (run_id, product_idea, github_repo, status, errors, created_at, updated_at)
+                VALUES (?, ?, ?, 'running', NULL, ?, ?)
+                ON CONFLICT(run_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at
+                """,
+                (run_id, product_idea, github_repo, now, now),
+            )
+            self._conn.commit()
+
+    def finish_run(self, run_id: str, status: str, errors: Optional[List[str]] = None):
+        """
+        Record how a run ended
+
+        Args:
+            run_id: Run to update
+            status: "completed" or "incomplete"
+            errors: Errors of the latest attempt
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, errors = ?, updated_at = ? WHERE run_id = ?",
+                (status, json.dumps(errors or []), time.time(), run_id),
+            )
+            self._conn.commit()
+
+    def save_stage(self, run_id: str, stage: str, outputs: Dict[str, Any]):
+        """
+        Checkpoint a completed stage
+
+        Args:
+            run_id: Run the stage belongs to
+            stage: Stage name
+            outputs: WorkflowResult fields the stage wrote (JSON-serialisable)
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stages (run_id, stage, outputs, completed_at) VALUES (?, ?, ?, ?)",
+                (run_id, stage, json.dumps(outputs, default=str), now),
+            )
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (now, run_id))
+            self._conn.commit()
+
+    def discard_stage(self, run_id: str, stage: str):
+        """Forget a stage's checkpoint, e.g. because it is being re-run"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM stages WHERE run_id = ? AND stage = ?", (run_id, stage))
+            self._conn.commit()
+
+    def load_run(self, run_id: str) -> Optional[Dict]:
+        """
+        Look up a run and its checkpointed stages
+
+        Returns:
+            Dict with run_id, product_idea, github_repo, status, errors and
+            stages (stage name -> outputs), or None for an unknown run
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT product_idea, github_repo, status, errors, created_at, updated_at FROM runs WHERE run_id = ?",
+                (run_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            stages = self._conn.execute(
+                "SELECT stage, outputs FROM stages WHERE run_id = ? ORDER BY completed_at", (run_id,)
+            ).fetchall()
+        return {
+            "run_id": run_id,
+            "product_idea": row[0],
+            "github_repo": row[1],
+            "status": row[2],
+            "errors": json.loads(row[3]) if row[3] else [],
+            "created_at": row[4],
+            "updated_at": row[5],
+            "stages": {stage: json.loads(outputs) for stage, outputs in stages},
+        }
+
+    def list_runs(self, limit: int = 20) -> List[Dict]:
+        """Most recently updated runs, with their completed stage names"""
+        if not self.enabled:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT runs.run_id, product_idea, status, updated_at, GROUP_CONCAT(stage)
+                FROM runs LEFT JOIN stages ON stages.run_id = runs.run_id
+                GROUP BY runs.run_id ORDER BY updated_at DESC LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        return [
+            {
+                "run_id": run_id,
+                "product_idea": product_idea,
+                "status": status,
+                "updated_at": updated_at,
+                "stages": stages.split(",") if stages else [],
+            }
+            for run_id, product_idea, status, updated_at, stages in rows
+        ]
+
+    def prune(self, keep: Optional[str] = None) -> int:
+        """
+        Delete finished runs past max_age_seconds and beyond the max_runs newest
+
+        Runs marked running (in progress here or in another process, or
+        interrupted before they could finish) are never deleted and do not
+        count towards max_runs.
+
+        Args:
+            keep: Run never to delete (e.g. the one being started)
+
+        Returns:
+            Number of runs deleted
+        """
+        if not self.enabled:
+            return 0
+        with self._lock:
+            stale = [
+                row[0] for row in self._conn.execute(
+                    """
+                    SELECT run_id FROM runs WHERE status != 'running' AND updated_at < ?
+                    UNION
+                    SELECT run_id FROM (
+                        SELECT run_id FROM runs WHERE status != 'running'
+                        ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (time.time() - self.max_age_seconds, self.max_runs),
+                )
+                if row[0] != keep
+            ]
+            for run_id in stale:
+                self._conn.execute("DELETE FROM stages WHERE run_id = ?", (run_id,))
+                self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+        return len(stale)
+
+    def delete_run(self, run_id: str):
+        """Drop a run and all of its checkpoints"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM stages WHERE run_id = ?", (run_id,))
+            self._conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            self._conn.commit()
@@ -0,0 +1,304 @@
+"""
+Code Search Index
+Persistent trigram index that narrows substring searches to candidate files
+"""
+
+import os
+import time
+import sys
+import json
+import struct
+import threading
+import subprocess
+from array import array
+from typing import Dict, List, Optional, Set
+
+from tools.ignore_rules import looks_binary
+
+
+INDEX_VERSION = 2
+INDEX_FILE = "trigrams.idx"
+# File layout: magic, JSON header length, JSON header, then uint32 arrays of
+# trigrams, posting lengths and concatenated file ids. Nothing in it is
+# executable, unlike a pickle, so a tampered index can't run code.
+INDEX_MAGIC = b"RSTI"
+_PREFIX = struct.Struct("<4sQ")
+
+
+def _trigrams(data: bytes) -> Set[int]:
+    """Distinct byte trigrams of data, packed into ints"""
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def _normalize(raw: bytes) -> bytes:
+    """Lower-case the way search_in_files does (decoded text, invalid bytes dropped)"""
+    return raw.decode("utf-8", errors="ignore").lower().encode("utf-8")
+
+
+def git_blob_ids(repo_path: str) -> Dict[str, str]:
+    """
+    Map tracked file paths to their git blob ids
+
+    Blob ids are content hashes, so they stay valid across re-clones where
+    every file gets a fresh mtime. Returns an empty dict outside a git repo.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, "ls-files", "-s", "-z"],
+            capture_output=True,
+            timeout=60
+        )
+    except Exception:
+        return {}
+    if result.returncode != 0:
+        return {}
+
+    blob_ids = {}
+    for entry in result.stdout.split(b"\0"):
+        if not entry:
+            continue
+        meta, _, path = entry.partition(b"\t")
+        parts = meta.split()
+        if len(parts) >= 2:
+            blob_ids[path.decode("utf-8", errors="surrogateescape")] = parts[1].decode()
+    return blob_ids
+
+
+def file_signature(repo_path: str, rel_path: str, blob_ids: Dict[str, str]) -> Optional[str]:
+    """
+    Content signature of a file: its git blob id, or size and mtime outside git
+
+    Args:
+        repo_path: Local path to the repository
+        rel_path: Relative path of the file
+        blob_ids: Result of git_blob_ids(repo_path)
+
+    Returns:
+        Signature string, or None if the file can't be stat'ed
+    """
+    blob_id = blob_ids.get(rel_path)
+    if blob_id:
+        return f"git:{blob_id}"
+    try:
+        stat = os.stat(os.path.join(repo_path, rel_path))
+    except OSError:
+        return None
+    return f"stat:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class TrigramIndex:
+    """
+    Trigram index over the files of one repository
+
+    Every indexed file contributes the set of byte trigrams of its
+    lower-cased text. A search term can only occur in files that contain
+    all of the term's trigrams, so a lookup reads just those files.
+    Files above max_file_size are not indexed and are always candidates;
+    binary files are tracked but never candidates.
+    """
+
+    def __init__(self, repo_path: str, index_dir: str, max_file_size: int = 1024 * 1024):
+        """
+        Initialize index
+
+        Args:
+            repo_path: Local path to the repository
+            index_dir: Directory the index is persisted in
+            max_file_size: Files larger than this (bytes) are not indexed
+        """
+        self.repo_path = repo_path
+        self.index_dir = index_dir
+        self.max_file_size = max_file_size
+
+        self.paths: List[Optional[str]] = []      # file id -> path (None once removed)
+        self.ids: Dict[str, int] = {}             # path -> file id
+        self.signatures: Dict[str, str] = {}      # path -> content signature
+        self.unindexed: Set[str] = set()          # files too large to index
+        self.postings: Dict[int, array] = {}      # trigram -> file ids
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.index_dir, INDEX_FILE)
+
+    def load(self) -> bool:
+        """Load the persisted index; returns False if there is none"""
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, header_size = _PREFIX.unpack(f.read(_PREFIX.size))
+                if magic != INDEX_MAGIC:
+                    return False
+                state = json.loads(f.read(header_size))
+                if state.get("version") != INDEX_VERSION:
+                    return False
+                grams, lengths, file_ids = array("I"), array("I"), array("I")
+                grams.fromfile(f, state["trigrams"])
+                lengths.fromfile(f, state["trigrams"])
+                file_ids.fromfile(f, sum(lengths))
+        except Exception:
+            return False
+        if state.get("byteorder") != sys.byteorder:
+            for values in (grams, lengths, file_ids):
+                values.byteswap()
+
+        postings, offset = {}, 0
+        for gram, length in zip(grams, lengths):
+            postings[gram] = file_ids[offset:offset + length]
+            offset += length
+
+        self.paths = state["paths"]
+        self.signatures = state["signatures"]
+        self.unindexed = set(state["unindexed"])
+        self.postings = postings
+        self.ids = {path: file_id for file_id, path in enumerate(self.paths) if path is not None}
+        return True
+
+    def save(self):
+        """Persist the index atomically"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Per-writer temp file: other workers may be saving the same index
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        grams = sorted(self.postings)
+        header = json.dumps({
+            "version": INDEX_VERSION,
+            "byteorder": sys.byteorder,
+            "paths": self.paths,
+            "signatures": self.signatures,
+            "unindexed": sorted(self.unindexed),
+            "trigrams": len(grams),
+        }, separators=(",", ":")).encode("utf-8")
+        with open(tmp_path, "wb") as f:
+            f.write(_PREFIX.pack(INDEX_MAGIC, len(header)))
+            f.write(header)
+            array("I", grams).tofile(f)
+            array("I", (len(self.postings[gram]) for gram in grams)).tofile(f)
+            for gram in grams:
+                self.postings[gram].tofile(f)
+        os.replace(tmp_path, self.index_path)
+
+    def size_bytes(self) -> int:
+        """Size of the persisted index on disk"""
+        try:
+            return os.path.getsize(self.index_path)
+        except OSError:
+            return 0
+
+    def _remove(self, rel_path: str):
+        file_id = self.ids.pop(rel_path, None)
+        if file_id is not None:
+            self.paths[file_id] = None  # postings are filtered at query time
+        self.signatures.pop(rel_path, None)
+        self.unindexed.discard(rel_path)
+
+    def _add(self, rel_path: str, signature: str):
+        full_path = os.path.join(self.repo_path, rel_path)
+        try:
+            if os.path.getsize(full_path) > self.max_file_size:
+                self.unindexed.add(rel_path)
+                self.signatures[rel_path] = signature
+                return
+            with open(full_path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return
+
+        self.signatures[rel_path] = signature
+        if looks_binary(raw):
+            return  # never a search candidate, like in search_in_files
+        data = _normalize(raw)
+
+        file_id = len(self.paths)
+        self.paths.append(rel_path)
+        self.ids[rel_path] = file_id
+
+        for gram in _trigrams(data):
+            posting = self.postings.get(gram)
+            if posting is None:
+                self.postings[gram] = array("I", (file_id,))
+            else:
+                posting.append(file_id)
+
+    def build(self, files: List[str]) -> Dict:
+        """
+        Bring the index up to date with the given file list
+
+        Unchanged files (same git blob id, or same size and mtime outside
+        git) are reused; only new and modified files are read. The index is
+        rebuilt from scratch once more than half of its file ids are stale.
+
+        Args:
+            files: Relative paths of every file that should be searchable
+
+        Returns:
+            Build statistics (files read/reused/removed, time, size)
+        """
+        start = time.time()
+        if not self.paths:
+            self.load()
+
+        blob_ids = git_blob_ids(self.repo_path)
+        wanted = {}
+        for rel_path in files:
+            signature = file_signature(self.repo_path, rel_path, blob_ids)
+            if signature:
+                wanted[rel_path] = signature
+
+        stale = [path for path, sig in self.signatures.items() if wanted.get(path) != sig]
+        dead_ids = sum(1 for path in self.paths if path is None) + len(stale)
+        if self.paths and dead_ids > len(self.paths) / 2:
+            self.paths, self.ids, self.signatures, self.unindexed, self.postings = [], {}, {}, set(), {}
+            stale = []
+
+        for rel_path in stale:
+            self._remove(rel_path)
+
+        added = 0
+        for rel_path in sorted(wanted):
+            if rel_path not in self.signatures:
+                self._add(rel_path, wanted[rel_path])
+                added += 1
+
+        self.save()
+        return {
+            "files_indexed": len(self.ids),
+            "files_unindexed": len(self.unindexed),
+            "files_read": added,
+            "files_reused": len(self.signatures) - added,
+            "files_removed": len(stale),
+            "trigrams": len(self.postings),
+            "build_seconds": round(time.time() - start, 3),
+            "size_bytes": self.size_bytes(),
+        }
+
+    def candidates(self, search_term: str) -> Optional[List[str]]:
+        """
+        Files that may contain search_term (case-insensitive substring)
+
+        Args:
+            search_term: Term to search for
+
+        Returns:
+            Sorted candidate paths, or None when the term is too short to narrow the search
+        """
+        grams = _trigrams(search_term.lower().encode("utf-8"))
+        if not grams:
+            return None
+
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                postings = []
+                break
+            postings.append(posting)
+
+        matched: Set[int] = set()
+        if postings:
+            postings.sort(key=len)
+            matched = set(postings[0])
+            for posting in postings[1:]:
+                matched.intersection_update(posting)
+                if not matched:
+                    break
+
+        paths = [self.paths[file_id] for file_id in matched if self.paths[file_id] is not None]
+        return sorted(set(paths) | self.unindexed)
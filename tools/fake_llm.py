@@ -0,0 +1,321 @@
+"""
+Fake LLM Backend
+Offline, deterministic stand-ins for the agents' models: replay recorded
+responses or synthesise sized ones with configurable latency
+
+Pass a backend to RedSpecOrchestrator(llm_backend=...) or set
+REDSPEC_LLM_BACKEND to "fake", "replay:<file>" or "record:<file>".
+Recording wraps the real models and writes every complete response to a
+JSON lines file that replay mode serves back without network access.
+"""
+
+import os
+import json
+import random
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+
+FAKE_MODEL_NAME = "fake-llm"
+DEFAULT_RESPONSE_TOKENS = 400
+STREAM_CHUNK_CHARS = 200
+CHARS_PER_TOKEN = 4
+
+# Lines the orchestrator parses out of these agents' outputs
+DEFAULT_TRAILERS = {
+    "story_points": "Total Story Points: 13",
+    "validator": "Overall Score: 85/100",
+}
+
+# Section headings of synthesised responses, so PRD compaction has something to split
+_SYNTH_HEADINGS = [
+    "Overview", "Problem Statement", "Scope", "Goals & Success Metrics", "User Stories",
+    "Functional Requirements", "Non-Functional Requirements", "Technical Considerations",
+    "Analytics & Tracking", "Release Plan", "Dependencies", "Open Questions & Risks",
+]
+_SYNTH_WORDS = (
+    "booking seat route operator payment refund traveller ticket schedule cancellation wallet "
+    "notification search filter boarding tracking api service latency cache retry rollout metric "
+    "dashboard checkout offer review rating support flow screen component validation release"
+).split()
+
+
+def _request_text(llm_request: LlmRequest) -> str:
+    """Text, function calls and function responses of a request, in order"""
+    pieces = []
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if getattr(part, "text", None):
+                pieces.append(part.text)
+            elif getattr(part, "function_call", None):
+                pieces.append(f"call:{part.function_call.name}:{json.dumps(part.function_call.args, sort_keys=True, default=str)}")
+            elif getattr(part, "function_response", None):
+                pieces.append(f"response:{part.function_response.name}")
+    return "\n".join(pieces)
+
+
+def request_key(agent_name: str, llm_request: LlmRequest) -> str:
+    """Stable key for a model request: agent plus the conversation so far"""
+    return hashlib.sha256(f"{agent_name}\0{_request_text(llm_request)}".encode()).hexdigest()[:32]
+
+
+def _tool_step(llm_request: LlmRequest) -> int:
+    """Function responses received since the latest user message"""
+    step = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if getattr(part, "function_response", None):
+                step += 1
+            elif content.role == "user" and getattr(part, "text", None):
+                step = 0
+    return step
+
+
+def _text_of(response: LlmResponse) -> str:
+    parts = response.content.parts if response.content and response.content.parts else []
+    return "".join(part.text for part in parts if getattr(part, "text", None))
+
+
+def _usage(prompt_chars: int, output_chars: int) -> types.GenerateContentResponseUsageMetadata:
+    prompt_tokens = prompt_chars // CHARS_PER_TOKEN
+    output_tokens = output_chars // CHARS_PER_TOKEN
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=output_tokens,
+        total_token_count=prompt_tokens + output_tokens
+    )
+
+
+class FakeLlm(BaseLlm):
+    """Model that answers from a FakeLlmBackend (one instance per agent)"""
+
+    model: str = FAKE_MODEL_NAME
+    agent_name: str = ""
+    backend: Any = None
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [FAKE_MODEL_NAME]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in self.backend.generate(self.agent_name, llm_request, stream):
+            yield response
+
+
+class RecordingLlm(BaseLlm):
+    """Wraps a real model and records its complete responses"""
+
+    agent_name: str = ""
+    inner: Any = None
+    backend: Any = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async for response in self.inner.generate_content_async(llm_request, stream):
+            if not response.partial:
+                self.backend.record(self.agent_name, llm_request, response)
+            yield response
+
+
+class _LlmBackend(ABC):
+    """Swaps the model of the orchestrator's agents"""
+
+    @abstractmethod
+    def model_for(self, agent_name: str, model: Any) -> BaseLlm:
+        """Model to use for an agent in place of model (its configured one)"""
+
+    def bind(self, agent_name: str, agent):
+        """Copy of agent that uses this backend's model"""
+        return agent.clone(update={"model": self.model_for(agent_name, agent.model)})
+
+
+class FakeLlmBackend(_LlmBackend):
+    """
+    Deterministic model responses without network access
+
+    With a replay file, requests are answered with the recorded response
+    for the same agent and conversation, else with that agent's recorded
+    responses in order. Anything not recorded is synthesised: markdown of
+    a configurable size, optionally preceded by scripted tool calls, so
+    agents still exercise their tools (clone, search, read) for real.
+    """
+
+    def __init__(
+        self,
+        replay_path: Optional[str] = None,
+        latency_seconds: float = 0.0,
+        ttft_seconds: Optional[float] = None,
+        response_tokens: int = DEFAULT_RESPONSE_TOKENS,
+        agent_latency: Optional[Dict[str, float]] = None,
+        agent_response_tokens: Optional[Dict[str, int]] = None,
+        tool_scripts: Optional[Dict[str, List[Tuple[str, Dict]]]] = None,
+        template_vars: Optional[Dict[str, str]] = None,
+        trailers: Optional[Dict[str, str]] = None,
+        strict: bool = False
+    ):
+        """
+        Initialize fake backend
+
+        Args:
+            replay_path: JSON lines file written by RecordingLlmBackend
+            latency_seconds: Time each model call takes
+            ttft_seconds: Time to the first streamed chunk (default: a fifth of the latency)
+            response_tokens: Size of synthesised responses
+            agent_latency: Per-agent latency overrides
+            agent_response_tokens: Per-agent response size overrides
+            tool_scripts: Agent name -> [(tool name, args)] called before answering;
+                string args are formatted with template_vars
+            template_vars: Values for tool script args, e.g. {"repo_url": ..., "repo_name": ...}
+            trailers: Agent name -> line appended to synthesised responses (default: DEFAULT_TRAILERS)
+            strict: Raise instead of synthesising when a replay has no response
+        """
+        self.latency_seconds = latency_seconds
+        self.ttft_seconds = ttft_seconds
+        self.response_tokens = response_tokens
+        self.agent_latency = agent_latency or {}
+        self.agent_response_tokens = agent_response_tokens or {}
+        self.tool_scripts = tool_scripts or {}
+        self.template_vars = template_vars or {}
+        self.trailers = DEFAULT_TRAILERS if trailers is None else trailers
+        self.strict = strict
+        self.calls = 0
+
+        self._recorded: Dict[str, List[Dict]] = {}
+        self._sequences: Dict[str, List[Dict]] = {}
+        self._served: Dict[str, int] = {}
+        if replay_path:
+            with open(replay_path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._recorded.setdefault(record["key"], []).append(record["response"])
+                        self._sequences.setdefault(record["agent"], []).append(record["response"])
+
+    def model_for(self, agent_name: str, model: Any) -> BaseLlm:
+        return FakeLlm(agent_name=agent_name, backend=self)
+
+    def _replayed(self, agent_name: str, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        key = request_key(agent_name, llm_request)
+        for pool, name in ((self._recorded.get(key), key), (self._sequences.get(agent_name), agent_name)):
+            if pool:
+                index = self._served.get(name, 0)
+                self._served[name] = index + 1
+                return LlmResponse.model_validate(pool[index % len(pool)])
+        return None
+
+    def _scripted_call(self, agent_name: str, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        tools = getattr(llm_request, "tools_dict", None) or {}
+        script = [(name, args) for name, args in self.tool_scripts.get(agent_name, []) if name in tools]
+        step = _tool_step(llm_request)
+        if step >= len(script):
+            return None
+        name, args = script[step]
+        args = {
+            key: value.format(**self.template_vars) if isinstance(value, str) else value
+            for key, value in args.items()
+        }
+        return LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+        )
+
+    def synthesize(self, agent_name: str, llm_request: LlmRequest) -> str:
+        """Deterministic markdown response of the configured size"""
+        rng = random.Random(request_key(agent_name, llm_request))
+        budget = self.agent_response_tokens.get(agent_name, self.response_tokens) * CHARS_PER_TOKEN
+        blocks = [f"# {agent_name.replace('_', ' ').title()} Output"]
+        size = len(blocks[0])
+        while size < budget:
+            heading = f"## {_SYNTH_HEADINGS[(len(blocks) - 1) % len(_SYNTH_HEADINGS)]}"
+            paragraph = " ".join(rng.choice(_SYNTH_WORDS) for _ in range(60)).capitalize() + "."
+            blocks.append(f"{heading}\n{paragraph}")
+            size += len(blocks[-1]) + 2
+        text = "\n\n".join(blocks)[:budget]
+        trailer = self.trailers.get(agent_name)
+        return f"{text}\n\n{trailer}\n" if trailer else text
+
+    async def generate(
+        self, agent_name: str, llm_request: LlmRequest, stream: bool
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Responses for one model call: streamed chunks (if stream) then the complete response"""
+        self.calls += 1
+        latency = self.agent_latency.get(agent_name, self.latency_seconds)
+        prompt_chars = len(_request_text(llm_request))
+
+        response = self._replayed(agent_name, llm_request) or self._scripted_call(agent_name, llm_request)
+        if response is None:
+            if self.strict and (self._recorded or self._sequences):
+                raise LookupError(f"No recorded response for {agent_name} ({request_key(agent_name, llm_request)})")
+            text = self.synthesize(agent_name, llm_request)
+            response = LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(text=text)]),
+                usage_metadata=_usage(prompt_chars, len(text))
+            )
+
+        text = _text_of(response)
+        if not (stream and text):
+            await asyncio.sleep(latency)
+            yield response
+            return
+
+        chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+        ttft = latency / 5 if self.ttft_seconds is None else min(self.ttft_seconds, latency)
+        await asyncio.sleep(ttft)
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep((latency - ttft) / len(chunks))
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        await asyncio.sleep((latency - ttft) / len(chunks))
+        yield response
+
+
+class RecordingLlmBackend(_LlmBackend):
+    """Runs the agents' real models and appends their responses to a replay file"""
+
+    def __init__(self, path: str):
+        """
+        Initialize recording backend
+
+        Args:
+            path: JSON lines file to append to (created if missing)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def model_for(self, agent_name: str, model: Any) -> BaseLlm:
+        inner = LLMRegistry.new_llm(model) if isinstance(model, str) else model
+        return RecordingLlm(model=inner.model, agent_name=agent_name, inner=inner, backend=self)
+
+    def record(self, agent_name: str, llm_request: LlmRequest, response: LlmResponse):
+        record = {
+            "agent": agent_name,
+            "key": request_key(agent_name, llm_request),
+            "response": response.model_dump(mode="json", exclude_none=True),
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+def llm_backend_from_env() -> Optional[_LlmBackend]:
+    """Backend selected by REDSPEC_LLM_BACKEND ("fake", "replay:<file>", "record:<file>"), if any"""
+    setting = os.getenv("REDSPEC_LLM_BACKEND", "").strip()
+    if not setting:
+        return None
+    mode, _, path = setting.partition(":")
+    if mode == "fake":
+        return FakeLlmBackend()
+    if mode == "replay" and path:
+        return FakeLlmBackend(replay_path=path)
+    if mode == "record" and path:
+        return RecordingLlmBackend(path)
+    raise ValueError(f"Invalid REDSPEC_LLM_BACKEND: {setting!r} (expected fake, replay:<file> or record:<file>)")
@@ -0,0 +1,245 @@
+"""
+Ranged File Reads
+Line and byte ranges of repository files read through mmap, with a cached
+line-offset table per file and a hard size cap
+"""
+
+import os
+import re
+import mmap
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+# Most bytes a single read returns; longer ranges are cut with a marker
+READ_MAX_BYTES = 64 * 1024
+# A line cut by the size cap is still finished if it ends within this many more bytes
+LINE_EXTENSION_BYTES = 4 * 1024
+# Lines shown on each side of around_line
+DEFAULT_CONTEXT_LINES = 30
+# Files whose line-offset tables are kept in memory
+LINE_OFFSET_CACHE_SIZE = 256
+
+_NEWLINE = re.compile(b"\n")
+
+
+class LineRangeError(ValueError):
+    """A requested line lies past the end of the file"""
+
+
+def line_offsets(buffer) -> array:
+    """
+    Byte offset at which each line starts
+
+    Args:
+        buffer: bytes or mmap of a file
+
+    Returns:
+        array of offsets; its length is the number of lines
+    """
+    offsets = array("Q", [0])
+    offsets.extend(match.end() for match in _NEWLINE.finditer(buffer))
+    if len(offsets) > 1 and offsets[-1] == len(buffer):
+        offsets.pop()  # Trailing newline does not start another line
+    return offsets
+
+
+class LineOffsetCache:
+    """LRU of line-offset tables, keyed by path and invalidated by mtime and size"""
+
+    def __init__(self, max_entries: int = LINE_OFFSET_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], array]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str, stat: os.stat_result, buffer) -> array:
+        """Offsets of path, computed from buffer unless cached for this version of the file"""
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(path)
+                return entry[1]
+
+        offsets = line_offsets(buffer)
+        with self._lock:
+            self._entries[path] = (version, offsets)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return offsets
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_offset_cache = LineOffsetCache()
+
+
+def _line_span(
+    total_lines: int,
+    start_line: Optional[int],
+    end_line: Optional[int],
+    around_line: Optional[int],
+    context_lines: int
+) -> Tuple[int, int]:
+    """
+    1-based inclusive line span for the requested range, clamped to the file
+
+    Raises:
+        LineRangeError: If start_line or around_line is past the last line
+    """
+    requested = around_line or start_line
+    if requested and requested > max(total_lines, 1):
+        name = "around_line" if around_line else "start_line"
+        raise LineRangeError(f"{name} {requested} beyond end of file ({total_lines} lines)")
+    if around_line:
+        start_line = around_line - context_lines
+        end_line = around_line + context_lines
+    first = min(max(start_line or 1, 1), max(total_lines, 1))
+    last = min(end_line or total_lines, total_lines)
+    return first, max(last, first)
+
+
+def _read(
+    buffer,
+    get_offsets,
+    start_line: Optional[int],
+    end_line: Optional[int],
+    around_line: Optional[int],
+    context_lines: int,
+    byte_start: Optional[int],
+    byte_end: Optional[int],
+    max_bytes: int
+) -> Dict:
+    size = len(buffer)
+    by_lines = bool(start_line or end_line or around_line)
+    offsets = None
+
+    if by_lines:
+        offsets = get_offsets()
+        first, last = _line_span(len(offsets), start_line, end_line, around_line, context_lines)
+        begin = offsets[first - 1] if offsets else 0
+        end = offsets[last] if last < len(offsets) else size
+    else:
+        begin = min(max(byte_start or 0, 0), size)
+        end = min(byte_end, size) if byte_end is not None else size
+        end = max(end, begin)
+    range_end = end
+
+    if end - begin > max_bytes:
+        # Prefer ending on a whole line: the last one that fits, else the one the cap falls in
+        limit = begin + max_bytes
+        cut = buffer.rfind(b"\n", begin, limit)
+        if cut < begin + max_bytes // 2:
+            cut = buffer.find(b"\n", limit, min(limit + LINE_EXTENSION_BYTES, end))
+            if cut < 0 and end - limit > LINE_EXTENSION_BYTES:
+                cut = limit - 1  # Very long line: stop inside it
+        if cut >= 0:
+            end = min(cut + 1, end)
+    truncated = end < range_end
+
+    chunk = buffer[begin:end]
+    if offsets is None and (truncated or byte_start or byte_end is not None):
+        offsets = get_offsets()
+
+    if offsets is not None:
+        first = bisect_right(offsets, begin)
+        last = bisect_right(offsets, end - 1) if end > begin else first
+        total_lines = len(offsets)
+    else:
+        first, total_lines = 1, chunk.count(b"\n") + (1 if chunk and not chunk.endswith(b"\n") else 0)
+        last = total_lines
+
+    # Continue from the first line starting after the content, or mid-line by byte
+    next_line = next_byte = None
+    if end < size:
+        following = bisect_left(offsets, end)
+        next_line = following + 1 if following < len(offsets) else None
+        if not chunk.endswith(b"\n"):
+            next_byte = end
+
+    return {
+        "content": chunk.decode("utf-8", errors="ignore"),
+        "start_line": first,
+        "end_line": last,
+        "total_lines": total_lines,
+        "start_byte": begin,
+        "end_byte": end,
+        "size_bytes": size,
+        "truncated": truncated,
+        "next_line": next_line,
+        "next_byte": next_byte,
+    }
+
+
+def read_range(
+    path: str,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    around_line: Optional[int] = None,
+    context_lines: int = DEFAULT_CONTEXT_LINES,
+    byte_start: Optional[int] = None,
+    byte_end: Optional[int] = None,
+    max_bytes: int = READ_MAX_BYTES
+) -> Dict:
+    """
+    Read part of a file without loading the rest
+
+    Give a line range (start_line/end_line, 1-based and inclusive), a line
+    with context (around_line), or a byte range (byte_start/byte_end);
+    nothing reads from the start of the file. At most max_bytes are
+    returned either way, cut at a line end where possible: a line the cap
+    falls in is finished if it ends within LINE_EXTENSION_BYTES, and only
+    longer lines are cut inside (continue those with next_byte).
+
+    Args:
+        path: File to read
+        start_line: First line (default: 1)
+        end_line: Last line (default: last line of the file)
+        around_line: Centre line; reads context_lines on each side
+        context_lines: Lines of context for around_line
+        byte_start: First byte (line ranges take precedence)
+        byte_end: Byte after the last one
+        max_bytes: Size cap
+
+    Returns:
+        Dict with content, start_line, end_line, total_lines, start_byte,
+        end_byte, size_bytes, truncated, next_line (first line starting
+        after the content, or None) and next_byte (first byte not returned
+        when the content ends inside a line, else None)
+
+    Raises:
+        LineRangeError: If start_line or around_line is past the last line
+    """
+    stat = os.stat(path)
+    if stat.st_size == 0:
+        return _read(b"", lambda: array("Q", [0]), start_line, end_line, around_line,
+                     context_lines, byte_start, byte_end, max_bytes)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return _read(
+            buffer, lambda: _offset_cache.get(path, stat, buffer), start_line, end_line,
+            around_line, context_lines, byte_start, byte_end, max_bytes
+        )
+
+
+def read_bytes_range(
+    data: bytes,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    around_line: Optional[int] = None,
+    context_lines: int = DEFAULT_CONTEXT_LINES,
+    byte_start: Optional[int] = None,
+    byte_end: Optional[int] = None,
+    max_bytes: int = READ_MAX_BYTES
+) -> Dict:
+    """read_range for content already in memory (e.g. a blob from git show)"""
+    return _read(
+        data, lambda: line_offsets(data), start_line, end_line, around_line,
+        context_lines, byte_start, byte_end, max_bytes
+    )
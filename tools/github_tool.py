@@ -9,66 +9,291 @@ import shutil
 from pathlib import Path
 from typing import Dict, List, Optional
 import subprocess
+import re
 import json
+import math
+import hashlib
+import threading
+from fnmatch import fnmatch
+from contextlib import nullcontext
+
+from tools.code_index import TrigramIndex
+from tools.symbol_index import SymbolIndex
+from tools.repo_scanner import RepoScanner, scan_workers as _scan_workers
+from tools.ignore_rules import IgnoreRules, looks_binary
+from tools.file_ranges import read_range, read_bytes_range, LineRangeError, READ_MAX_BYTES, DEFAULT_CONTEXT_LINES
+from tools.repo_cache import RepoCacheManager
+from tools.repo_locks import SingleFlight, repo_lock
+from tools import tracing
+
+
+GIT_TIMEOUT_SECONDS = 120
+
+# search_codebase result shaping
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_MATCHES_PER_FILE = 5
+SEARCH_MAX_LINE_CHARS = 200
+
+# read_code_files bundle limits
+READ_FILES_MAX_FILES = 20
+READ_FILES_MAX_BYTES_PER_FILE = 16 * 1024
+READ_FILES_MAX_TOTAL_BYTES = 128 * 1024
+
+# Paths that rarely hold the implementation an agent is looking for
+LOW_SIGNAL_PATH_PARTS = ("test", "tests", "__tests__", "spec", "docs", "dist", "build", "vendor", "generated")
+LOW_SIGNAL_SUFFIXES = (".lock", ".patch", ".diff", ".min.js", ".map", ".snap", ".svg", ".json", ".md")
+
+
+def default_cache_dir() -> str:
+    """Where repositories are cloned unless GitHubTool is given a cache_dir ($REDSPEC_REPO_CACHE_DIR or temp directory)"""
+    return os.environ.get("REDSPEC_REPO_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "redspec_repos")
+
+
+def repo_name_from_url(repo_url: str) -> str:
+    """Name a repository is cached under, e.g. "repo" for https://github.com/owner/repo.git"""
+    return repo_url.rstrip('/').split('/')[-1].replace('.git', '')
+
+
+def _env_globs(name: str) -> Optional[List[str]]:
+    """Comma-separated glob list from an environment variable"""
+    value = os.environ.get(name, "")
+    globs = [glob.strip() for glob in value.split(",") if glob.strip()]
+    return globs or None
 
 
 class GitHubTool:
     """Tool for fetching and analyzing GitHub repositories"""
 
-    def __init__(self, cache_dir: str = None):
+    def __init__(
+        self,
+        cache_dir: str = None,
+        blob_filter: Optional[str] = None,
+        sparse_include: Optional[List[str]] = None,
+        sparse_exclude: Optional[List[str]] = None,
+        scan_workers: Optional[int] = None,
+        skip_dirs: Optional[List[str]] = None
+    ):
         """
         Initialize GitHub tool
 
         Args:
             cache_dir: Directory to cache cloned repos (default: temp directory)
+            blob_filter: Partial clone filter, e.g. "blob:none" or "blob:limit=1m" (default: $REDSPEC_CLONE_FILTER)
+            sparse_include: Globs to check out (default: $REDSPEC_SPARSE_INCLUDE, everything if unset)
+            sparse_exclude: Globs to leave out of the checkout (default: $REDSPEC_SPARSE_EXCLUDE)
+            scan_workers: Threads used to walk and search repositories (default: $REDSPEC_SCAN_WORKERS or cores + 4)
+            skip_dirs: Directory names never walked (default: $REDSPEC_SKIP_DIRS or ignore_rules.DEFAULT_SKIP_DIRS)
         """
-        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "redspec_repos")
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.blob_filter = blob_filter or os.environ.get("REDSPEC_CLONE_FILTER") or None
+        self.sparse_include = sparse_include or _env_globs("REDSPEC_SPARSE_INCLUDE")
+        self.sparse_exclude = sparse_exclude or _env_globs("REDSPEC_SPARSE_EXCLUDE")
+        self.index_dir = self.cache_dir.rstrip(os.sep) + "_index"
+        self.mirror_dir = self.cache_dir.rstrip(os.sep) + "_mirrors"
+        self.scan_workers = _scan_workers(scan_workers)
+        self.skip_dirs = skip_dirs or _env_globs("REDSPEC_SKIP_DIRS")
         os.makedirs(self.cache_dir, exist_ok=True)
 
-    def clone_repository(self, repo_url: str, branch: str = "main") -> Dict:
+    def _scanner(self, local_path: str, skip_binary: bool = True) -> RepoScanner:
+        """Scanner for a checkout that honours its .gitignore files and the skip list"""
+        ignore = IgnoreRules(local_path, skip_dirs=self.skip_dirs, skip_binary=skip_binary)
+        return RepoScanner(self.scan_workers, ignore=ignore)
+
+    def _git(self, args: List[str], cwd: str = None, timeout: int = GIT_TIMEOUT_SECONDS) -> subprocess.CompletedProcess:
+        """Run a git command and capture its output"""
+        return subprocess.run(
+            ['git'] + args,
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+
+    def _mirror_path(self, repo_url: str, repo_name: str) -> str:
+        """Bare mirror location for a repository URL"""
+        url_hash = hashlib.sha1(repo_url.rstrip('/').encode()).hexdigest()[:10]
+        return os.path.join(self.mirror_dir, f"{repo_name}-{url_hash}.git")
+
+    def _resolve_remote_ref(self, repo_url: str, branch: str) -> Optional[Dict]:
         """
-        Clone a GitHub repository
+        Look up a branch (or tag) on the remote with a single ls-remote
 
-        Args:
-            repo_url: GitHub repository URL
-            branch: Branch to clone (default: main)
+        Falls back to master when main is requested but doesn't exist, without
+        a second network round trip.
 
         Returns:
-            Dictionary with repo info and local path
+            {"branch", "ref", "sha"} or None if nothing matched
         """
-        try:
-            # Extract repo name from URL
-            repo_name = repo_url.rstrip('/').split('/')[-1].replace('.git', '')
-            local_path = os.path.join(self.cache_dir, repo_name)
+        candidates = [branch, "master"] if branch == "main" else [branch]
+        patterns = []
+        for name in candidates:
+            patterns += [f"refs/heads/{name}", f"refs/tags/{name}", f"refs/tags/{name}^{{}}"]
+
+        result = self._git(['ls-remote', repo_url] + patterns)
+        if result.returncode != 0:
+            raise Exception(f"Git ls-remote failed: {result.stderr}")
+
+        refs = {}
+        for line in result.stdout.splitlines():
+            sha, _, ref = line.partition('\t')
+            refs[ref] = sha
+
+        for name in candidates:
+            if f"refs/heads/{name}" in refs:
+                return {"branch": name, "ref": f"refs/heads/{name}", "sha": refs[f"refs/heads/{name}"]}
+            if f"refs/tags/{name}" in refs:
+                # Annotated tags advertise the peeled commit separately
+                sha = refs.get(f"refs/tags/{name}^{{}}", refs[f"refs/tags/{name}"])
+                return {"branch": name, "ref": f"refs/tags/{name}", "sha": sha}
+        return None
+
+    def _worktree_head(self, local_path: str, mirror_path: str) -> Optional[str]:
+        """HEAD of local_path if it is a worktree of mirror_path, else None"""
+        if not os.path.isfile(os.path.join(local_path, '.git')):
+            return None
+        common_dir = self._git(['rev-parse', '--git-common-dir'], cwd=local_path)
+        if common_dir.returncode != 0:
+            return None
+        if os.path.realpath(os.path.join(local_path, common_dir.stdout.strip())) != os.path.realpath(mirror_path):
+            return None
+        head = self._git(['rev-parse', 'HEAD'], cwd=local_path)
+        return head.stdout.strip() if head.returncode == 0 else None
 
-            # Remove if exists
-            if os.path.exists(local_path):
-                shutil.rmtree(local_path)
+    def _sparse_patterns(self, include: Optional[List[str]], exclude: Optional[List[str]]) -> Optional[List[str]]:
+        """Non-cone sparse-checkout patterns for include/exclude globs, or None for a full checkout"""
+        if not include and not exclude:
+            return None
+        return list(include or ['/*']) + [f"!{glob}" for glob in (exclude or [])]
+
+    def _apply_sparse_checkout(self, local_path: str, patterns: Optional[List[str]]):
+        """Make the worktree's sparse-checkout patterns match (None disables sparse checkout)"""
+        current = self._git(['sparse-checkout', 'list'], cwd=local_path)
+        current_patterns = current.stdout.splitlines() if current.returncode == 0 else None
+        if current_patterns == patterns:
+            return
+
+        if patterns is None:
+            result = self._git(['sparse-checkout', 'disable'], cwd=local_path)
+        else:
+            result = self._git(['sparse-checkout', 'set', '--no-cone'] + patterns, cwd=local_path)
+        if result.returncode != 0:
+            raise Exception(f"Git sparse-checkout failed: {result.stderr}")
+
+    def clone_repository(
+        self,
+        repo_url: str,
+        branch: str = "main",
+        blob_filter: Optional[str] = None,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Clone or refresh a GitHub repository
 
-            # Clone the repository
-            print(f"📥 Cloning repository: {repo_url}")
-            result = subprocess.run(
-                ['git', 'clone', '--depth', '1', '--branch', branch, repo_url, local_path],
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
+        Each repository URL gets a bare mirror; only the requested branch is
+        fetched (shallow) and the working tree is a git worktree of the
+        mirror. If the remote branch still points at the commit that is
+        checked out, nothing is fetched or rewritten.
 
-            if result.returncode != 0:
-                # Try with master branch if main fails
-                if branch == "main":
-                    return self.clone_repository(repo_url, branch="master")
-                raise Exception(f"Git clone failed: {result.stderr}")
+        With a blob filter the mirror is a partial clone: file contents are
+        downloaded only when checked out or read. Combined with
+        include/exclude globs (sparse checkout), only the matching files are
+        ever downloaded or written to disk; read_file fetches any other file
+        on demand.
 
-            print(f"✅ Repository cloned to: {local_path}")
+        Args:
+            repo_url: GitHub repository URL
+            branch: Branch to clone (default: main, falling back to master)
+            blob_filter: Partial clone filter (default: the tool's blob_filter)
+            include: Globs to check out (default: the tool's sparse_include)
+            exclude: Globs to leave out (default: the tool's sparse_exclude)
 
-            return {
-                "success": True,
-                "repo_name": repo_name,
-                "local_path": local_path,
-                "repo_url": repo_url,
-                "branch": branch
-            }
+        Returns:
+            Dictionary with repo info and local path
+        """
+        try:
+            repo_name = repo_name_from_url(repo_url)
+            local_path = os.path.join(self.cache_dir, repo_name)
+            mirror_path = self._mirror_path(repo_url, repo_name)
+            blob_filter = blob_filter or self.blob_filter
+            sparse_patterns = self._sparse_patterns(include or self.sparse_include, exclude or self.sparse_exclude)
+
+            remote = self._resolve_remote_ref(repo_url, branch)
+            if remote is None:
+                raise Exception(f"Git clone failed: remote branch {branch} not found in {repo_url}")
+
+            # Readers of the checkout finish first; other refreshes of it wait,
+            # in this process and in other workers sharing the cache
+            with repo_lock(self.cache_dir, repo_name).write():
+                head = self._worktree_head(local_path, mirror_path)
+                if head == remote["sha"]:
+                    self._apply_sparse_checkout(local_path, sparse_patterns)
+                    print(f"✅ Repository up to date: {local_path}")
+                    return {
+                        "success": True,
+                        "repo_name": repo_name,
+                        "local_path": local_path,
+                        "repo_url": repo_url,
+                        "branch": remote["branch"],
+                        "commit": head,
+                        "updated": False
+                    }
+
+                if not os.path.isdir(mirror_path):
+                    print(f"📥 Creating mirror for: {repo_url}")
+                    os.makedirs(self.mirror_dir, exist_ok=True)
+                    result = self._git(['init', '--bare', '--quiet', mirror_path])
+                    if result.returncode != 0:
+                        raise Exception(f"Git init failed: {result.stderr}")
+
+                # A named remote lets a partial clone fetch missing blobs lazily
+                if self._git(['config', 'remote.origin.url'], cwd=mirror_path).stdout.strip() != repo_url:
+                    self._git(['remote', 'remove', 'origin'], cwd=mirror_path)
+                    self._git(['remote', 'add', 'origin', repo_url], cwd=mirror_path)
+
+                # Fetch only the requested branch
+                print(f"📥 Fetching {remote['ref']} from: {repo_url}")
+                filter_args = ['--filter', blob_filter] if blob_filter else []
+                result = self._git(
+                    ['fetch', '--depth', '1', '--no-tags'] + filter_args + ['origin', f"+{remote['ref']}:{remote['ref']}"],
+                    cwd=mirror_path
+                )
+                if result.returncode != 0:
+                    raise Exception(f"Git fetch failed: {result.stderr}")
+
+                if head is None:
+                    # Missing, or a plain checkout from before mirrors existed
+                    if os.path.exists(local_path):
+                        shutil.rmtree(local_path)
+                    self._git(['worktree', 'prune'], cwd=mirror_path)
+                    result = self._git(
+                        ['worktree', 'add', '--no-checkout', '--detach', '--force', local_path, remote['sha']],
+                        cwd=mirror_path
+                    )
+                    if result.returncode != 0:
+                        raise Exception(f"Git worktree failed: {result.stderr}")
+
+                # Sparse patterns go in first so checkout only downloads what it writes;
+                # on an existing worktree only files that changed are rewritten
+                self._apply_sparse_checkout(local_path, sparse_patterns)
+                result = self._git(['checkout', '--detach', '--force', remote['sha']], cwd=local_path)
+                if result.returncode != 0:
+                    raise Exception(f"Git checkout failed: {result.stderr}")
+                self._git(['clean', '-fdx', '--quiet'], cwd=local_path)
+
+                print(f"✅ Repository ready at: {local_path}")
+
+                return {
+                    "success": True,
+                    "repo_name": repo_name,
+                    "local_path": local_path,
+                    "repo_url": repo_url,
+                    "branch": remote["branch"],
+                    "commit": remote["sha"],
+                    "updated": True,
+                    "partial": bool(blob_filter),
+                    "sparse_patterns": sparse_patterns
+                }
 
         except Exception as e:
             return {
@@ -97,44 +322,31 @@ class GitHubTool:
                 "files": []
             }
 
-            # Walk through directory
-            for root, dirs, files in os.walk(local_path):
-                # Skip .git directory
-                if '.git' in root:
-                    continue
-
-                # Skip node_modules, __pycache__, etc.
-                if any(skip in root for skip in ['node_modules', '__pycache__', '.next', 'build', 'dist']):
-                    continue
-
-                rel_root = os.path.relpath(root, local_path)
-                if rel_root != '.':
-                    file_index["directories"].append(rel_root)
+            # Binary files still count towards the repository stats
+            scan = self._scanner(local_path, skip_binary=False).scan(local_path, with_sizes=True)
+            file_index["directories"] = scan.directories
 
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, local_path)
+            for rel_path in scan.files:
+                file = os.path.basename(rel_path)
 
-                    # Get file extension
-                    ext = Path(file).suffix or 'no_extension'
+                # Get file extension
+                ext = Path(file).suffix or 'no_extension'
 
-                    # Count by type
-                    if ext not in file_index["files_by_type"]:
-                        file_index["files_by_type"][ext] = 0
-                    file_index["files_by_type"][ext] += 1
+                # Count by type
+                if ext not in file_index["files_by_type"]:
+                    file_index["files_by_type"][ext] = 0
+                file_index["files_by_type"][ext] += 1
 
-                    # Add to files list
-                    try:
-                        size = os.path.getsize(file_path)
-                        file_index["files"].append({
-                            "path": rel_path,
-                            "name": file,
-                            "extension": ext,
-                            "size": size
-                        })
-                        file_index["total_files"] += 1
-                    except:
-                        pass
+                # Add to files list
+                size = scan.sizes.get(rel_path)
+                if size is not None:
+                    file_index["files"].append({
+                        "path": rel_path,
+                        "name": file,
+                        "extension": ext,
+                        "size": size
+                    })
+                    file_index["total_files"] += 1
 
             print(f"✅ Indexed {file_index['total_files']} files")
 
@@ -160,21 +372,10 @@ class GitHubTool:
         Returns:
             List of matching file paths
         """
-        from fnmatch import fnmatch
-
-        matching_files = []
-
-        for root, dirs, files in os.walk(local_path):
-            if '.git' in root or 'node_modules' in root:
-                continue
-
-            for file in files:
-                if fnmatch(file, pattern):
-                    file_path = os.path.join(root, file)
-                    rel_path = os.path.relpath(file_path, local_path)
-                    matching_files.append(rel_path)
-
-        return matching_files
+        return [
+            rel_path for rel_path in self._scanner(local_path, skip_binary=False).scan(local_path).files
+            if fnmatch(os.path.basename(rel_path), pattern)
+        ]
 
     def read_file(self, local_path: str, file_path: str) -> Optional[str]:
         """
@@ -189,13 +390,175 @@ class GitHubTool:
         """
         try:
             full_path = os.path.join(local_path, file_path)
+            if not os.path.exists(full_path):
+                # Outside the sparse checkout: read from git, fetching the blob if needed
+                result = subprocess.run(
+                    ['git', 'show', f"HEAD:{file_path}"],
+                    cwd=local_path,
+                    capture_output=True,
+                    timeout=GIT_TIMEOUT_SECONDS
+                )
+                if result.returncode == 0:
+                    return result.stdout.decode('utf-8', errors='ignore')
             with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
                 return f.read()
         except Exception as e:
             print(f"❌ Error reading file {file_path}: {e}")
             return None
 
-    def search_in_files(self, local_path: str, search_term: str, file_pattern: str = "*") -> List[Dict]:
+    def read_file_range(
+        self,
+        local_path: str,
+        file_path: str,
+        start_line: Optional[int] = None,
+        end_line: Optional[int] = None,
+        around_line: Optional[int] = None,
+        context_lines: int = DEFAULT_CONTEXT_LINES,
+        byte_start: Optional[int] = None,
+        byte_end: Optional[int] = None,
+        max_bytes: int = READ_MAX_BYTES
+    ) -> Optional[Dict]:
+        """
+        Read part of a file from the repository (see file_ranges.read_range)
+
+        Checked-out files are memory-mapped, so only the requested range is
+        read; files outside the sparse checkout come from git show.
+
+        Args:
+            local_path: Local path to the repository
+            file_path: Relative path to the file
+            start_line: First line, 1-based (default: 1)
+            end_line: Last line, inclusive (default: end of file)
+            around_line: Read context_lines on each side of this line instead
+            context_lines: Lines of context for around_line
+            byte_start: First byte of a byte range
+            byte_end: Byte after the last one
+            max_bytes: Size cap; longer ranges are cut and marked truncated
+
+        Returns:
+            Range dict with content and line/byte positions, or None if error
+
+        Raises:
+            LineRangeError: If start_line or around_line is past the end of the file
+        """
+        ranges = dict(
+            start_line=start_line, end_line=end_line, around_line=around_line, context_lines=context_lines,
+            byte_start=byte_start, byte_end=byte_end, max_bytes=max_bytes
+        )
+        try:
+            full_path = os.path.join(local_path, file_path)
+            if os.path.isfile(full_path):
+                return read_range(full_path, **ranges)
+
+            # Outside the sparse checkout: read from git, fetching the blob if needed
+            result = subprocess.run(
+                ['git', 'show', f"HEAD:{file_path}"],
+                cwd=local_path,
+                capture_output=True,
+                timeout=GIT_TIMEOUT_SECONDS
+            )
+            if result.returncode != 0:
+                print(f"❌ Error reading file {file_path}: not found")
+                return None
+            return read_bytes_range(result.stdout, **ranges)
+        except LineRangeError:
+            raise
+        except Exception as e:
+            print(f"❌ Error reading file {file_path}: {e}")
+            return None
+
+    def read_files(self, local_path: str, file_paths: List[str], max_bytes_per_file: int = READ_MAX_BYTES) -> List[Optional[Dict]]:
+        """
+        Read the start of several files concurrently
+
+        Args:
+            local_path: Local path to the repository
+            file_paths: Relative paths to the files
+            max_bytes_per_file: Size cap per file
+
+        Returns:
+            read_file_range results in the order of file_paths (None for files that could not be read)
+        """
+        return RepoScanner(self.scan_workers).map(
+            lambda file_path: self.read_file_range(local_path, file_path, max_bytes=max_bytes_per_file),
+            file_paths
+        )
+
+    def list_searchable_files(self, local_path: str) -> List[str]:
+        """
+        List the files search_in_files looks at
+
+        Args:
+            local_path: Local path to the repository
+
+        Returns:
+            Relative file paths
+        """
+        return self._scanner(local_path).scan(local_path).files
+
+    def get_search_index(self, local_path: str) -> TrigramIndex:
+        """Search index handle for a cloned repository (not loaded)"""
+        repo_name = os.path.basename(local_path.rstrip(os.sep))
+        return TrigramIndex(local_path, os.path.join(self.index_dir, repo_name))
+
+    def build_search_index(self, local_path: str, files: Optional[List[str]] = None) -> Dict:
+        """
+        Build or incrementally update the trigram search index of a repository
+
+        Args:
+            local_path: Local path to the cloned repo
+            files: Files to index (default: list_searchable_files)
+
+        Returns:
+            Dictionary with index build statistics (time, size, files read/reused)
+        """
+        try:
+            print(f"🔎 Building search index: {local_path}")
+            files = self.list_searchable_files(local_path) if files is None else files
+            stats = self.get_search_index(local_path).build(files)
+            print(f"✅ Search index ready in {stats['build_seconds']}s ({stats['size_bytes']} bytes)")
+            return {"success": True, **stats}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def get_symbol_index(self, local_path: str) -> SymbolIndex:
+        """Symbol index handle for a cloned repository (not loaded)"""
+        repo_name = os.path.basename(local_path.rstrip(os.sep))
+        return SymbolIndex(local_path, os.path.join(self.index_dir, repo_name))
+
+    def build_symbol_index(self, local_path: str, files: Optional[List[str]] = None) -> Dict:
+        """
+        Build or incrementally update the symbol index of a repository
+
+        Args:
+            local_path: Local path to the cloned repo
+            files: Files to index (default: list_searchable_files)
+
+        Returns:
+            Dictionary with symbol index statistics
+        """
+        try:
+            print(f"🏷️  Building symbol index: {local_path}")
+            files = self.list_searchable_files(local_path) if files is None else files
+            stats = self.get_symbol_index(local_path).build(files)
+            print(f"✅ Indexed {stats['symbols']} symbols in {stats['build_seconds']}s")
+            return {"success": True, **stats}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def search_in_files(
+        self,
+        local_path: str,
+        search_term: str,
+        file_pattern: str = "*",
+        candidate_files: Optional[List[str]] = None
+    ) -> List[Dict]:
         """
         Search for a term in files
 
@@ -203,38 +566,101 @@ class GitHubTool:
             local_path: Local path to the repository
             search_term: Term to search for
             file_pattern: File pattern to search in (default: all files)
+            candidate_files: Only read these files (e.g. from the search index); default walks the whole repo
 
         Returns:
             List of matches with file path and line numbers
         """
-        matches = []
+        needle = search_term.lower()
 
-        for root, dirs, files in os.walk(local_path):
-            if '.git' in root or 'node_modules' in root:
-                continue
+        if candidate_files is None:
+            candidate_files = self.list_searchable_files(local_path)
 
-            for file in files:
-                from fnmatch import fnmatch
-                if not fnmatch(file, file_pattern):
-                    continue
+        def search_file(rel_path: str) -> List[Dict]:
+            file_matches = []
+            try:
+                with open(os.path.join(local_path, rel_path), 'r', encoding='utf-8', errors='ignore') as f:
+                    text = f.read()
+            except:
+                return file_matches
+
+            # Most candidates from a full walk don't contain the term at all
+            if looks_binary(text) or needle not in text.lower():
+                return file_matches
+
+            lines = text.split('\n')  # same line breaks as iterating the file
+            if text.endswith('\n'):
+                lines.pop()
+            for line_num, line in enumerate(lines, 1):
+                if needle in line.lower():
+                    file_matches.append({
+                        "file": rel_path,
+                        "line": line_num,
+                        "content": line.strip(),
+                        "term": search_term
+                    })
+            return file_matches
+
+        files = [rel_path for rel_path in candidate_files if fnmatch(os.path.basename(rel_path), file_pattern)]
+        scanner = RepoScanner(self.scan_workers)
+        return [match for file_matches in scanner.map(search_file, files) for match in file_matches]
+
+    def rank_matches(
+        self,
+        matches: List[Dict],
+        search_term: str,
+        max_matches_per_file: int = SEARCH_MAX_MATCHES_PER_FILE
+    ) -> List[Dict]:
+        """
+        Group line matches by file and order files by relevance
 
-                file_path = os.path.join(root, file)
-                rel_path = os.path.relpath(file_path, local_path)
+        A file scores higher when its name contains the term, when the term
+        appears as a whole word or with the exact casing, and (log-damped)
+        the more often it occurs. Tests, docs, build output and data files
+        are down-weighted.
 
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        for line_num, line in enumerate(f, 1):
-                            if search_term.lower() in line.lower():
-                                matches.append({
-                                    "file": rel_path,
-                                    "line": line_num,
-                                    "content": line.strip(),
-                                    "term": search_term
-                                })
-                except:
-                    pass
+        Args:
+            matches: Output of search_in_files
+            search_term: Term that was searched for
+            max_matches_per_file: Lines kept per file (best lines first)
 
-        return matches
+        Returns:
+            List of {"file", "score", "match_count", "lines": [[line, content], ...]}, best first
+        """
+        word = re.compile(r"(?<![A-Za-z0-9_])" + re.escape(search_term) + r"(?![A-Za-z0-9_])", re.IGNORECASE)
+        needle = search_term.lower()
+
+        by_file: Dict[str, List[Dict]] = {}
+        for match in matches:
+            by_file.setdefault(match["file"], []).append(match)
+
+        ranked = []
+        for rel_path, file_matches in by_file.items():
+            def line_score(match: Dict) -> float:
+                content = match["content"]
+                return (1.0 if word.search(content) else 0.0) + (0.5 if search_term in content else 0.0)
+
+            line_scores = [line_score(match) for match in file_matches]
+            score = 1 + math.log2(len(file_matches)) + sum(line_scores) / len(line_scores)
+
+            name = os.path.basename(rel_path).lower()
+            if needle in name:
+                score += 3
+            parts = rel_path.lower().split("/")[:-1]
+            if any(part in LOW_SIGNAL_PATH_PARTS for part in parts) or name.endswith(LOW_SIGNAL_SUFFIXES) or ".test." in name or ".spec." in name:
+                score *= 0.5
+
+            best = sorted(zip(line_scores, file_matches), key=lambda pair: (-pair[0], pair[1]["line"]))
+            kept = sorted((match for _, match in best[:max_matches_per_file]), key=lambda match: match["line"])
+            ranked.append({
+                "file": rel_path,
+                "score": round(score, 2),
+                "match_count": len(file_matches),
+                "lines": [[match["line"], match["content"][:SEARCH_MAX_LINE_CHARS]] for match in kept],
+            })
+
+        ranked.sort(key=lambda entry: (-entry["score"], entry["file"]))
+        return ranked
 
     def get_file_structure(self, local_path: str, max_depth: int = 3) -> Dict:
         """
@@ -338,44 +764,487 @@ class GitHubTool:
         return tech_stack
 
 
+def _checkout_head(local_path: str) -> Optional[str]:
+    """
+    Cheap marker of what is checked out at local_path
+
+    The commit the worktree's HEAD points at (read from the git files, no
+    subprocess), the directory's mtime for a plain directory, or None if
+    nothing is there.
+    """
+    git_path = os.path.join(local_path, '.git')
+    try:
+        if os.path.isfile(git_path):
+            with open(git_path) as f:
+                git_dir = f.read().split("gitdir:", 1)[-1].strip()
+            git_dir = os.path.join(local_path, git_dir)
+        elif os.path.isdir(git_path):
+            git_dir = git_path
+        else:
+            return f"mtime:{os.stat(local_path).st_mtime_ns}"
+        with open(os.path.join(git_dir, 'HEAD')) as f:
+            head = f.read().strip()
+        if head.startswith("ref:"):
+            ref_path = os.path.join(git_dir, head[4:].strip())
+            if os.path.isfile(ref_path):
+                with open(ref_path) as f:
+                    head = f.read().strip()
+        return head
+    except OSError:
+        return None
+
+
+def _file_version(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RepoHandle:
+    """
+    In-memory state of one cloned repository, shared by every tool call
+
+    The searchable file list and the loaded search and symbol indexes are
+    computed on first use and kept until the repository is refreshed. Index
+    files rewritten on disk (e.g. by another process) are reloaded.
+    """
+
+    def __init__(self, tool: GitHubTool, repo_name: str, local_path: str, head: Optional[str]):
+        self.tool = tool
+        self.repo_name = repo_name
+        self.local_path = local_path
+        self.head = head
+        self.metadata: Dict = {}  # Latest fetch_github_repo result (commit, tech stack, ...)
+        self._files: Optional[List[str]] = None
+        self._search_index: Optional[TrigramIndex] = None
+        self._search_version: Optional[int] = None
+        self._symbol_index: Optional[SymbolIndex] = None
+        self._symbol_version: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def files(self) -> List[str]:
+        """Files search and indexing look at (walked once)"""
+        with self._lock:
+            if self._files is None:
+                self._files = self.tool.list_searchable_files(self.local_path)
+            return self._files
+
+    def search_index(self) -> Optional[TrigramIndex]:
+        """Loaded trigram index, or None if it has not been built"""
+        with self._lock:
+            index = self._search_index or self.tool.get_search_index(self.local_path)
+            version = _file_version(index.index_path)
+            if version is None:
+                return None
+            if self._search_index is None or version != self._search_version:
+                if not index.load():
+                    return None
+                self._search_index, self._search_version = index, version
+            return self._search_index
+
+    def symbol_index(self) -> SymbolIndex:
+        """Loaded symbol index, built first if it does not exist"""
+        with self._lock:
+            index = self._symbol_index or self.tool.get_symbol_index(self.local_path)
+            version = _file_version(index.index_path)
+            if self._symbol_index is None or version != self._symbol_version:
+                if version is None or not index.load():
+                    index.build(self.files())
+                    version = _file_version(index.index_path)
+                self._symbol_index, self._symbol_version = index, version
+            return self._symbol_index
+
+
+class RepoRegistry:
+    """
+    Process-wide GitHubTool and open repositories
+
+    Tool functions look repositories up here instead of constructing a
+    GitHubTool and rediscovering the checkout on every call. A handle is
+    dropped when fetch_github_repo refreshes the repository (invalidate) or
+    when its checked-out commit changes underneath it.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, GitHubTool] = {}
+        self._caches: Dict[str, RepoCacheManager] = {}
+        self._repos: Dict[str, RepoHandle] = {}
+        self._lock = threading.Lock()
+
+    def tool(self) -> GitHubTool:
+        """Shared GitHubTool for the default cache directory"""
+        cache_dir = default_cache_dir()
+        with self._lock:
+            tool = self._tools.get(cache_dir)
+            if tool is None:
+                tool = self._tools[cache_dir] = GitHubTool(cache_dir)
+            return tool
+
+    def cache(self) -> RepoCacheManager:
+        """Shared RepoCacheManager for the default cache directory"""
+        tool = self.tool()
+        with self._lock:
+            cache = self._caches.get(tool.cache_dir)
+            if cache is None:
+                cache = self._caches[tool.cache_dir] = RepoCacheManager(tool.cache_dir, tool.mirror_dir, tool.index_dir)
+            return cache
+
+    def open(self, repo_name: str) -> Optional[RepoHandle]:
+        """
+        Handle for a cloned repository
+
+        Args:
+            repo_name: Name of the cloned repository
+
+        Returns:
+            The cached handle while the checkout is unchanged, a new one
+            otherwise, or None if the repository is not cloned
+        """
+        tool = self.tool()
+        local_path = os.path.join(tool.cache_dir, repo_name)
+        head = _checkout_head(local_path)
+        if head is not None:
+            self.cache().touch(repo_name)
+        with self._lock:
+            handle = self._repos.get(local_path)
+            if handle is not None and handle.head == head and head is not None:
+                return handle
+            if head is None:
+                self._repos.pop(local_path, None)
+                return None
+            handle = self._repos[local_path] = RepoHandle(tool, repo_name, local_path, head)
+            return handle
+
+    def lease(self, repo_name: str):
+        """
+        Shared lease on a repository's checkout
+
+        While held, no thread or worker process refreshes, rewrites or
+        evicts the checkout. Tool functions hold one for the whole call.
+
+        Returns:
+            Context manager
+        """
+        return repo_lock(self.tool().cache_dir, repo_name).read()
+
+    def invalidate(self, repo_name: str):
+        """Forget everything cached about a repository (e.g. after it was refreshed)"""
+        local_path = os.path.join(self.tool().cache_dir, repo_name)
+        with self._lock:
+            self._repos.pop(local_path, None)
+
+    def clear(self):
+        with self._lock:
+            self._repos.clear()
+            self._tools.clear()
+            self._caches.clear()
+
+
+_registry = RepoRegistry()
+
+
+def get_repo_registry() -> RepoRegistry:
+    """The process-wide RepoRegistry"""
+    return _registry
+
+
+def pin_repo(repo_url: Optional[str]):
+    """
+    Keep a repository's clone from being evicted while a workflow uses it
+
+    Args:
+        repo_url: GitHub repository URL (None pins nothing)
+
+    Returns:
+        Context manager
+    """
+    if not repo_url:
+        return nullcontext()
+    return get_repo_registry().cache().pin(repo_name_from_url(repo_url))
+
+
+# Concurrent fetches of the same repo@branch in this process share one clone and index
+_fetches = SingleFlight()
+
+
 # Tool functions for Google ADK
 def fetch_github_repo(repo_url: str, branch: str = "main") -> str:
-    """Fetch a GitHub repository and return repo info"""
-    tool = GitHubTool()
-    result = tool.clone_repository(repo_url, branch)
-
-    if result["success"]:
-        index = tool.index_repository(result["local_path"])
-        tech_stack = tool.analyze_tech_stack(result["local_path"])
-
-        return json.dumps({
-            **result,
-            "index": index.get("index", {}),
-            "tech_stack": tech_stack
-        }, indent=2)
-    else:
+    """
+    Fetch a GitHub repository and return repo info
+
+    A repository that is already checked out at the remote commit and was
+    indexed by this process is answered from the registry without walking
+    or indexing it again. Concurrent fetches of the same repository and
+    branch join the one already running.
+    """
+    with tracing.span("tool.fetch_github_repository", repo=repo_url, branch=branch) as span:
+        info, shared = _fetches.do(f"{repo_url.rstrip('/')}@{branch}", lambda: _fetch_repo(repo_url, branch, span))
+        span.set_attribute("joined", shared)
+        return info
+
+
+def _fetch_repo(repo_url: str, branch: str, span) -> str:
+    """Body of fetch_github_repo: clone, then index under a read lease"""
+    registry = get_repo_registry()
+    tool = registry.tool()
+    with tracing.span("github.clone", repo=repo_url) as step:
+        result = tool.clone_repository(repo_url, branch)
+        step.set_attributes(success=result["success"], updated=result.get("updated"), commit=result.get("commit"))
+
+    if not result["success"]:
+        span.set_attribute("error", result.get("error"))
         return json.dumps(result, indent=2)
 
+    if result["updated"]:
+        registry.invalidate(result["repo_name"])
+    with registry.lease(result["repo_name"]):
+        repo = registry.open(result["repo_name"])
+        if repo is not None and repo.metadata.get("commit") == result["commit"]:
+            span.set_attributes(files=repo.metadata["index"].get("total_files"), reused=True)
+            return json.dumps({**repo.metadata, **result}, indent=2)
+
+        local_path = result["local_path"]
+        files = repo.files() if repo is not None else None
+        with tracing.span("github.index_repository") as step:
+            index = tool.index_repository(local_path)
+            step.set_attribute("files", index.get("index", {}).get("total_files"))
+        with tracing.span("github.analyze_tech_stack"):
+            tech_stack = tool.analyze_tech_stack(local_path)
+        with tracing.span("github.build_search_index") as step:
+            search_index = tool.build_search_index(local_path, files)
+            step.set_attributes(files_read=search_index.get("files_read"), size_bytes=search_index.get("size_bytes"))
+        with tracing.span("github.build_symbol_index") as step:
+            symbol_index = tool.build_symbol_index(local_path, files)
+            step.set_attribute("symbols", symbol_index.get("symbols"))
+
+    span.set_attribute("files", index.get("index", {}).get("total_files"))
+    info = {
+        **result,
+        "index": index.get("index", {}),
+        "tech_stack": tech_stack,
+        "search_index": search_index,
+        "symbol_index": symbol_index
+    }
+    if repo is not None and search_index["success"] and symbol_index["success"]:
+        repo.metadata = info
+
+    # Size the clone with its indexes, then make room for it
+    cache = registry.cache()
+    cache.record(result["repo_name"])
+    span.set_attribute("evicted", cache.evict(keep=[result["repo_name"]]))
+    return json.dumps(info, indent=2)
+
+
+def search_codebase(repo_name: str, search_term: str, limit: int = SEARCH_PAGE_SIZE, cursor: str = "") -> str:
+    """
+    Search for a term in the codebase
+
+    Results are grouped by file, ranked by relevance and paged: pass the
+    returned next_cursor back in to get the following page.
+
+    Args:
+        repo_name: Name of the cloned repository
+        search_term: Term to search for (case-insensitive)
+        limit: Files per page
+        cursor: next_cursor from a previous call (empty for the first page)
+
+    Returns:
+        Compact JSON with total counts, one page of ranked files and next_cursor
+    """
+    with tracing.span("tool.search_in_codebase", repo=repo_name, term=search_term, cursor=cursor) as span:
+        with get_repo_registry().lease(repo_name):
+            repo = get_repo_registry().open(repo_name)
+            if repo is None:
+                return json.dumps({"error": "Repository not found. Please clone it first."})
+            tool, local_path = repo.tool, repo.local_path
 
-def search_codebase(repo_name: str, search_term: str) -> str:
-    """Search for a term in the codebase"""
-    tool = GitHubTool()
-    local_path = os.path.join(tool.cache_dir, repo_name)
-
-    if not os.path.exists(local_path):
-        return json.dumps({"error": "Repository not found. Please clone it first."})
-
-    matches = tool.search_in_files(local_path, search_term)
-    return json.dumps(matches, indent=2)
+            try:
+                offset = max(int(cursor or 0), 0)
+            except ValueError:
+                return json.dumps({"error": f"Invalid cursor: {cursor}"})
+            limit = max(int(limit or SEARCH_PAGE_SIZE), 1)
 
+            # Only read files the trigram index says can contain the term
+            index = repo.search_index()
+            candidates = index.candidates(search_term) if index is not None else None
 
-def read_code_file(repo_name: str, file_path: str) -> str:
-    """Read a specific file from the codebase"""
-    tool = GitHubTool()
-    local_path = os.path.join(tool.cache_dir, repo_name)
+            matches = tool.search_in_files(
+                local_path, search_term, candidate_files=repo.files() if candidates is None else candidates
+            )
+            ranked = tool.rank_matches(matches, search_term)
+            page = ranked[offset:offset + limit]
+            next_offset = offset + len(page)
+            span.set_attributes(
+                candidate_files=None if candidates is None else len(candidates),
+                match_count=len(matches),
+                file_count=len(ranked)
+            )
 
-    if not os.path.exists(local_path):
-        return "Error: Repository not found. Please clone it first."
+            return json.dumps({
+                "term": search_term,
+                "total_files": len(ranked),
+                "total_matches": len(matches),
+                "files": page,
+                "next_cursor": str(next_offset) if next_offset < len(ranked) else None,
+            }, separators=(",", ":"))
+
+
+def _continue_at(read: Dict) -> str:
+    """Argument that resumes a truncated read: the next line, or the next byte if it stopped mid-line"""
+    if read["next_byte"] is not None:
+        return f"byte_start={read['next_byte']}"
+    return f"start_line={read['next_line']}"
+
+
+def read_code_file(
+    repo_name: str,
+    file_path: str,
+    start_line: int = 0,
+    end_line: int = 0,
+    around_line: int = 0,
+    context_lines: int = DEFAULT_CONTEXT_LINES,
+    byte_start: int = 0
+) -> str:
+    """
+    Read a file, or a range of its lines, from the codebase
+
+    A whole file that fits in READ_MAX_BYTES comes back as is. Ranges, and
+    files cut at the size cap, start with a "[path lines a-b of n]" header
+    and end with a marker saying where to continue: a start_line, or a
+    byte_start when the cap fell inside a very long line.
+
+    Args:
+        repo_name: Name of the cloned repository
+        file_path: Path relative to the repository root
+        start_line: First line to read, 1-based (0: from the start)
+        end_line: Last line to read, inclusive (0: to the end)
+        around_line: Read context_lines on each side of this line instead (0: off)
+        context_lines: Lines of context for around_line
+        byte_start: Read from this byte offset instead, as given by a truncation marker (0: off)
+
+    Returns:
+        File content, or an error message
+    """
+    with tracing.span(
+        "tool.read_code_file", repo=repo_name, file=file_path, start_line=start_line or None,
+        end_line=end_line or None, around_line=around_line or None, byte_start=byte_start or None
+    ) as span:
+        with get_repo_registry().lease(repo_name):
+            repo = get_repo_registry().open(repo_name)
+            if repo is None:
+                return "Error: Repository not found. Please clone it first."
+            tool, local_path = repo.tool, repo.local_path
 
-    content = tool.read_file(local_path, file_path)
-    return content if content else f"Error: Could not read file {file_path}"
+            try:
+                read = tool.read_file_range(
+                    local_path, file_path, start_line or None, end_line or None, around_line or None, context_lines,
+                    byte_start=byte_start or None
+                )
+            except LineRangeError as e:
+                return f"Error: {e}"
+            if read is None:
+                return f"Error: Could not read file {file_path}"
+
+            span.set_attributes(
+                bytes_read=read["end_byte"] - read["start_byte"],
+                size_bytes=read["size_bytes"],
+                truncated=read["truncated"]
+            )
+            if not (start_line or end_line or around_line or byte_start or read["truncated"]):
+                return read["content"] or f"Error: Could not read file {file_path}"
+
+            header = f"[{file_path} lines {read['start_line']}-{read['end_line']} of {read['total_lines']}]\n"
+            footer = ""
+            if read["truncated"]:
+                footer = f"\n...(truncated at {READ_MAX_BYTES} bytes; continue with {_continue_at(read)})"
+            return header + read["content"] + footer
+
+
+def read_code_files(
+    repo_name: str,
+    file_paths: List[str],
+    max_bytes_per_file: int = READ_FILES_MAX_BYTES_PER_FILE
+) -> str:
+    """
+    Read several files from the codebase in one call
+
+    Files are read concurrently and returned as one bundle, each under a
+    "=== path (lines a-b of n) ===" header. Every file is cut at
+    max_bytes_per_file, and at an equal share of READ_FILES_MAX_TOTAL_BYTES
+    when that is smaller; cut files say which start_line (or byte_start)
+    to continue from with read_code_file.
+
+    Args:
+        repo_name: Name of the cloned repository
+        file_paths: Paths relative to the repository root (at most READ_FILES_MAX_FILES)
+        max_bytes_per_file: Size cap per file
+
+    Returns:
+        The bundle, or an error message
+    """
+    with tracing.span("tool.read_code_files", repo=repo_name, files=len(file_paths or [])) as span:
+        with get_repo_registry().lease(repo_name):
+            repo = get_repo_registry().open(repo_name)
+            if repo is None:
+                return "Error: Repository not found. Please clone it first."
+            tool, local_path = repo.tool, repo.local_path
+
+            file_paths = list(dict.fromkeys(path.strip() for path in file_paths or [] if path.strip()))
+            if not file_paths:
+                return "Error: No file paths given."
+            skipped = file_paths[READ_FILES_MAX_FILES:]
+            file_paths = file_paths[:READ_FILES_MAX_FILES]
+
+            cap = max(1, min(max_bytes_per_file or READ_FILES_MAX_BYTES_PER_FILE, READ_FILES_MAX_TOTAL_BYTES // len(file_paths)))
+            reads = tool.read_files(local_path, file_paths, cap)
+
+            parts = []
+            for file_path, read in zip(file_paths, reads):
+                if read is None:
+                    parts.append(f"=== {file_path}: could not read file ===")
+                    continue
+                note = ""
+                if read["truncated"]:
+                    note = f", truncated at {cap} bytes; continue with read_code_file {_continue_at(read)}"
+                parts.append(
+                    f"=== {file_path} (lines {read['start_line']}-{read['end_line']} of {read['total_lines']}{note}) ===\n"
+                    + read["content"].rstrip("\n")
+                )
+            if skipped:
+                parts.append(f"=== Not read (more than {READ_FILES_MAX_FILES} files): {', '.join(skipped)} ===")
+
+            span.set_attributes(
+                bytes_read=sum(read["end_byte"] - read["start_byte"] for read in reads if read),
+                failed=sum(1 for read in reads if read is None),
+                truncated=sum(1 for read in reads if read and read["truncated"])
+            )
+            return "\n\n".join(parts)
+
+
+def find_symbol(repo_name: str, symbol_name: str) -> str:
+    """Find where a class, function or method is defined"""
+    with tracing.span("tool.find_symbol", repo=repo_name, symbol=symbol_name) as span:
+        with get_repo_registry().lease(repo_name):
+            repo = get_repo_registry().open(repo_name)
+            if repo is None:
+                return json.dumps({"error": "Repository not found. Please clone it first."})
+
+            definitions = repo.symbol_index().find(symbol_name)
+            span.set_attribute("match_count", len(definitions))
+            return json.dumps(definitions, indent=2)
+
+
+def list_symbols_in_file(repo_name: str, file_path: str) -> str:
+    """List the classes, functions and methods defined in a file"""
+    with tracing.span("tool.list_symbols_in_file", repo=repo_name, file=file_path) as span:
+        with get_repo_registry().lease(repo_name):
+            repo = get_repo_registry().open(repo_name)
+            if repo is None:
+                return json.dumps({"error": "Repository not found. Please clone it first."})
+
+            symbols = repo.symbol_index().symbols_in_file(file_path)
+            if symbols is None:
+                return json.dumps({"error": f"No symbols indexed for {file_path} (unsupported language or file not found)"})
+            span.set_attribute("symbol_count", len(symbols))
+            return json.dumps(symbols, indent=2)
@@ -0,0 +1,267 @@
+"""
+Repository Ignore Rules
+Decides which files and directories the repository walks skip
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Dependency, build and tool directories that never hold source worth searching
+DEFAULT_SKIP_DIRS = {
+    '.git', '.hg', '.svn',
+    'node_modules', 'bower_components', '.pnpm-store',
+    '__pycache__', '.venv', 'venv', '.tox', '.mypy_cache', '.pytest_cache', '.ruff_cache',
+    '.next', '.nuxt', '.turbo', '.cache', 'build', 'dist', 'out', 'coverage',
+    'target', '.gradle', '.idea', '.vscode', 'Pods', 'DerivedData', 'Carthage', '.terraform',
+}
+
+# Extensions that are always binary; cheaper than opening the file to check
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tiff', '.psd',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar', '.war', '.aar', '.apk', '.ipa',
+    '.class', '.dex', '.so', '.dylib', '.dll', '.exe', '.o', '.a', '.pyc', '.wasm',
+    '.woff', '.woff2', '.ttf', '.otf', '.eot',
+    '.mp3', '.mp4', '.mov', '.avi', '.wav', '.ogg', '.webm',
+    '.sqlite', '.sqlite3', '.db', '.bin', '.keystore', '.jks',
+}
+
+BINARY_SNIFF_BYTES = 8192
+
+
+def looks_binary(data) -> bool:
+    """True if the start of a file's content (bytes or str) contains a NUL"""
+    nul = b"\0" if isinstance(data, bytes) else "\0"
+    return nul in data[:BINARY_SNIFF_BYTES]
+
+
+def _glob_to_regex(glob: str) -> str:
+    """Translate a gitignore glob (already stripped of anchors) to a regex"""
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if glob.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = glob.find(']', i + 2 if glob.startswith('[!', i) or glob.startswith('[^', i) else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = glob[i + 1:end]
+                if body[:1] in ('!', '^'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(glob[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class _Rule:
+    """One gitignore pattern"""
+
+    __slots__ = ('regex', 'negate', 'dir_only', 'anchored')
+
+    def __init__(self, regex, negate: bool, dir_only: bool, anchored: bool):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+        self.anchored = anchored
+
+    def matches(self, rel_path: str, is_dir: bool) -> bool:
+        if self.dir_only and not is_dir:
+            return False
+        target = rel_path if self.anchored else rel_path.rsplit('/', 1)[-1]
+        return self.regex.fullmatch(target) is not None
+
+
+def parse_gitignore(lines: Iterable[str]) -> List[_Rule]:
+    """
+    Parse gitignore-format lines
+
+    Args:
+        lines: Lines of a .gitignore or info/exclude file
+
+    Returns:
+        Rules in file order (later rules take precedence)
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        # Trailing spaces are ignored unless escaped
+        stripped = line.rstrip(' ')
+        if stripped.endswith('\\') and len(stripped) < len(line):
+            stripped += ' '
+        line = stripped
+        if not line or line.startswith('#'):
+            continue
+
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+
+        # A slash anywhere but the end anchors the pattern to the file's directory
+        anchored = '/' in line
+        line = line.lstrip('/')
+        try:
+            regex = re.compile(_glob_to_regex(line), re.DOTALL)
+        except re.error:
+            continue
+        rules.append(_Rule(regex, negate, dir_only, anchored))
+    return rules
+
+
+def _read_rules(path: str) -> List[_Rule]:
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return parse_gitignore(f)
+    except OSError:
+        return []
+
+
+def _git_dir(repo_path: str) -> Optional[str]:
+    """Common git directory of a checkout (follows worktree .git files)"""
+    dot_git = os.path.join(repo_path, '.git')
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, 'r') as f:
+            content = f.read().strip()
+    except OSError:
+        return None
+    if not content.startswith('gitdir:'):
+        return None
+
+    git_dir = os.path.join(repo_path, content[len('gitdir:'):].strip())
+    # Linked worktrees keep info/exclude in the main repository
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r') as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        return git_dir
+
+
+class IgnoreRules:
+    """
+    Ignore decisions for one repository
+
+    An entry is skipped when its name is in the skip list, when it is a
+    binary file (by extension, if skip_binary is set), or when the
+    repository's .git/info/exclude or any .gitignore on its path says so.
+    Gitignore precedence follows git: deeper files override shallower ones,
+    later lines override earlier ones, and "!" re-includes. Nested
+    .gitignore files are loaded lazily as the walk reaches their directory.
+
+    Instances are callable as RepoScanner ignore callbacks and thread-safe.
+    """
+
+    def __init__(
+        self,
+        repo_path: str,
+        skip_dirs: Optional[Iterable[str]] = None,
+        skip_binary: bool = False,
+        use_gitignore: bool = True
+    ):
+        """
+        Initialize ignore rules
+
+        Args:
+            repo_path: Root of the checkout
+            skip_dirs: Directory names skipped at any depth (default: DEFAULT_SKIP_DIRS)
+            skip_binary: Also skip files with a known binary extension
+            use_gitignore: Honour .gitignore and .git/info/exclude
+        """
+        self.repo_path = repo_path
+        self.skip_dirs = set(DEFAULT_SKIP_DIRS if skip_dirs is None else skip_dirs)
+        self.skip_binary = skip_binary
+        self.use_gitignore = use_gitignore
+        self._dir_rules: Dict[str, List[_Rule]] = {}
+        self._lock = threading.Lock()
+
+        self._exclude_rules: List[_Rule] = []
+        if use_gitignore:
+            git_dir = _git_dir(repo_path)
+            if git_dir:
+                self._exclude_rules = _read_rules(os.path.join(git_dir, 'info', 'exclude'))
+
+    def _rules_in(self, rel_dir: str) -> List[_Rule]:
+        """Rules from rel_dir/.gitignore, loaded once"""
+        rules = self._dir_rules.get(rel_dir)
+        if rules is None:
+            rules = _read_rules(os.path.join(self.repo_path, rel_dir, '.gitignore'))
+            with self._lock:
+                self._dir_rules[rel_dir] = rules
+        return rules
+
+    def _gitignored(self, rel_path: str, is_dir: bool) -> bool:
+        # (base directory, rules) from lowest to highest precedence
+        layers: List[Tuple[str, List[_Rule]]] = [('', self._exclude_rules), ('', self._rules_in(''))]
+        parts = rel_path.split('/')
+        for depth in range(1, len(parts)):
+            base = '/'.join(parts[:depth])
+            layers.append((base, self._rules_in(base)))
+
+        ignored = False
+        for base, rules in layers:
+            if not rules:
+                continue
+            relative = rel_path[len(base) + 1:] if base else rel_path
+            for rule in rules:
+                if rule.negate == ignored and rule.matches(relative, is_dir):
+                    ignored = not rule.negate
+        return ignored
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """
+        Whether the walk should skip an entry
+
+        Parents are assumed not ignored: the walk prunes ignored directories
+        before it ever asks about their contents.
+
+        Args:
+            rel_path: Path relative to the repository root
+            is_dir: Whether the entry is a directory
+
+        Returns:
+            True to skip the entry (and, for directories, everything below it)
+        """
+        rel_path = rel_path.replace(os.sep, '/')
+        name = rel_path.rsplit('/', 1)[-1]
+
+        if is_dir:
+            if name in self.skip_dirs:
+                return True
+        else:
+            if name == '.git':  # worktree pointer file
+                return True
+            if self.skip_binary and os.path.splitext(name)[1].lower() in BINARY_EXTENSIONS:
+                return True
+
+        return self.use_gitignore and self._gitignored(rel_path, is_dir)
+
+    __call__ = is_ignored
@@ -0,0 +1,229 @@
+"""
+PRD Sections
+Splits a generated PRD into its template sections and builds compact,
+token-budgeted excerpts for downstream agents
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# Canonical section keys, in template order (see conversational_prd_agent)
+SECTION_KEYS = [
+    "title",
+    "overview",
+    "objective",
+    "context",
+    "problem_statement",
+    "assumptions",
+    "scope",
+    "goals_success_metrics",
+    "user_stories_personas",
+    "functional_requirements",
+    "non_functional_requirements",
+    "technical_considerations",
+    "analytics_tracking",
+    "design_requirements",
+    "open_questions_risks",
+    "release_plan",
+    "dependencies_blockers",
+    "stakeholders_approvals",
+]
+
+# Heading keywords per section; checked in order, first match wins. A keyword
+# matches whole words (plurals included); one ending in "*" is a word stem
+_HEADING_KEYWORDS = [
+    ("non_functional_requirements", ("non-functional", "non functional", "nonfunctional")),
+    ("functional_requirements", ("functional",)),
+    ("goals_success_metrics", ("success metric", "metric", "goal", "kpi")),
+    ("user_stories_personas", ("user stor*", "story", "stories", "persona", "user segment", "users")),
+    ("analytics_tracking", ("analytics", "event tracking", "tracking plan", "instrumentation")),
+    ("design_requirements", ("design", "wireframe", "ux")),
+    ("technical_considerations", ("technical", "architecture", "tech")),
+    ("open_questions_risks", ("question", "risk")),
+    ("release_plan", ("release", "rollout", "timeline", "launch", "milestone")),
+    ("dependencies_blockers", ("dependenc*", "blocker")),
+    ("stakeholders_approvals", ("stakeholder", "approval", "sign-off")),
+    ("problem_statement", ("problem",)),
+    ("objective", ("objective",)),
+    ("assumptions", ("assumption",)),
+    ("scope", ("scope",)),
+    ("context", ("context", "background")),
+    ("overview", ("overview", "summary")),
+]
+
+
+def _keyword_pattern(keywords: Tuple[str, ...]) -> "re.Pattern":
+    """Regex matching any of a section's heading keywords at word boundaries"""
+    alternatives = [
+        re.escape(keyword[:-1]) + r"\w*" if keyword.endswith("*") else re.escape(keyword) + r"(?:e?s)?\b"
+        for keyword in keywords
+    ]
+    return re.compile(r"\b(?:" + "|".join(alternatives) + ")")
+
+
+_HEADING_PATTERNS = [(key, _keyword_pattern(keywords)) for key, keywords in _HEADING_KEYWORDS]
+
+_MARKED_SECTION = re.compile(r"\[PRD_SECTION:(\w+)\](.*?)\[/PRD_SECTION\]", re.DOTALL)
+
+CHARS_PER_TOKEN = 4
+MIN_PARTIAL_SECTION_TOKENS = 100
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token count (about 4 characters per token for English prose and markdown)"""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_budget(text: Optional[str], max_tokens: int) -> str:
+    """
+    Cut text to roughly max_tokens, preferring a line boundary
+
+    Args:
+        text: Text to shorten
+        max_tokens: Token budget
+
+    Returns:
+        The text unchanged if it fits, else its head with a truncation marker
+    """
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text or ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + "\n...(truncated)"
+
+
+def _classify_heading(heading: str) -> str:
+    """Map a markdown heading to a section key (unknown headings get a slug)"""
+    words = re.sub(r"^[\d.\s]+", "", re.sub(r"[^\w\s&/-]", " ", heading)).strip().lower()
+    for key, pattern in _HEADING_PATTERNS:
+        if pattern.search(words):
+            return key
+    return re.sub(r"\W+", "_", words).strip("_") or "other"
+
+
+def _marker_key(name: str, body: str) -> str:
+    """Section key for a [PRD_SECTION:name] marker (e.g. objectives -> objective)"""
+    name = name.lower()
+    if name in SECTION_KEYS:
+        return name
+    key = _classify_heading(name.replace("_", " "))
+    if key in SECTION_KEYS:
+        return key
+    # Fall back to the section's own heading, then to the slugged name
+    heading = re.search(r"^#+\s+(.+)$", body, re.MULTILINE)
+    if heading:
+        heading_key = _classify_heading(heading.group(1))
+        if heading_key in SECTION_KEYS:
+            return heading_key
+    return key
+
+
+def parse_prd_sections(prd: Optional[str]) -> Dict[str, str]:
+    """
+    Split a PRD into sections
+
+    Understands both the [PRD_SECTION:name] markers the PRD agent emits and
+    plain markdown, where each "## " heading starts a section; a PRD may mix
+    the two. Marker names are mapped to section keys like headings are.
+    Each value keeps its own heading so it reads on its own; text before
+    the first section is kept with the title, and unmarked text without a
+    heading after a marked section goes under "other".
+
+    Args:
+        prd: PRD markdown
+
+    Returns:
+        Section key -> section text, in document order
+    """
+    sections: Dict[str, str] = {}
+    if not prd:
+        return sections
+
+    def add(key: str, body: str):
+        body = body.strip()
+        if body:
+            sections[key] = (sections[key] + "\n\n" if key in sections else "") + body
+
+    def add_markdown(text: str, key: str):
+        lines: List[str] = []
+        for line in text.splitlines():
+            if line.startswith("## "):
+                add(key, "\n".join(lines))
+                key, lines = _classify_heading(line[3:]), [line]
+            else:
+                lines.append(line)
+        add(key, "\n".join(lines))
+
+    position, key = 0, "title"
+    for match in _MARKED_SECTION.finditer(prd):
+        add_markdown(prd[position:match.start()], key)
+        add(_marker_key(match.group(1), match.group(2)), match.group(2))
+        position, key = match.end(), "other"
+    add_markdown(prd[position:], key)
+    return sections
+
+
+def compact_prd(
+    sections: Dict[str, str],
+    keys: List[str],
+    max_tokens: int,
+    prd: Optional[str] = None
+) -> Tuple[str, Dict]:
+    """
+    Build a PRD excerpt from the given sections within a token budget
+
+    Sections are added in the order of keys; the first one that no longer
+    fits is truncated (if enough budget is left) and the rest are named as
+    omitted. If none of the requested sections exist, the excerpt is the
+    head of the full PRD instead (info["fallback"] is True).
+
+    Args:
+        sections: Output of parse_prd_sections
+        keys: Section keys to include, most important first
+        max_tokens: Token budget for the excerpt
+        prd: Full PRD text, used for the fallback
+
+    Returns:
+        (excerpt, info) where info lists the included, truncated and
+        omitted sections and the excerpt's estimated tokens
+    """
+    # Without any of the requested sections an excerpt would be little more
+    # than the title, so the agent gets the head of the full PRD instead
+    if not any(sections.get(key) for key in keys if key != "title"):
+        text = truncate_to_budget(prd or "\n\n".join(sections.values()), max_tokens)
+        return text, {"sections": [], "truncated": [], "omitted": [], "tokens": estimate_tokens(text), "fallback": True}
+
+    parts: List[str] = []
+    included, truncated, omitted = [], [], []
+    used = 0
+    for key in ["title"] + [key for key in keys if key != "title"]:
+        body = sections.get(key)
+        if not body:
+            continue
+        cost = estimate_tokens(body)
+        if omitted or used + cost > max_tokens:
+            if not omitted and max_tokens - used >= MIN_PARTIAL_SECTION_TOKENS:
+                parts.append(truncate_to_budget(body, max_tokens - used))
+                used = max_tokens
+                truncated.append(key)
+            else:
+                omitted.append(key)
+            continue
+        parts.append(body)
+        used += cost
+        included.append(key)
+
+    text = "\n\n".join(parts)
+    if omitted:
+        text += f"\n\n(Sections omitted for length: {', '.join(omitted)})"
+    return text, {
+        "sections": included + truncated,
+        "truncated": truncated,
+        "omitted": omitted,
+        "tokens": estimate_tokens(text),
+    }
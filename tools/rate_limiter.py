@@ -0,0 +1,306 @@
+"""
+LLM Rate Limiter
+Per-model request and token budgets shared by every agent and workflow in
+the process, with jittered retries when the API still reports a quota error
+"""
+
+import os
+import re
+import random
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.models.registry import LLMRegistry
+
+
+CHARS_PER_TOKEN = 4
+# Output budgeted for a model call before its real size is known
+EXPECTED_OUTPUT_TOKENS = 1024
+
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BACKOFF_SECONDS = 2.0
+RATE_LIMIT_MAX_BACKOFF_SECONDS = 60.0
+
+_RETRY_DELAY = re.compile(r"retry(?:Delay)?\W+(?:in\W+)?(\d+(?:\.\d+)?)s", re.IGNORECASE)
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations in arrival order
+
+    acquire() takes its tokens right away, letting the balance go negative,
+    and then sleeps until the bucket has refilled past that point. Callers
+    are therefore served first come, first served, nobody starves, and the
+    bucket can be shared by any number of event loops and threads.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize bucket
+
+        Args:
+            per_minute: Refill rate, e.g. a requests- or tokens-per-minute quota
+            capacity: Largest burst (default: one minute's worth)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute if capacity is None else capacity
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount now; returns how many seconds to wait before using it"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Wait until amount is available
+
+        Returns:
+            Seconds waited
+        """
+        wait = self.reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def adjust(self, amount: float):
+        """Take (positive) or give back (negative) tokens after the fact"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self):
+        """Empty the bucket, e.g. after the API said the quota is used up"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+
+
+class ModelLimit:
+    """Request and token buckets plus an optional concurrency cap for one model"""
+
+    def __init__(self, rpm: float, tpm: Optional[float] = None, max_concurrent: Optional[int] = None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrent = max_concurrent
+        # asyncio semaphores belong to one event loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        if not self.max_concurrent:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrent)
+        return semaphore
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Whether an exception is the API rejecting a call for quota (HTTP 429)"""
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "RESOURCE_EXHAUSTED" in message or "429" in message.split(".", 1)[0]
+
+
+def backoff_seconds(attempt: int, error: Optional[BaseException] = None) -> float:
+    """
+    Delay before retry number attempt (0-based)
+
+    Uses the server's suggested retry delay when the error carries one,
+    else exponential backoff with full jitter, so callers that failed
+    together do not retry together.
+    """
+    if error is not None:
+        match = _RETRY_DELAY.search(str(error))
+        if match:
+            return min(float(match.group(1)) + random.uniform(0, 1), RATE_LIMIT_MAX_BACKOFF_SECONDS)
+    return random.uniform(0, min(RATE_LIMIT_MAX_BACKOFF_SECONDS, RATE_LIMIT_BACKOFF_SECONDS * 2 ** attempt))
+
+
+def _estimate_request_tokens(llm_request: LlmRequest) -> int:
+    chars = 0
+    config = getattr(llm_request, "config", None)
+    instruction = getattr(config, "system_instruction", None)
+    if isinstance(instruction, str):
+        chars += len(instruction)
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            chars += len(getattr(part, "text", None) or "")
+            if getattr(part, "function_response", None) is not None:
+                chars += len(str(part.function_response.response))
+    return chars // CHARS_PER_TOKEN
+
+
+class ModelRateLimiter:
+    """
+    Budgets requests and tokens per model
+
+    Each model call reserves one request and its estimated tokens (prompt
+    plus EXPECTED_OUTPUT_TOKENS) before it is sent and settles the token
+    estimate against the reported usage afterwards. Models without limits
+    are not throttled.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, float]]):
+        """
+        Initialize limiter
+
+        Args:
+            limits: Model name -> {"rpm": ..., "tpm": ..., "max_concurrent": ...} (tpm and max_concurrent optional)
+        """
+        self.limits = {
+            model: ModelLimit(limit["rpm"], limit.get("tpm"), limit.get("max_concurrent"))
+            for model, limit in limits.items()
+        }
+        self.stats = {"calls": 0, "throttled": 0, "wait_seconds": 0.0, "quota_errors": 0, "retries": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    @asynccontextmanager
+    async def slot(self, model: str, estimated_tokens: int):
+        """
+        Hold a request slot for one call to model
+
+        Yields a dict; set its "tokens" key to the call's real token count
+        to correct the token budget.
+        """
+        limit = self.limits.get(model)
+        usage = {"tokens": None}
+        self._count("calls")
+        if limit is None:
+            yield usage
+            return
+
+        waited = await limit.requests.acquire(1)
+        if limit.tokens:
+            waited += await limit.tokens.acquire(estimated_tokens)
+        if waited:
+            self._count("throttled")
+            self._count("wait_seconds", waited)
+
+        semaphore = limit.semaphore()
+        if semaphore:
+            await semaphore.acquire()
+        try:
+            yield usage
+        finally:
+            if semaphore:
+                semaphore.release()
+            if limit.tokens and usage["tokens"] is not None:
+                limit.tokens.adjust(usage["tokens"] - estimated_tokens)
+
+    def quota_exceeded(self, model: str):
+        """Record a quota error: stop handing out requests until the bucket refills"""
+        self._count("quota_errors")
+        limit = self.limits.get(model)
+        if limit:
+            limit.requests.drain()
+
+    def wrap(self, model: Any) -> BaseLlm:
+        """Rate-limited version of an agent model (name or model object)"""
+        inner = LLMRegistry.new_llm(model) if isinstance(model, str) else model
+        return RateLimitedLlm(model=inner.model, inner=inner, limiter=self)
+
+
+class RateLimitedLlm(BaseLlm):
+    """Model wrapper that waits for its ModelRateLimiter and retries quota errors"""
+
+    inner: Any = None
+    limiter: Any = None
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        estimated = _estimate_request_tokens(llm_request) + EXPECTED_OUTPUT_TOKENS
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with self.limiter.slot(self.model, estimated) as usage:
+                    async for response in self.inner.generate_content_async(llm_request, stream):
+                        started = True
+                        metadata = getattr(response, "usage_metadata", None)
+                        if metadata is not None and not response.partial:
+                            usage["tokens"] = (getattr(metadata, "prompt_token_count", None) or 0) + (
+                                getattr(metadata, "candidates_token_count", None) or 0
+                            )
+                        yield response
+                return
+            except Exception as e:
+                # Once output has been passed on, a retry would duplicate it
+                if started or not is_quota_error(e):
+                    raise
+                self.limiter.quota_exceeded(self.model)
+                if attempt >= RATE_LIMIT_MAX_RETRIES:
+                    raise
+                delay = backoff_seconds(attempt, e)
+                attempt += 1
+                self.limiter._count("retries")
+                print(f"⏳ {self.model} quota exceeded, retry {attempt}/{RATE_LIMIT_MAX_RETRIES} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Dict[str, float]]:
+    """
+    Parse "model=rpm[/tpm[/max_concurrent]],..." (e.g. REDSPEC_RATE_LIMITS)
+
+    Args:
+        spec: Comma-separated limits
+
+    Returns:
+        Limits in the ModelRateLimiter format
+    """
+    limits = {}
+    for entry in filter(None, (item.strip() for item in spec.split(","))):
+        model, _, values = entry.partition("=")
+        numbers = [float(value) if value.strip() else 0.0 for value in values.split("/")]
+        if not model or not numbers[0]:
+            raise ValueError(f"Invalid rate limit {entry!r} (expected model=rpm[/tpm[/max_concurrent]])")
+        limit = {"rpm": numbers[0]}
+        if len(numbers) > 1 and numbers[1]:
+            limit["tpm"] = numbers[1]
+        if len(numbers) > 2 and numbers[2]:
+            limit["max_concurrent"] = int(numbers[2])
+        limits[model.strip()] = limit
+    return limits
+
+
+_shared_limiter: Optional[ModelRateLimiter] = None
+_shared_lock = threading.Lock()
+
+
+def rate_limiter_from_env(default_limits: Dict[str, Dict[str, float]]) -> Optional[ModelRateLimiter]:
+    """
+    Process-wide limiter, so concurrent workflows and orchestrators share one budget
+
+    REDSPEC_RATE_LIMITS replaces default_limits ("model=rpm/tpm,...") or
+    turns limiting off ("off"). The limiter is created on first use.
+    """
+    global _shared_limiter
+    setting = os.getenv("REDSPEC_RATE_LIMITS", "").strip()
+    if setting.lower() == "off":
+        return None
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = ModelRateLimiter(parse_rate_limits(setting) if setting else default_limits)
+        return _shared_limiter
@@ -0,0 +1,311 @@
+"""
+Repository Cache Manager
+Tracks the size and last use of every cached clone and evicts the least
+recently used ones when the cache exceeds its disk quota
+"""
+
+import os
+import re
+import glob
+import time
+import shutil
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from tools.repo_locks import repo_lock
+
+
+DEFAULT_QUOTA_BYTES = 5 * 1024 ** 3
+DEFAULT_MIN_FREE_BYTES = 1024 ** 3
+# Last-access updates for the same repository are written at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a size such as "500m", "5g", "1.5GB" or "1048576" into bytes
+
+    Raises:
+        ValueError: If value is not a size
+    """
+    match = _SIZE.match(value or "")
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** "_kmgt".index(unit.lower() or "_"))
+
+
+def _env_size(name: str, default: int) -> int:
+    value = os.environ.get(name, "").strip()
+    return parse_size(value) if value else default
+
+
+def dir_size(path: str) -> int:
+    """Bytes used by the files under path (symlinks not followed)"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RepoCacheManager:
+    """
+    LRU bookkeeping and eviction for GitHubTool's clone cache
+
+    A cached repository is its worktree (cache_dir/<name>), its bare
+    mirrors (mirror_dir/<name>-*.git) and its indexes (index_dir/<name>).
+    Sizes and last access times live in a SQLite manifest next to the
+    cache, so every process sharing the cache sees them. Pinned repositories
+    (in use by a workflow in any live process) are never evicted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        mirror_dir: str,
+        index_dir: str,
+        quota_bytes: Optional[int] = None,
+        min_free_bytes: Optional[int] = None
+    ):
+        """
+        Initialize cache manager
+
+        Args:
+            cache_dir: GitHubTool.cache_dir
+            mirror_dir: GitHubTool.mirror_dir
+            index_dir: GitHubTool.index_dir
+            quota_bytes: Most bytes the cache may use (default: $REDSPEC_REPO_CACHE_QUOTA or 5 GB)
+            min_free_bytes: Evict while the disk has less free space than this (default: $REDSPEC_REPO_CACHE_MIN_FREE or 1 GB)
+        """
+        self.cache_dir = cache_dir
+        self.mirror_dir = mirror_dir
+        self.index_dir = index_dir
+        self.quota_bytes = quota_bytes if quota_bytes is not None else _env_size("REDSPEC_REPO_CACHE_QUOTA", DEFAULT_QUOTA_BYTES)
+        self.min_free_bytes = (
+            min_free_bytes if min_free_bytes is not None
+            else _env_size("REDSPEC_REPO_CACHE_MIN_FREE", DEFAULT_MIN_FREE_BYTES)
+        )
+        self._pins: Dict[str, int] = {}
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(cache_dir.rstrip(os.sep) + "_manifest.sqlite3", check_same_thread=False, timeout=30)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS repos (
+                repo_name TEXT PRIMARY KEY,
+                size_bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pins (
+                repo_name TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (repo_name, pid)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _paths(self, repo_name: str) -> List[str]:
+        """Everything on disk that belongs to a cached repository"""
+        return (
+            [os.path.join(self.cache_dir, repo_name), os.path.join(self.index_dir, repo_name)]
+            + glob.glob(os.path.join(self.mirror_dir, glob.escape(repo_name) + "-*.git"))
+        )
+
+    def _measure(self, repo_name: str) -> int:
+        return sum(dir_size(path) for path in self._paths(repo_name) if os.path.isdir(path))
+
+    def record(self, repo_name: str) -> int:
+        """
+        Measure a repository after it was cloned or refreshed and mark it used
+
+        Returns:
+            Its size in bytes
+        """
+        size = self._measure(repo_name)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO repos (repo_name, size_bytes, last_access) VALUES (?, ?, ?)",
+                (repo_name, size, now),
+            )
+            self._conn.commit()
+            self._touched[repo_name] = now
+        return size
+
+    def touch(self, repo_name: str):
+        """Mark a repository as used (written at most every TOUCH_INTERVAL_SECONDS)"""
+        now = time.time()
+        with self._lock:
+            if now - self._touched.get(repo_name, 0) < TOUCH_INTERVAL_SECONDS:
+                return
+            self._touched[repo_name] = now
+            self._conn.execute("UPDATE repos SET last_access = ? WHERE repo_name = ?", (now, repo_name))
+            self._conn.commit()
+
+    def _set_pin(self, repo_name: str, delta: int):
+        with self._lock:
+            count = self._pins.get(repo_name, 0) + delta
+            if count > 0:
+                self._pins[repo_name] = count
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pins (repo_name, pid, count) VALUES (?, ?, ?)",
+                    (repo_name, os.getpid(), count),
+                )
+            else:
+                self._pins.pop(repo_name, None)
+                self._conn.execute("DELETE FROM pins WHERE repo_name = ? AND pid = ?", (repo_name, os.getpid()))
+            self._conn.commit()
+
+    @contextmanager
+    def pin(self, repo_name: str) -> Iterator[None]:
+        """Keep a repository from being evicted while the block runs"""
+        self._set_pin(repo_name, 1)
+        try:
+            yield
+        finally:
+            self._set_pin(repo_name, -1)
+
+    def pinned(self) -> set:
+        """Repositories pinned by this or any other live process"""
+        with self._lock:
+            rows = self._conn.execute("SELECT repo_name, pid FROM pins").fetchall()
+            dead = {pid for _, pid in rows if pid != os.getpid() and not _pid_alive(pid)}
+            if dead:
+                self._conn.executemany("DELETE FROM pins WHERE pid = ?", [(pid,) for pid in dead])
+                self._conn.commit()
+            return set(self._pins) | {name for name, pid in rows if pid not in dead}
+
+    def entries(self) -> List[Dict]:
+        """
+        Cached repositories, least recently used first
+
+        Worktrees the manifest does not know yet (e.g. cloned before it
+        existed) are measured and added with their modification time.
+        """
+        with self._lock:
+            known = {
+                name: {"repo_name": name, "size_bytes": size, "last_access": last_access}
+                for name, size, last_access in self._conn.execute(
+                    "SELECT repo_name, size_bytes, last_access FROM repos"
+                )
+            }
+
+        try:
+            on_disk = {entry.name: entry for entry in os.scandir(self.cache_dir) if entry.is_dir()}
+        except OSError:
+            on_disk = {}
+        for name in set(on_disk) - set(known):
+            known[name] = {"repo_name": name, "size_bytes": self._measure(name), "last_access": on_disk[name].stat().st_mtime}
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO repos (repo_name, size_bytes, last_access) VALUES (?, ?, ?)",
+                    (name, known[name]["size_bytes"], known[name]["last_access"]),
+                )
+                self._conn.commit()
+        for name in set(known) - set(on_disk):
+            self._forget(name)
+            del known[name]
+
+        return sorted(known.values(), key=lambda entry: entry["last_access"])
+
+    def _forget(self, repo_name: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM repos WHERE repo_name = ?", (repo_name,))
+            self._conn.commit()
+            self._touched.pop(repo_name, None)
+
+    def _free_bytes(self) -> Optional[int]:
+        try:
+            return shutil.disk_usage(self.cache_dir).free
+        except OSError:
+            return None
+
+    def evict(self, keep: Optional[List[str]] = None) -> List[str]:
+        """
+        Delete least recently used repositories until the cache fits
+
+        Evicts while the cache is over quota_bytes or the disk has less
+        than min_free_bytes free. Pinned repositories, those in keep and those
+        locked by a reader or refresh are skipped, even if that leaves the
+        cache over quota.
+
+        Args:
+            keep: Repositories not to evict (e.g. the one just fetched)
+
+        Returns:
+            Names of the evicted repositories
+        """
+        entries = self.entries()
+        protected = self.pinned() | set(keep or [])
+        total = sum(entry["size_bytes"] for entry in entries)
+        free = self._free_bytes()
+        evicted = []
+
+        for entry in entries:
+            over_quota = total > self.quota_bytes
+            low_disk = free is not None and free < self.min_free_bytes
+            if not (over_quota or low_disk):
+                break
+            name = entry["repo_name"]
+            if name in protected:
+                continue
+            # Skip repositories being read or refreshed right now
+            lock = repo_lock(self.cache_dir, name)
+            if not lock.try_write():
+                continue
+            try:
+                print(f"🧹 Evicting cached repository {name} ({entry['size_bytes'] / 1024 ** 2:.1f} MB)")
+                for path in self._paths(name):
+                    shutil.rmtree(path, ignore_errors=True)
+                self._forget(name)
+            finally:
+                lock.release_write()
+            total -= entry["size_bytes"]
+            if free is not None:
+                free += entry["size_bytes"]
+            evicted.append(name)
+
+        if total > self.quota_bytes:
+            print(f"⚠️  Repository cache is {total / 1024 ** 2:.0f} MB, over its quota, but the rest is in use")
+        return evicted
+
+    def stats(self) -> Dict:
+        """Total size, quota and per-repository entries"""
+        entries = self.entries()
+        return {
+            "total_bytes": sum(entry["size_bytes"] for entry in entries),
+            "quota_bytes": self.quota_bytes,
+            "free_bytes": self._free_bytes(),
+            "pinned": sorted(self.pinned()),
+            "repos": entries,
+        }
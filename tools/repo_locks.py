@@ -0,0 +1,232 @@
+"""
+Repository Locks
+Reader/writer locks that keep clones from being rewritten while they are
+read, across threads and worker processes, and single-flight fetches
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover this process
+    fcntl = None
+
+
+class RepoLock:
+    """
+    Shared/exclusive lock for one cached repository
+
+    Readers (tool calls reading the checkout) share the lock; a writer
+    (a refresh or eviction that rewrites or deletes it) waits until they
+    are done and keeps new readers out meanwhile. Threads coordinate
+    through a condition variable; the process as a whole holds a flock on
+    a lock file, so worker processes sharing the cache coordinate too.
+    Read leases are re-entrant per thread; the write lock is not.
+    """
+
+    def __init__(self, lock_path: str):
+        """
+        Initialize lock
+
+        Args:
+            lock_path: Lock file (created on first use; never deleted)
+        """
+        self.lock_path = lock_path
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        self._held = threading.local()
+        self._fd = None
+        # Serialises flock calls, which can block on other processes; never
+        # taken while holding _cond, so waiting on a flock does not stall it
+        self._flock_mutex = threading.Lock()
+        self._mode = None  # Flock held by this process: None, "shared" or "exclusive"
+
+    def _flock(self, operation: int) -> bool:
+        """Apply a flock operation to the lock file; False if LOCK_NB and it is taken"""
+        if fcntl is None:
+            return True
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, operation)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(self):
+        if fcntl is not None and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mode = None
+
+    def _end_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers:
+                return
+        # Last reader out: drop the shared flock unless a new reader or a writer took over meanwhile
+        with self._flock_mutex:
+            with self._cond:
+                if self._readers == 0 and self._mode == "shared":
+                    self._unlock()
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold a shared lease: the checkout is not rewritten until the block ends"""
+        depth = getattr(self._held, "depth", 0)
+        if depth == 0:
+            with self._cond:
+                while self._writer or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+            try:
+                with self._flock_mutex:
+                    if self._mode != "shared":
+                        self._flock(fcntl.LOCK_SH if fcntl else 0)
+                        self._mode = "shared"
+            except BaseException:
+                self._end_read()
+                raise
+        self._held.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._held.depth = depth
+            if depth == 0:
+                self._end_read()
+
+    def _end_write(self):
+        with self._flock_mutex:
+            self._unlock()
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively, waiting for readers in every process to finish"""
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+                self._writer = True
+            finally:
+                self._writers_waiting -= 1
+        try:
+            with self._flock_mutex:
+                self._flock(fcntl.LOCK_EX if fcntl else 0)
+                self._mode = "exclusive"
+        except BaseException:
+            self._end_write()
+            raise
+        try:
+            yield
+        finally:
+            self._end_write()
+
+    def try_write(self) -> bool:
+        """
+        Take the lock exclusively only if nobody holds it
+
+        Returns:
+            True if taken; release it with release_write()
+        """
+        with self._cond:
+            if self._writer or self._readers or self._writers_waiting:
+                return False
+            if not self._flock_mutex.acquire(blocking=False):
+                return False
+            try:
+                if not self._flock((fcntl.LOCK_EX | fcntl.LOCK_NB) if fcntl else 0):
+                    return False
+                self._mode = "exclusive"
+            finally:
+                self._flock_mutex.release()
+            self._writer = True
+            return True
+
+    def release_write(self):
+        """Release a lock taken with try_write()"""
+        self._end_write()
+
+
+_locks: Dict[str, RepoLock] = {}
+_locks_lock = threading.Lock()
+
+
+def repo_lock(cache_dir: str, repo_name: str) -> RepoLock:
+    """
+    Process-wide lock for a repository in a clone cache
+
+    Args:
+        cache_dir: GitHubTool.cache_dir
+        repo_name: Name of the cached repository
+
+    Returns:
+        The same RepoLock for every caller in the process
+    """
+    lock_path = os.path.join(cache_dir.rstrip(os.sep) + "_locks", f"{repo_name}.lock")
+    with _locks_lock:
+        lock = _locks.get(lock_path)
+        if lock is None:
+            lock = _locks[lock_path] = RepoLock(lock_path)
+        return lock
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers with the same key share its result"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Call fn, or wait for the call already running for key
+
+        Args:
+            key: Identity of the work, e.g. "repo_url@branch"
+            fn: The work
+
+        Returns:
+            (result, shared): shared is True if another caller ran fn
+
+        Raises:
+            Whatever fn raised, in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
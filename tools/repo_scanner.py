@@ -0,0 +1,137 @@
+"""
+Repository Scanner
+Parallel directory walk and file processing shared by the GitHubTool helpers
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Threads mostly wait on the filesystem, so use more of them than cores
+DEFAULT_SCAN_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+def scan_workers(workers: Optional[int] = None) -> int:
+    """Worker count: explicit value, else REDSPEC_SCAN_WORKERS, else the default"""
+    if workers is None:
+        try:
+            workers = int(os.environ.get("REDSPEC_SCAN_WORKERS", "") or DEFAULT_SCAN_WORKERS)
+        except ValueError:
+            workers = DEFAULT_SCAN_WORKERS
+    return max(1, workers)
+
+
+@dataclass
+class ScanResult:
+    """Files and directories found by a scan, sorted by relative path"""
+    files: List[str] = field(default_factory=list)
+    directories: List[str] = field(default_factory=list)
+    sizes: Dict[str, int] = field(default_factory=dict)
+
+
+class RepoScanner:
+    """
+    Walks a repository with os.scandir on a bounded thread pool
+
+    Each directory is listed by a worker thread and its subdirectories are
+    queued as soon as they are seen, so large trees are listed concurrently.
+    The ignore callback is asked about every entry before anything is
+    queued; ignored directories are never opened. Results are sorted, so
+    output does not depend on thread scheduling.
+    """
+
+    def __init__(self, workers: Optional[int] = None, ignore: Optional[Callable[[str, bool], bool]] = None):
+        """
+        Initialize scanner
+
+        Args:
+            workers: Thread count (default: REDSPEC_SCAN_WORKERS or cores + 4, max 32)
+            ignore: Called with (relative path, is_dir); return True to skip the entry
+        """
+        self.workers = scan_workers(workers)
+        self.ignore = ignore or (lambda rel_path, is_dir: False)
+
+    def _scan_dir(self, root: str, rel_dir: str, with_sizes: bool) -> Tuple[List[Tuple[str, int]], List[str]]:
+        """List one directory: ([(file, size)], [subdirectory]) as relative paths"""
+        files, subdirs = [], []
+        try:
+            with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as entries:
+                for entry in entries:
+                    rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        is_dir = entry.is_dir()
+                        is_link = entry.is_symlink()
+                    except OSError:
+                        continue
+
+                    if is_dir:
+                        # Like os.walk, don't follow directory symlinks
+                        if not is_link and not self.ignore(rel_path, True):
+                            subdirs.append(rel_path)
+                        continue
+
+                    if self.ignore(rel_path, False):
+                        continue
+                    size = -1
+                    if with_sizes:
+                        try:
+                            size = entry.stat().st_size
+                        except OSError:
+                            pass
+                    files.append((rel_path, size))
+        except OSError:
+            pass
+        return files, subdirs
+
+    def scan(self, local_path: str, with_sizes: bool = False) -> ScanResult:
+        """
+        List every non-ignored file under local_path
+
+        Args:
+            local_path: Root directory to scan
+            with_sizes: Also stat each file (sizes of -1 mean the stat failed)
+
+        Returns:
+            ScanResult with sorted relative file and directory paths
+        """
+        result = ScanResult()
+        file_sizes: List[Tuple[str, int]] = []
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="repo-scan") as pool:
+            pending = {pool.submit(self._scan_dir, local_path, "", with_sizes)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_files, subdirs = future.result()
+                    file_sizes.extend(dir_files)
+                    result.directories.extend(subdirs)
+                    for subdir in subdirs:
+                        pending.add(pool.submit(self._scan_dir, local_path, subdir, with_sizes))
+
+        file_sizes.sort()
+        result.directories.sort()
+        result.files = [rel_path for rel_path, _ in file_sizes]
+        if with_sizes:
+            result.sizes = {rel_path: size for rel_path, size in file_sizes if size >= 0}
+        return result
+
+    def map(self, func: Callable[[T], R], items: List[T]) -> List[R]:
+        """
+        Apply func to every item on the thread pool
+
+        Args:
+            func: Function to run per item (must be thread-safe)
+            items: Inputs
+
+        Returns:
+            Results in the same order as items
+        """
+        if self.workers == 1 or len(items) < 2:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="repo-scan") as pool:
+            return list(pool.map(func, items))
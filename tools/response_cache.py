@@ -0,0 +1,284 @@
+"""
+Agent Response Cache
+Content-addressed cache for agent outputs with an in-memory LRU tier and an on-disk SQLite tier
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+# Disk-tier writes between purges of expired and surplus entries
+PURGE_EVERY_WRITES = 100
+
+
+def make_cache_key(agent_name: str, model: str, instruction: str, tools: List[str], prompt: str) -> str:
+    """
+    Build a content-addressed cache key
+
+    Args:
+        agent_name: Name of the agent
+        model: Model name the agent runs on
+        instruction: Agent system instruction
+        tools: Names of the tools available to the agent
+        prompt: Input prompt
+
+    Returns:
+        Hex SHA-256 digest identifying this exact agent call
+    """
+    payload = json.dumps(
+        {
+            "agent": agent_name,
+            "model": model,
+            "instruction": instruction,
+            "tools": sorted(tools),
+            "prompt": prompt,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """In-memory LRU tier with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize memory tier
+
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk tier backed by a single SQLite file
+
+    Expired entries are purged on open and every PURGE_EVERY_WRITES writes,
+    which also drops the oldest entries beyond max_entries.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 10000):
+        """
+        Initialize disk tier
+
+        Args:
+            db_path: Path to the SQLite database file (created if missing)
+            max_entries: Most entries kept on disk
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent_name TEXT,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)")
+        self._conn.commit()
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (value, expires_at) for a live entry, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, value: str, ttl: float, agent_name: str = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent_name, value, created_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, agent_name, value, now, now + ttl),
+            )
+            self._conn.commit()
+            self._writes += 1
+            purge = self._writes % PURGE_EVERY_WRITES == 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries, then the oldest ones beyond max_entries; returns how many were removed"""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),)).rowcount
+            removed += self._conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class ResponseCache:
+    """
+    Two-tier agent response cache
+
+    Lookups check the memory tier first and fall back to SQLite; disk hits
+    are promoted into memory. Each agent can have its own TTL, and a TTL of
+    0 disables caching for that agent entirely.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+        default_ttl: float = 3600,
+        agent_ttls: Optional[Dict[str, float]] = None,
+        enabled: bool = True
+    ):
+        """
+        Initialize response cache
+
+        Args:
+            db_path: SQLite file for the disk tier (default: temp directory); pass "" to keep memory only
+            max_memory_entries: Size of the in-memory LRU tier
+            max_disk_entries: Most entries kept in the SQLite tier (oldest are dropped first)
+            default_ttl: TTL in seconds for agents without an explicit TTL
+            agent_ttls: Per-agent TTL overrides in seconds
+            enabled: Set False to turn the cache into a no-op
+        """
+        if db_path is None:
+            db_path = os.path.join(tempfile.gettempdir(), "redspec_cache", "responses.sqlite3")
+
+        self.enabled = enabled
+        self.default_ttl = default_ttl
+        self.agent_ttls = agent_ttls or {}
+        self.memory = MemoryCache(max_memory_entries)
+        self.disk = SQLiteCache(db_path, max_disk_entries) if (enabled and db_path) else None
+        self._stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        self._stats_lock = threading.Lock()
+
+    def ttl_for(self, agent_name: str) -> float:
+        """TTL in seconds for an agent (0 means never cached)"""
+        return self.agent_ttls.get(agent_name, self.default_ttl)
+
+    def _count(self, *names: str):
+        with self._stats_lock:
+            for name in names:
+                self._stats[name] += 1
+
+    def get(self, key: str, agent_name: str = None) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_cache_key
+            agent_name: Agent the key belongs to (used for TTL checks)
+
+        Returns:
+            Cached output, or None on a miss
+        """
+        if not self.enabled or (agent_name and self.ttl_for(agent_name) <= 0):
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("hits", "memory_hits")
+            return value
+
+        if self.disk:
+            entry = self.disk.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                self.memory.set(key, value, max(expires_at - time.time(), 0))
+                self._count("hits", "disk_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: str, agent_name: str = None):
+        """
+        Store a response in both tiers
+
+        Args:
+            key: Cache key from make_cache_key
+            value: Agent output to cache
+            agent_name: Agent the key belongs to (selects the TTL)
+        """
+        ttl = self.ttl_for(agent_name) if agent_name else self.default_ttl
+        if not self.enabled or ttl <= 0 or not value:
+            return
+
+        self.memory.set(key, value, ttl)
+        if self.disk:
+            self.disk.set(key, value, ttl, agent_name)
+        self._count("writes")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+    def clear(self):
+        """Drop every cached response from both tiers"""
+        self.memory.clear()
+        if self.disk:
+            self.disk.clear()
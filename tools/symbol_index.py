@@ -0,0 +1,403 @@
+"""
+Symbol Index
+Per-repository table of class, function and method definitions for Python, Java, Kotlin and TS/JS
+"""
+
+import os
+import re
+import ast
+import json
+import time
+import threading
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from tools.code_index import git_blob_ids, file_signature
+
+
+INDEX_VERSION = 1
+INDEX_FILE = "symbols.json"
+MAX_FILE_SIZE = 1024 * 1024
+
+LANGUAGES = {
+    ".py": "python",
+    ".java": "java",
+    ".kt": "kotlin",
+    ".kts": "kotlin",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+}
+
+CLASS_KINDS = {"class", "interface", "enum", "record", "annotation", "object", "type"}
+
+# Words that look like a method call/declaration to the regexes below but aren't
+NOT_NAMES = {
+    "if", "for", "while", "switch", "catch", "return", "new", "else", "do", "try",
+    "synchronized", "function", "throw", "super", "this",
+}
+
+# Structural tokens outside comments and string literals
+_TOKENS = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"""(?:.|\n)*?"""|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`|[{};=()]',
+    re.S
+)
+
+_MODIFIERS = {
+    "java": r"(?:(?:public|private|protected|static|final|abstract|sealed|non-sealed|strictfp|synchronized|native|default)\s+)*",
+    "kotlin": r"(?:(?:public|private|protected|internal|open|final|override|abstract|sealed|data|enum|annotation|inner|inline|value|companion|suspend|operator|infix|tailrec|external|expect|actual)\s+)*",
+    "typescript": r"(?:(?:export|default|declare|abstract|public|private|protected|static|readonly|async|override)\s+)*",
+}
+_MODIFIERS["javascript"] = _MODIFIERS["typescript"]
+
+_ANNOTATIONS = r"(?:@[\w.]+(?:\([^)]*\))?\s*)*"
+
+# (kind, regex) per language; the name is the last captured group
+_PATTERNS = {
+    "java": [
+        ("class", re.compile(r"^\s*" + _ANNOTATIONS + _MODIFIERS["java"] + r"(class|interface|enum|record|@interface)\s+(\w+)", re.M)),
+        ("method", re.compile(
+            r"^\s*" + _ANNOTATIONS + _MODIFIERS["java"] + r"(?:<[\w\s,?<>&.]+>\s+)?(?!(?:return|new|throw|else|case|yield|await|public|private|protected|static|final|abstract|synchronized|native|default)\b)[\w.$]+(?:<[\w\s,?<>&.\[\]]*>)?(?:\[\])*\s+(\w+)\s*\(",
+            re.M
+        )),
+        ("constructor", re.compile(r"^\s*" + _ANNOTATIONS + r"(?:(?:public|private|protected)\s+)(\w+)\s*\(", re.M)),
+    ],
+    "kotlin": [
+        ("class", re.compile(r"^\s*" + _ANNOTATIONS + _MODIFIERS["kotlin"] + r"(class|interface|object)\s+(\w+)", re.M)),
+        ("function", re.compile(r"^\s*" + _ANNOTATIONS + _MODIFIERS["kotlin"] + r"fun\s+(?:<[^>]+>\s*)?(?:[\w.<>?]+\.)?(\w+)\s*\(", re.M)),
+    ],
+    "typescript": [
+        ("class", re.compile(r"^\s*" + _MODIFIERS["typescript"] + r"(class|interface|enum)\s+(\w+)", re.M)),
+        ("type", re.compile(r"^\s*" + _MODIFIERS["typescript"] + r"type\s+(\w+)\s*(?:<[^>]*>)?\s*=", re.M)),
+        ("function", re.compile(r"^\s*" + _MODIFIERS["typescript"] + r"function\s*\*?\s*(\w+)", re.M)),
+        ("function", re.compile(
+            r"^\s*" + _MODIFIERS["typescript"] + r"(?:const|let|var)\s+(\w+)\s*(?::[^=\n]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=\n]+)?=>|\w+\s*=>)",
+            re.M
+        )),
+        ("method", re.compile(r"^\s*" + _MODIFIERS["typescript"] + r"(?:get\s+|set\s+)?\*?(\w+)\s*(?:<[^>]*>)?\s*\([^)]*\)\s*(?::\s*[^{;]+)?\{", re.M)),
+    ],
+}
+_PATTERNS["javascript"] = _PATTERNS["typescript"]
+
+
+def _python_symbols(source: str) -> List[Dict]:
+    """Definitions in Python source, using the ast module"""
+    symbols = []
+
+    def visit(node, parent: Optional[str], parent_is_class: bool):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                kind = "class"
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kind = "method" if parent_is_class else "function"
+            else:
+                visit(child, parent, parent_is_class)
+                continue
+
+            qualified = f"{parent}.{child.name}" if parent else child.name
+            start = min([child.lineno] + [d.lineno for d in child.decorator_list])
+            symbols.append({
+                "name": child.name,
+                "qualified_name": qualified,
+                "kind": kind,
+                "start_line": start,
+                "end_line": getattr(child, "end_lineno", None) or child.lineno,
+                "parent": parent,
+            })
+            visit(child, qualified, kind == "class")
+
+    visit(ast.parse(source), None, False)
+    return symbols
+
+
+class _BraceMap:
+    """Locations of braces, semicolons and '=' outside comments and strings"""
+
+    def __init__(self, source: str):
+        self.line_starts = [0] + [m.end() for m in re.finditer(r"\n", source)]
+        self.tokens = []  # (offset, char)
+        for match in _TOKENS.finditer(source):
+            if len(match.group()) == 1:
+                self.tokens.append((match.start(), match.group()))
+        self.offsets = [offset for offset, _ in self.tokens]
+
+        self.matching = {}
+        stack = []
+        for offset, char in self.tokens:
+            if char == "{":
+                stack.append(offset)
+            elif char == "}" and stack:
+                self.matching[stack.pop()] = offset
+
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self.line_starts, offset)
+
+    def body_end(self, start: int, limit: int, stop_at_equals: bool) -> Optional[int]:
+        """
+        Offset where the definition whose signature ends at `start` ends
+
+        The body is the first '{' at parenthesis depth 0 after the signature,
+        matched to its closing brace. A ';' (or a Kotlin/TS '=' expression
+        body) before any '{' ends the definition there. Returns None if
+        neither shows up before `limit` (the next definition), i.e. the
+        definition has no body.
+        """
+        depth = 0
+        i = bisect_right(self.offsets, start - 1)
+        while i < len(self.tokens):
+            offset, char = self.tokens[i]
+            if offset >= limit:
+                return None
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth = max(depth - 1, 0)
+            elif depth == 0:
+                if char == "{":
+                    return self.matching.get(offset, offset)
+                if char in ";}" or (char == "=" and stop_at_equals):
+                    return offset
+            i += 1
+        return None
+
+
+def _regex_symbols(source: str, language: str) -> List[Dict]:
+    """Definitions in brace-delimited languages, via regexes plus brace matching"""
+    braces = _BraceMap(source)
+    found = {}
+
+    for kind, pattern in _PATTERNS[language]:
+        for match in pattern.finditer(source):
+            name = match.group(match.lastindex)
+            if name in NOT_NAMES:
+                continue
+            name_offset = match.start(match.lastindex)
+            if name_offset in found:
+                continue
+
+            if kind == "class":
+                kind_word = match.group(match.lastindex - 1)
+                symbol_kind = {"@interface": "annotation"}.get(kind_word, kind_word)
+            else:
+                symbol_kind = kind
+
+            # Patterns that end on the opening brace leave it for body_end
+            signature_end = match.end() - 1 if match.group().endswith("{") else match.end()
+            found[name_offset] = (name, symbol_kind, signature_end)
+
+    symbols = []
+    starts = sorted(found)
+    for position, name_offset in enumerate(starts):
+        name, symbol_kind, signature_end = found[name_offset]
+        # A body has to open before the next definition starts
+        limit = starts[position + 1] if position + 1 < len(starts) else len(source)
+        limit = source.rfind("\n", signature_end, limit) + 1 or limit
+        end = braces.body_end(
+            signature_end,
+            max(limit, signature_end + 1),
+            stop_at_equals=language != "java" and symbol_kind != "type"
+        )
+        symbols.append({
+            "name": name,
+            "kind": symbol_kind,
+            "start_line": braces.line_of(name_offset),
+            "end_line": braces.line_of(signature_end if end is None else end),
+        })
+
+    symbols.sort(key=lambda s: (s["start_line"], -s["end_line"]))
+
+    # Parent = innermost enclosing class-like definition
+    open_classes = []
+    for symbol in symbols:
+        while open_classes and open_classes[-1]["end_line"] < symbol["start_line"]:
+            open_classes.pop()
+        parent = open_classes[-1] if open_classes else None
+
+        if symbol["kind"] == "method" and parent is None:
+            symbol["kind"] = "function"
+        elif symbol["kind"] == "function" and parent is not None and language in ("kotlin", "typescript", "javascript"):
+            symbol["kind"] = "method"
+        if symbol["kind"] == "constructor" and (parent is None or parent["name"] != symbol["name"]):
+            symbol["kind"] = None
+            continue
+
+        symbol["parent"] = parent["qualified_name"] if parent else None
+        symbol["qualified_name"] = f"{symbol['parent']}.{symbol['name']}" if parent else symbol["name"]
+        if symbol["kind"] in CLASS_KINDS and symbol["end_line"] > symbol["start_line"]:
+            open_classes.append(symbol)
+
+    return [s for s in symbols if s["kind"]]
+
+
+def extract_symbols(source: str, language: str) -> List[Dict]:
+    """
+    Extract definitions from one file
+
+    Args:
+        source: File contents
+        language: One of the values in LANGUAGES
+
+    Returns:
+        Symbols with name, qualified_name, kind, start_line, end_line and parent
+    """
+    if language == "python":
+        try:
+            return _python_symbols(source)
+        except (SyntaxError, ValueError):
+            return []
+    return _regex_symbols(source, language)
+
+
+class SymbolIndex:
+    """
+    Symbol table for one repository
+
+    Answers "where is X defined" and "what is defined in file F" from an
+    index built once per fetch, instead of a full-tree text search.
+    """
+
+    def __init__(self, repo_path: str, index_dir: str):
+        """
+        Initialize index
+
+        Args:
+            repo_path: Local path to the repository
+            index_dir: Directory the index is persisted in
+        """
+        self.repo_path = repo_path
+        self.index_dir = index_dir
+        self.files: Dict[str, Dict] = {}  # path -> {"signature", "language", "symbols"}
+        self._by_name: Optional[Dict[str, List[Dict]]] = None
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.index_dir, INDEX_FILE)
+
+    def load(self) -> bool:
+        """Load the persisted index; returns False if there is none"""
+        try:
+            with open(self.index_path, "r") as f:
+                state = json.load(f)
+        except Exception:
+            return False
+        if state.get("version") != INDEX_VERSION:
+            return False
+        self.files = state["files"]
+        self._by_name = None
+        return True
+
+    def save(self):
+        """Persist the index atomically"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Per-writer temp file: other workers may be saving the same index
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.files}, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def build(self, files: List[str]) -> Dict:
+        """
+        Bring the index up to date with the given file list
+
+        Only source files in a supported language are parsed, and files
+        whose content signature is unchanged are reused.
+
+        Args:
+            files: Relative paths of the repository's files
+
+        Returns:
+            Build statistics
+        """
+        start = time.time()
+        if not self.files:
+            self.load()
+
+        blob_ids = git_blob_ids(self.repo_path)
+        updated = {}
+        parsed = 0
+
+        for rel_path in files:
+            language = LANGUAGES.get(os.path.splitext(rel_path)[1].lower())
+            if not language:
+                continue
+            signature = file_signature(self.repo_path, rel_path, blob_ids)
+            if not signature:
+                continue
+
+            previous = self.files.get(rel_path)
+            if previous and previous["signature"] == signature:
+                updated[rel_path] = previous
+                continue
+
+            full_path = os.path.join(self.repo_path, rel_path)
+            try:
+                if os.path.getsize(full_path) > MAX_FILE_SIZE:
+                    continue
+                with open(full_path, "r", encoding="utf-8", errors="ignore") as f:
+                    source = f.read()
+            except OSError:
+                continue
+
+            updated[rel_path] = {
+                "signature": signature,
+                "language": language,
+                "symbols": extract_symbols(source, language),
+            }
+            parsed += 1
+
+        self.files = updated
+        self._by_name = None
+        self.save()
+
+        return {
+            "files": len(self.files),
+            "files_parsed": parsed,
+            "files_reused": len(self.files) - parsed,
+            "symbols": sum(len(entry["symbols"]) for entry in self.files.values()),
+            "build_seconds": round(time.time() - start, 3),
+            "size_bytes": os.path.getsize(self.index_path),
+        }
+
+    def _name_table(self) -> Dict[str, List[Dict]]:
+        if self._by_name is None:
+            self._by_name = {}
+            for rel_path, entry in self.files.items():
+                for symbol in entry["symbols"]:
+                    record = {**symbol, "file": rel_path, "language": entry["language"]}
+                    self._by_name.setdefault(symbol["name"].lower(), []).append(record)
+        return self._by_name
+
+    def find(self, name: str, kind: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """
+        Find definitions by name
+
+        Accepts a plain name ("BookingService") or a qualified one
+        ("BookingService.cancel"). Exact-case matches are listed first.
+
+        Args:
+            name: Symbol name to look up
+            kind: Optional kind filter (class, function, method, ...)
+            limit: Maximum number of results
+
+        Returns:
+            Matching symbols with file and line span
+        """
+        simple = name.rsplit(".", 1)[-1]
+        matches = self._name_table().get(simple.lower(), [])
+        if "." in name:
+            matches = [s for s in matches if s["qualified_name"].lower().endswith(name.lower())]
+        if kind:
+            matches = [s for s in matches if s["kind"] == kind]
+
+        matches = sorted(matches, key=lambda s: (s["name"] != simple, s["file"], s["start_line"]))
+        return matches[:limit]
+
+    def symbols_in_file(self, rel_path: str) -> Optional[List[Dict]]:
+        """Definitions in one file, or None if the file isn't indexed"""
+        entry = self.files.get(rel_path)
+        if entry is None:
+            return None
+        return entry["symbols"]
@@ -0,0 +1,320 @@
+"""
+Tracing
+Lightweight spans for the orchestrator, agents and tools, exported as JSON
+lines or to an OTLP/HTTP collector
+
+A generate_spec run is the root span, each run_agent call a child of it and
+each tool call a child of the agent that made it. Nothing is recorded unless
+an exporter is configured (REDSPEC_TRACE_FILE, REDSPEC_OTLP_ENDPOINT or
+set_exporter), so tracing costs nothing when it is off.
+"""
+
+import os
+import sys
+import json
+import time
+import secrets
+import threading
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Spans buffered by the OTLP exporter before a batch is sent regardless of root spans
+OTLP_MAX_BATCH = 512
+OTLP_TIMEOUT_SECONDS = 5
+SERVICE_NAME = "redspec"
+
+
+@dataclass
+class Span:
+    """One timed operation"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time: float = 0.0  # Unix seconds
+    end_time: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"  # "ok" or "error"
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return round((self.end_time - self.start_time) * 1000, 3)
+
+    def set_attribute(self, key: str, value: Any):
+        """Set an attribute (None values are left out)"""
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "duration_ms": self.duration_ms}
+
+
+class _NoopSpan:
+    """Stand-in yielded while tracing is off"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("redspec_current_span", default=None)
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list (tests and benchmarks)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def shutdown(self):
+        pass
+
+
+class FileSpanExporter:
+    """Appends each finished span to a JSON lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    def shutdown(self):
+        pass
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> Dict:
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(int(span.start_time * 1e9)),
+        "endTimeUnixNano": str(int((span.end_time or span.start_time) * 1e9)),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1},
+    }
+    if span.parent_id:
+        otlp["parentSpanId"] = span.parent_id
+    return otlp
+
+
+class OTLPHttpSpanExporter:
+    """
+    Sends spans to an OpenTelemetry collector as OTLP/HTTP JSON
+
+    Spans are buffered and posted to <endpoint>/v1/traces in a background
+    thread whenever a root span finishes or the buffer fills up. Failed
+    posts are reported once and otherwise dropped.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = SERVICE_NAME):
+        self.url = endpoint.rstrip("/")
+        if not self.url.endswith("/v1/traces"):
+            self.url += "/v1/traces"
+        self.service_name = service_name
+        self._buffer: List[Span] = []
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._warned = False
+
+    def export(self, span: Span):
+        with self._lock:
+            self._buffer.append(span)
+            if span.parent_id is not None and len(self._buffer) < OTLP_MAX_BATCH:
+                return
+            batch, self._buffer = self._buffer, []
+        thread = threading.Thread(target=self._post, args=(batch,), daemon=True)
+        thread.start()
+        self._threads = [t for t in self._threads if t.is_alive()] + [thread]
+
+    def _post(self, batch: List[Span]):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "redspec.tracing"}, "spans": [_otlp_span(span) for span in batch]}],
+            }]
+        }
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(body, default=str).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=OTLP_TIMEOUT_SECONDS):
+                pass
+        except Exception as e:
+            if not self._warned:
+                self._warned = True
+                print(f"⚠️  Could not export spans to {self.url}: {e}")
+
+    def shutdown(self):
+        """Send whatever is buffered and wait for in-flight posts"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            self._post(batch)
+        for thread in self._threads:
+            thread.join(OTLP_TIMEOUT_SECONDS)
+
+
+_exporter = None
+_exporter_configured = False
+
+
+def _exporter_from_env():
+    path = os.getenv("REDSPEC_TRACE_FILE")
+    if path:
+        return FileSpanExporter(path)
+    endpoint = os.getenv("REDSPEC_OTLP_ENDPOINT")
+    if endpoint:
+        return OTLPHttpSpanExporter(endpoint)
+    return None
+
+
+def get_exporter():
+    """Configured span exporter, or None when tracing is off"""
+    global _exporter, _exporter_configured
+    if not _exporter_configured:
+        _exporter = _exporter_from_env()
+        _exporter_configured = True
+    return _exporter
+
+
+def set_exporter(exporter) -> Optional[Any]:
+    """
+    Replace the span exporter
+
+    Args:
+        exporter: Object with export(span) and shutdown(), or None to turn tracing off
+
+    Returns:
+        The previous exporter
+    """
+    global _exporter, _exporter_configured
+    previous = get_exporter()
+    _exporter, _exporter_configured = exporter, True
+    return previous
+
+
+def current_span() -> Optional[Span]:
+    """Innermost active span of the current task, if any"""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time a block as a span
+
+    The span becomes a child of the current span (a new trace when there is
+    none) and the parent of spans opened inside the block, including those
+    in asyncio tasks created there. An exception marks it as failed and
+    propagates.
+
+    Args:
+        name: Span name, e.g. "agent.prd" or "tool.read_code_file"
+        **attributes: Initial attributes
+
+    Yields:
+        The span, for adding attributes known only once the work is done
+    """
+    exporter = get_exporter()
+    if exporter is None:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        start_time=time.time()
+    )
+    current.set_attributes(**attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_time = time.time()
+        _current_span.reset(token)
+        try:
+            exporter.export(current)
+        except Exception:
+            pass
+
+
+def summarize_trace_file(path: str) -> List[Dict]:
+    """
+    Total time per span name in a FileSpanExporter file
+
+    Args:
+        path: JSON lines file written by FileSpanExporter
+
+    Returns:
+        One entry per span name, slowest total first
+    """
+    totals: Dict[str, Dict] = {}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            entry = totals.setdefault(record["name"], {"name": record["name"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0})
+            duration = record.get("duration_ms") or 0.0
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + duration, 3)
+            entry["max_ms"] = max(entry["max_ms"], duration)
+            entry["errors"] += record.get("status") == "error"
+    return sorted(totals.values(), key=lambda entry: entry["total_ms"], reverse=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python -m tools.tracing <trace.jsonl>")
+        sys.exit(1)
+    print(f"{'span':<40} {'count':>6} {'total ms':>12} {'max ms':>10} {'errors':>7}")
+    for entry in summarize_trace_file(sys.argv[1]):
+        print(f"{entry['name']:<40} {entry['count']:>6} {entry['total_ms']:>12.1f} {entry['max_ms']:>10.1f} {entry['errors']:>7}")